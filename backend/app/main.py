@@ -1,17 +1,41 @@
 from pathlib import Path
 import json
 import logging
+import os
 
 from dotenv import load_dotenv
-from fastapi import Depends, FastAPI, HTTPException, UploadFile, File, Form, status
+from typing import Any, Optional
+
+from fastapi import Depends, FastAPI, Header, HTTPException, Request, Response, UploadFile, File, Form, Query, status
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import ValidationError
 
-from .repository import PlanningRepository
-from .schemas import MeetingContext, PlanningResponse
+from .repository import PlanningRepository, create_repository
+from .schemas import MeetingContext, PlanStatus, PlanningBatchRequest, PlanningResponse, TaskGraph
+from .services.http_transport import aclose_http_clients
+from .services.jobs import JobQueueFullError, PlanningJobQueue
+from .services.llm_cache import TieredLLMCache
+from .services.metrics import IN_FLIGHT, render_metrics
 from .services.openrouter_client import OpenRouterClient
 from .services.openrouter_pipeline import OpenRouterPlanningPipeline
+from .services.persistence import PlanPersister
+from .services.plan_events import TERMINAL_EVENTS, PlanEventBroker
+from .services.profiling import ProfileStore, RequestProfile, activate, start_profile
+from .services.rate_limit import shared_budget
 from .services.planning import PlanningService
-from .services.transcription import transcribe_upload
+from .services.response_cache import SerializedPlanCache
+from .services.single_flight import PlanFlights
+from .services.transcription import (
+    TranscriptionCancelledError,
+    TranscriptionTimeoutError,
+    default_options as default_transcription_options,
+    get_transcription_executor,
+    shutdown_transcription_executor,
+    start_model_preload,
+    transcribe_upload,
+    transcription_status,
+)
+from .services.uploads import UploadTooLargeError
 
 
 def get_repository() -> PlanningRepository:
@@ -22,18 +46,109 @@ def get_openrouter_pipeline() -> OpenRouterPlanningPipeline:
     return _pipeline
 
 
+def get_job_queue() -> PlanningJobQueue:
+    return _job_queue
+
+
+def get_batch_job_queue() -> PlanningJobQueue:
+    return _batch_job_queue
+
+
+def get_plan_persister() -> PlanPersister:
+    return _persister
+
+
+def get_response_cache() -> SerializedPlanCache:
+    return _response_cache
+
+
+def get_event_broker() -> PlanEventBroker:
+    return _events
+
+
+def get_profile_store() -> ProfileStore:
+    return _profiles
+
+
+def get_plan_flights() -> PlanFlights:
+    return _plan_flights
+
+
 def get_planning_service(
     repository: PlanningRepository = Depends(get_repository),
     pipeline: OpenRouterPlanningPipeline = Depends(get_openrouter_pipeline),
+    jobs: PlanningJobQueue = Depends(get_job_queue),
+    persister: PlanPersister = Depends(get_plan_persister),
+    responses: SerializedPlanCache = Depends(get_response_cache),
+    events: PlanEventBroker = Depends(get_event_broker),
+    batch_jobs: PlanningJobQueue = Depends(get_batch_job_queue),
+    profiles: ProfileStore = Depends(get_profile_store),
+    flights: PlanFlights = Depends(get_plan_flights),
 ) -> PlanningService:
-    return PlanningService(repository=repository, pipeline=pipeline)
+    return PlanningService(
+        repository=repository,
+        pipeline=pipeline,
+        jobs=jobs,
+        persister=persister,
+        responses=responses,
+        events=events,
+        batch_jobs=batch_jobs,
+        profiles=profiles,
+        flights=flights,
+    )
+
+
+def _queue_full(exc: JobQueueFullError) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(exc),
+        headers={"Retry-After": "5"},
+    )
+
+
+def _requested_profile(request: Request, label: str) -> Optional[RequestProfile]:
+    """
+    Start a profile when the request opts in with ``X-Nova-Profile: 1`` or ``?profile=1``.
+    """
+    if not _PROFILING_ENABLED:
+        return None
+    flag = request.headers.get("x-nova-profile") or request.query_params.get("profile") or ""
+    if flag.strip().lower() not in {"1", "true", "yes"}:
+        return None
+    return start_profile(label)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match uses weak comparison, so a W/ prefix still matches.
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
 
 
 load_dotenv(dotenv_path=Path(__file__).resolve().parent.parent / ".env", override=False)
 
-_repository = PlanningRepository()
+_repository = create_repository()
 _openrouter_client = OpenRouterClient()
-_pipeline = OpenRouterPlanningPipeline(client=_openrouter_client)
+_pipeline = OpenRouterPlanningPipeline(client=_openrouter_client, cache=TieredLLMCache.from_env())
+_job_queue = PlanningJobQueue()
+# Batch jobs get their own pool; the shared OpenRouter/GitHub budgets, not the
+# worker count, are what limit batch throughput.
+_batch_job_queue = PlanningJobQueue(
+    max_workers=8,
+    max_pending=256,
+    env_prefix="PLANNING_BATCH",
+    thread_name_prefix="nova-batch",
+)
+_persister = PlanPersister()
+_response_cache = SerializedPlanCache()
+_events = PlanEventBroker()
+_profiles = ProfileStore()
+_plan_flights = PlanFlights()
+_PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "true").strip().lower() not in {"0", "false", "no"}
+IN_FLIGHT.set_function(lambda: _job_queue.in_flight, stage="planning_jobs")
+IN_FLIGHT.set_function(lambda: _batch_job_queue.in_flight, stage="batch_jobs")
+IN_FLIGHT.set_function(lambda: get_transcription_executor().in_flight, stage="transcription_jobs")
+IN_FLIGHT.set_function(lambda: shared_budget("OPENROUTER").stats()["active"], stage="openrouter_requests")
+IN_FLIGHT.set_function(lambda: shared_budget("GITHUB").stats()["active"], stage="github_requests")
 logger = logging.getLogger("nova.app")
 logging.basicConfig(level=logging.INFO)
 
@@ -44,10 +159,32 @@ def create_app() -> FastAPI:
         description="Receives meeting context and coordinates sprint planning through OpenRouter prompts.",
     )
 
+    app.add_event_handler("startup", start_model_preload)
+    app.add_event_handler("shutdown", aclose_http_clients)
+    app.add_event_handler("shutdown", shutdown_transcription_executor)
+    app.add_event_handler("shutdown", _persister.flush)
+
     @app.get("/health", tags=["health"])
     def healthcheck() -> dict[str, str]:
         return {"status": "ok"}
 
+    @app.get("/metrics", tags=["health"], response_class=Response)
+    def metrics() -> Response:
+        """
+        Per-stage latency histograms, counters and in-flight gauges in Prometheus text format.
+        """
+        return Response(content=render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+    @app.get("/ready", tags=["health"])
+    def readiness(response: Response) -> dict[str, Any]:
+        """
+        Readiness probe: 503 until the Whisper models are loaded and warmed up.
+        """
+        transcription = transcription_status()
+        if not transcription["ready"]:
+            response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return {"status": "ready" if transcription["ready"] else "loading", "transcription": transcription}
+
     @app.post(
         "/api/v1/meetings/{meeting_id}/plan",
         response_model=PlanningResponse,
@@ -57,14 +194,52 @@ def create_app() -> FastAPI:
     def submit_plan(
         meeting_id: str,
         context: MeetingContext,
+        request: Request,
+        response: Response,
         service: PlanningService = Depends(get_planning_service),
     ) -> PlanningResponse:
+        """
+        Queue plan generation. With ``X-Nova-Profile: 1`` (or ``?profile=1``)
+        the job is profiled; fetch the result from ``/api/v1/profiles/{agentJobId}``.
+        """
         if context.meetingId != meeting_id:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="meetingId in path and body must match",
             )
-        return service.submit_plan(context)
+        try:
+            planning = service.submit_plan(context, profile=_requested_profile(request, "plan"))
+        except JobQueueFullError as exc:
+            raise _queue_full(exc) from exc
+        if planning.status is PlanStatus.ready:
+            # The context was unchanged and the existing plan came back as is.
+            response.status_code = status.HTTP_200_OK
+        return planning
+
+    @app.post(
+        "/api/v1/meetings/plan/batch",
+        tags=["planning"],
+        response_class=StreamingResponse,
+    )
+    async def submit_plan_batch(
+        batch: PlanningBatchRequest,
+        service: PlanningService = Depends(get_planning_service),
+    ) -> StreamingResponse:
+        """
+        Plan many meetings at once, streaming NDJSON progress: one line per item
+        as it is queued and starts processing, and a line with the plan as each
+        one finishes (in completion order).
+        """
+
+        async def ndjson_stream():
+            async for item in service.plan_batch(batch.meetings):
+                yield json.dumps(item) + "\n"
+
+        return StreamingResponse(
+            ndjson_stream(),
+            media_type="application/x-ndjson",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
 
     @app.get(
         "/api/v1/meetings/{meeting_id}/plan",
@@ -73,12 +248,85 @@ def create_app() -> FastAPI:
     )
     def get_plan(
         meeting_id: str,
+        job_id: Optional[str] = Query(None, alias="jobId", description="agentJobId returned on submission"),
+        if_none_match: Optional[str] = Header(None),
         service: PlanningService = Depends(get_planning_service),
-    ) -> PlanningResponse:
+    ) -> Response:
+        waiting = service.queued_behind(meeting_id, job_id) if job_id else None
+        if waiting is not None:
+            # Queued behind the meeting's running job (PLANNING_CONFLICT=queue).
+            return Response(content=waiting.model_dump_json(), media_type="application/json")
+        try:
+            serialized = service.get_plan_serialized(meeting_id)
+        except ValueError as exc:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
+        if job_id and serialized.agent_job_id != job_id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Job '{job_id}' was superseded by job '{serialized.agent_job_id}'.",
+            )
+        headers = {"ETag": serialized.etag, "Cache-Control": "no-cache"}
+        if if_none_match and _etag_matches(if_none_match, serialized.etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(content=serialized.body, media_type="application/json", headers=headers)
+
+    @app.get(
+        "/api/v1/meetings/{meeting_id}/plan/graph",
+        response_model=TaskGraph,
+        tags=["planning"],
+    )
+    def get_task_graph(
+        meeting_id: str,
+        service: PlanningService = Depends(get_planning_service),
+    ) -> TaskGraph:
+        """
+        The plan's tasks as an indexed DAG: ids, resolved dependencies,
+        topological order, earliest/latest schedule, critical path, plus any
+        cycles or dependsOn entries that matched no task.
+        """
+        try:
+            return service.get_task_graph(meeting_id)
+        except LookupError as exc:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc)) from exc
+        except ValueError as exc:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
+
+    @app.get(
+        "/api/v1/meetings/{meeting_id}/plan/stream",
+        tags=["planning"],
+        response_class=StreamingResponse,
+    )
+    async def stream_plan(
+        meeting_id: str,
+        request: Request,
+        service: PlanningService = Depends(get_planning_service),
+        events: PlanEventBroker = Depends(get_event_broker),
+    ) -> StreamingResponse:
+        """
+        Server-sent events for a plan: ``status``, ``partial`` (summary, risks and
+        milestones parsed so far) and a final ``ready`` or ``failed``.
+        """
         try:
-            return service.get_plan(meeting_id)
+            current = service.get_plan(meeting_id)
         except ValueError as exc:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
+        initial_event = current.status.value if current.status.value in TERMINAL_EVENTS else "status"
+        initial = {"event": initial_event, "data": service.event_payload(current)}
+
+        async def event_stream():
+            async for event in events.subscribe(meeting_id, initial):
+                if await request.is_disconnected():
+                    break
+                if event is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+
+        return StreamingResponse(
+            event_stream(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
 
     @app.post(
         "/api/v1/meetings/analyze",
@@ -87,8 +335,12 @@ def create_app() -> FastAPI:
         tags=["planning"],
     )
     async def analyze_meeting(
+        request: Request,
         context: str = Form(..., description="Meeting context payload (JSON)"),
         meeting_audio: UploadFile = File(..., description="Recorded meeting audio"),
+        beam_size: Optional[int] = Form(None, description="Whisper beam size (1-10)"),
+        vad: Optional[bool] = Form(None, description="Trim silences with voice-activity detection"),
+        compute_type: Optional[str] = Form(None, description="CTranslate2 compute type, e.g. int8 or float32"),
         service: PlanningService = Depends(get_planning_service),
     ) -> PlanningResponse:
         try:
@@ -98,6 +350,14 @@ def create_app() -> FastAPI:
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Invalid context JSON: {exc}",
             ) from exc
+        try:
+            transcription_options = default_transcription_options().for_request(
+                beam_size=beam_size,
+                vad=vad,
+                compute_type=compute_type,
+            )
+        except ValueError as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
 
         logger.info(
             "Received meeting analysis request: meetingId=%s audio=%s (%s bytes)",
@@ -106,18 +366,40 @@ def create_app() -> FastAPI:
             meeting_audio.size if hasattr(meeting_audio, "size") else "unknown",
         )
 
-        transcript = await transcribe_upload(meeting_audio)
-        context_payload["transcript"] = transcript
-
+        profile = _requested_profile(request, "analyze")
         try:
-            meeting_context = MeetingContext.model_validate(context_payload)
+            # The event loop serves other requests too, so only spans are
+            # recorded here; the transcription worker thread is sampled.
+            with activate(profile, sample=False, finish_on_error=True):
+                transcription = await transcribe_upload(
+                    meeting_audio,
+                    options=transcription_options,
+                    is_disconnected=request.is_disconnected,
+                )
+                context_payload["transcript"] = transcription.text
+                meeting_context = MeetingContext.model_validate(context_payload)
         except ValidationError as exc:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=exc.errors(),
             ) from exc
+        except UploadTooLargeError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=str(exc),
+            ) from exc
+        except JobQueueFullError as exc:
+            raise _queue_full(exc) from exc
+        except TranscriptionTimeoutError as exc:
+            raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(exc)) from exc
+        except TranscriptionCancelledError as exc:
+            # Nginx-style "client closed request"; nobody is left to read it.
+            raise HTTPException(status_code=499, detail=str(exc)) from exc
 
-        response = service.submit_plan(meeting_context)
+        try:
+            response = await service.submit_plan_and_wait(meeting_context, profile=profile)
+        except JobQueueFullError as exc:
+            raise _queue_full(exc) from exc
         logger.info(
             "Generated plan: meetingId=%s status=%s agentJobId=%s",
             response.meetingId,
@@ -126,6 +408,26 @@ def create_app() -> FastAPI:
         )
         return response
 
+    @app.get("/api/v1/profiles/{agent_job_id}", tags=["health"])
+    def get_profile(
+        agent_job_id: str,
+        format: str = Query("json", pattern="^(json|collapsed|trace)$"),
+        service: PlanningService = Depends(get_planning_service),
+    ) -> Any:
+        """
+        The profile of a job submitted with profiling on. ``collapsed`` is the
+        folded-stack text read by flamegraph.pl and speedscope, ``trace`` the
+        spans as Chrome trace events, ``json`` both plus job metadata.
+        """
+        profile = service.get_profile(agent_job_id)
+        if profile is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No profile for this job")
+        if format == "collapsed":
+            return PlainTextResponse(profile.collapsed())
+        if format == "trace":
+            return profile.chrome_trace()
+        return profile.to_dict()
+
     return app
 
 
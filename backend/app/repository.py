@@ -1,16 +1,22 @@
 from __future__ import annotations
 
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
 from threading import Lock
 from typing import Dict, Optional
 
-from .schemas import MeetingContext, PlanStatus, PlanningPlan, PlanningRecord
+from .schemas import MeetingContext, PlanStatus, PlanningPlan, PlanningRecord, TaskGraph
 
 
 class PlanningRepository:
-    """Simple in-memory repository for meeting plans."""
+    """Simple in-memory repository for meeting plans (the default backend)."""
 
     def __init__(self) -> None:
         self._records: Dict[str, PlanningRecord] = {}
+        self._versions: Dict[str, int] = {}
         self._lock = Lock()
 
     def upsert_context(self, context: MeetingContext, agent_job_id: Optional[str] = None) -> PlanningRecord:
@@ -18,22 +24,36 @@ class PlanningRepository:
             existing = self._records.get(context.meetingId)
             if existing:
                 existing.context = context
-                existing.status = PlanStatus.processing
+                existing.status = PlanStatus.queued
                 existing.agentJobId = agent_job_id or existing.agentJobId
                 existing.error = None
                 existing.plan = None
+                existing.graph = None
                 existing.prompt = None
                 record = existing
             else:
                 record = PlanningRecord(
                     meetingId=context.meetingId,
                     context=context,
-                    status=PlanStatus.processing,
+                    status=PlanStatus.queued,
                     plan=None,
                     agentJobId=agent_job_id,
                 )
                 self._records[context.meetingId] = record
-        return record
+            self._bump(context.meetingId)
+            return PlanningRecord(**record.model_dump())
+
+    def mark_processing(self, meeting_id: str, agent_job_id: str) -> bool:
+        """
+        Move a queued job to ``processing``. Returns False when the job was superseded.
+        """
+        with self._lock:
+            record = self._records.get(meeting_id)
+            if not record or record.agentJobId != agent_job_id:
+                return False
+            record.status = PlanStatus.processing
+            self._bump(meeting_id)
+            return True
 
     def set_plan_result(
         self,
@@ -42,22 +62,30 @@ class PlanningRepository:
         *,
         error: Optional[str] = None,
         prompt: Optional[str] = None,
+        agent_job_id: Optional[str] = None,
+        graph: Optional[TaskGraph] = None,
     ) -> Optional[PlanningRecord]:
         with self._lock:
             record = self._records.get(meeting_id)
             if not record:
                 return None
+            if agent_job_id and record.agentJobId != agent_job_id:
+                # A newer submission replaced this job; drop the stale result.
+                return None
             if error:
                 record.status = PlanStatus.failed
                 record.error = error
                 record.plan = None
+                record.graph = None
                 record.prompt = prompt
             else:
                 record.status = PlanStatus.ready
                 record.plan = plan
+                record.graph = graph
                 record.error = None
                 record.prompt = prompt
-        return record
+            self._bump(meeting_id)
+            return PlanningRecord(**record.model_dump())
 
     def get(self, meeting_id: str) -> Optional[PlanningRecord]:
         with self._lock:
@@ -66,3 +94,203 @@ class PlanningRepository:
                 return None
             return PlanningRecord(**record.model_dump())
 
+    def version(self, meeting_id: str) -> Optional[int]:
+        """
+        Cheap change counter for a record; it increases on every write.
+        """
+        with self._lock:
+            return self._versions.get(meeting_id)
+
+    def _bump(self, meeting_id: str) -> None:
+        self._versions[meeting_id] = self._versions.get(meeting_id, 0) + 1
+
+
+_DEFAULT_DB_PATH = Path(__file__).resolve().parent.parent / "data" / "planning.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS plans (
+    meeting_id   TEXT PRIMARY KEY,
+    status       TEXT NOT NULL,
+    agent_job_id TEXT,
+    context      TEXT NOT NULL,
+    plan         TEXT,
+    graph        TEXT,
+    error        TEXT,
+    prompt       TEXT,
+    created_at   REAL NOT NULL,
+    updated_at   REAL NOT NULL,
+    version      INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_plans_status ON plans (status);
+CREATE INDEX IF NOT EXISTS idx_plans_updated_at ON plans (updated_at);
+CREATE INDEX IF NOT EXISTS idx_plans_status_updated_at ON plans (status, updated_at);
+"""
+
+
+class SQLitePlanningRepository(PlanningRepository):
+    """
+    Durable repository backed by SQLite in WAL mode.
+
+    Records are read on demand, so start-up cost doesn't grow with the number
+    of stored plans. ``meeting_id`` is the primary key (and therefore indexed);
+    ``status`` and ``updated_at`` carry secondary indexes. Each thread gets its
+    own connection so readers don't queue behind the job workers.
+
+    Jobs don't survive a restart, so plans still queued or processing when the
+    repository opens are marked failed rather than left pending forever.
+    """
+
+    def __init__(self, path: Path | str | None = None) -> None:
+        self._path = Path(path) if path else _DEFAULT_DB_PATH
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.executescript(_SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(plans)")}
+            if "version" not in columns:
+                conn.execute("ALTER TABLE plans ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+            if "graph" not in columns:
+                conn.execute("ALTER TABLE plans ADD COLUMN graph TEXT")
+            conn.execute(
+                "UPDATE plans SET status = ?, error = ?, updated_at = ?, version = version + 1 "
+                "WHERE status IN (?, ?)",
+                (
+                    PlanStatus.failed.value,
+                    "interrupted by restart",
+                    time.time(),
+                    PlanStatus.queued.value,
+                    PlanStatus.processing.value,
+                ),
+            )
+
+    def upsert_context(self, context: MeetingContext, agent_job_id: Optional[str] = None) -> PlanningRecord:
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute(
+                """
+                INSERT INTO plans (meeting_id, status, agent_job_id, context, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (meeting_id) DO UPDATE SET
+                    status = excluded.status,
+                    agent_job_id = COALESCE(excluded.agent_job_id, plans.agent_job_id),
+                    context = excluded.context,
+                    plan = NULL,
+                    graph = NULL,
+                    error = NULL,
+                    prompt = NULL,
+                    updated_at = excluded.updated_at,
+                    version = plans.version + 1
+                """,
+                (
+                    context.meetingId,
+                    PlanStatus.queued.value,
+                    agent_job_id,
+                    context.model_dump_json(),
+                    now,
+                    now,
+                ),
+            )
+            row = self._select(conn, context.meetingId)
+        return self._to_record(row)
+
+    def mark_processing(self, meeting_id: str, agent_job_id: str) -> bool:
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "UPDATE plans SET status = ?, updated_at = ?, version = version + 1 "
+                "WHERE meeting_id = ? AND agent_job_id = ?",
+                (PlanStatus.processing.value, time.time(), meeting_id, agent_job_id),
+            )
+        return cursor.rowcount > 0
+
+    def set_plan_result(
+        self,
+        meeting_id: str,
+        plan: Optional[PlanningPlan],
+        *,
+        error: Optional[str] = None,
+        prompt: Optional[str] = None,
+        agent_job_id: Optional[str] = None,
+        graph: Optional[TaskGraph] = None,
+    ) -> Optional[PlanningRecord]:
+        if error:
+            status, plan_json, graph_json = PlanStatus.failed, None, None
+        else:
+            status = PlanStatus.ready
+            plan_json = plan.model_dump_json() if plan else None
+            graph_json = graph.model_dump_json() if graph else None
+        with self._connection() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE plans SET status = ?, plan = ?, graph = ?, error = ?, prompt = ?, updated_at = ?,
+                    version = version + 1
+                WHERE meeting_id = ? AND (? IS NULL OR agent_job_id = ?)
+                """,
+                (
+                    status.value,
+                    plan_json,
+                    graph_json,
+                    error or None,
+                    prompt,
+                    time.time(),
+                    meeting_id,
+                    agent_job_id,
+                    agent_job_id,
+                ),
+            )
+            if cursor.rowcount == 0:
+                return None
+            row = self._select(conn, meeting_id)
+        return self._to_record(row)
+
+    def get(self, meeting_id: str) -> Optional[PlanningRecord]:
+        row = self._select(self._connection(), meeting_id)
+        return self._to_record(row) if row else None
+
+    def version(self, meeting_id: str) -> Optional[int]:
+        row = self._connection().execute(
+            "SELECT version FROM plans WHERE meeting_id = ?",
+            (meeting_id,),
+        ).fetchone()
+        return row["version"] if row else None
+
+    # --- Internals ------------------------------------------------------- #
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._path, timeout=30.0)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _select(self, conn: sqlite3.Connection, meeting_id: str) -> Optional[sqlite3.Row]:
+        return conn.execute(
+            "SELECT * FROM plans WHERE meeting_id = ?",
+            (meeting_id,),
+        ).fetchone()
+
+    def _to_record(self, row: sqlite3.Row) -> PlanningRecord:
+        return PlanningRecord(
+            meetingId=row["meeting_id"],
+            context=MeetingContext.model_validate_json(row["context"]),
+            status=PlanStatus(row["status"]),
+            plan=PlanningPlan.model_validate_json(row["plan"]) if row["plan"] else None,
+            graph=TaskGraph.model_validate_json(row["graph"]) if row["graph"] else None,
+            agentJobId=row["agent_job_id"],
+            error=row["error"],
+            prompt=row["prompt"],
+        )
+
+
+def create_repository() -> PlanningRepository:
+    """
+    Build the repository selected by ``PLANNING_REPOSITORY`` (``memory`` or ``sqlite``).
+    """
+    backend = os.getenv("PLANNING_REPOSITORY", "memory").strip().lower()
+    if backend == "sqlite":
+        return SQLitePlanningRepository(os.getenv("PLANNING_DB_PATH") or None)
+    if backend != "memory":
+        raise ValueError(f"Unknown PLANNING_REPOSITORY '{backend}'; expected 'memory' or 'sqlite'.")
+    return PlanningRepository()
@@ -2,7 +2,7 @@ from datetime import date
 from enum import Enum
 from typing import List, Optional
 
-from pydantic import BaseModel, Field, HttpUrl
+from pydantic import AliasChoices, BaseModel, Field, HttpUrl
 
 
 class Participant(BaseModel):
@@ -32,7 +32,31 @@ class MeetingContext(BaseModel):
     issues: List[IssueReference] = Field(default_factory=list)
 
 
+class TranscriptSegment(BaseModel):
+    start: float = Field(..., description="Start time in seconds in the original recording")
+    end: float = Field(..., description="End time in seconds in the original recording")
+    text: str
+
+
+class TranscriptionResult(BaseModel):
+    text: str = ""
+    segments: List[TranscriptSegment] = Field(default_factory=list)
+    duration: float = Field(0.0, description="Length of the recording in seconds")
+    speechDuration: float = Field(
+        0.0,
+        description="Seconds left after silence trimming",
+        # Transcripts cached before the rename stored it as speech_duration.
+        validation_alias=AliasChoices("speechDuration", "speech_duration"),
+    )
+    failed: bool = Field(False, description="True when text is an error message rather than a transcript")
+
+
+class PlanningBatchRequest(BaseModel):
+    meetings: List[MeetingContext] = Field(..., min_length=1, description="Meeting contexts to plan")
+
+
 class PlanStatus(str, Enum):
+    queued = "queued"
     processing = "processing"
     ready = "ready"
     failed = "failed"
@@ -65,11 +89,55 @@ class PlanningPlan(BaseModel):
     milestones: List[Milestone] = Field(default_factory=list)
 
 
+class PlanUpdate(BaseModel):
+    summary: Optional[str] = Field(None, description="Replacement summary; null keeps the current one")
+    risks: Optional[List[str]] = Field(None, description="Replacement risk list; null keeps the current one")
+    milestones: List[Milestone] = Field(
+        default_factory=list,
+        description="New milestones, or replacements for the milestones with the same title",
+    )
+    removedMilestones: List[str] = Field(default_factory=list, description="Titles of milestones to drop")
+
+
+class TaskNode(BaseModel):
+    id: str = Field(..., description="Stable task id, '<milestone>.<task>' (1-based)")
+    title: str
+    milestone: str
+    owner: Optional[str] = None
+    etaDays: Optional[int] = None
+    dependsOn: List[str] = Field(default_factory=list, description="Ids of resolved prerequisite tasks")
+    dependents: List[str] = Field(default_factory=list, description="Ids of tasks that depend on this one")
+    earliestStart: float = Field(0.0, description="Days from plan start at which the task can begin")
+    earliestFinish: float = 0.0
+    latestStart: float = 0.0
+    latestFinish: float = 0.0
+    slack: float = Field(0.0, description="Days the task can slip without delaying the plan")
+    critical: bool = False
+
+
+class UnresolvedDependency(BaseModel):
+    taskId: str
+    reference: str = Field(..., description="dependsOn entry that matched no task title")
+
+
+class TaskGraph(BaseModel):
+    nodes: List[TaskNode] = Field(default_factory=list)
+    order: List[str] = Field(default_factory=list, description="Task ids in topological order")
+    criticalPath: List[str] = Field(default_factory=list, description="Task ids on the longest chain")
+    durationDays: float = Field(0.0, description="Length of the critical path in days")
+    cycles: List[List[str]] = Field(
+        default_factory=list,
+        description="Dependency cycles found; the closing edge of each was dropped",
+    )
+    unresolved: List[UnresolvedDependency] = Field(default_factory=list)
+
+
 class PlanningRecord(BaseModel):
     meetingId: str
     context: MeetingContext
-    status: PlanStatus = PlanStatus.processing
+    status: PlanStatus = PlanStatus.queued
     plan: Optional[PlanningPlan] = None
+    graph: Optional[TaskGraph] = None
     agentJobId: Optional[str] = None
     error: Optional[str] = None
     prompt: Optional[str] = None
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import os
+import time
+from bisect import bisect_right
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any, List, Optional, Tuple
+
+from .whisper_models import whisper_available
+
+SAMPLE_RATE = 16000
+COMPUTE_TYPES = {
+    "default",
+    "auto",
+    "int8",
+    "int8_float32",
+    "int8_float16",
+    "int8_bfloat16",
+    "int16",
+    "float16",
+    "bfloat16",
+    "float32",
+}
+_FALSE_VALUES = {"0", "false", "no", "off"}
+
+
+@dataclass(frozen=True)
+class TranscriptionOptions:
+    """
+    Decoding knobs for one transcription job.
+
+    Defaults come from ``TRANSCRIPTION_BEAM_SIZE``, ``TRANSCRIPTION_VAD``,
+    ``TRANSCRIPTION_VAD_MIN_SILENCE_MS`` and ``TRANSCRIPTION_COMPUTE_TYPE``;
+    ``for_request`` applies per-request values on top.
+    """
+
+    beam_size: int = 5
+    vad: bool = True
+    vad_min_silence_ms: int = 1000
+    compute_type: str = "int8"
+
+    @classmethod
+    def from_env(cls) -> "TranscriptionOptions":
+        beam_size = os.getenv("TRANSCRIPTION_BEAM_SIZE")
+        vad = os.getenv("TRANSCRIPTION_VAD")
+        min_silence = os.getenv("TRANSCRIPTION_VAD_MIN_SILENCE_MS")
+        compute_type = os.getenv("TRANSCRIPTION_COMPUTE_TYPE")
+        return cls().with_overrides(
+            beam_size=int(beam_size) if beam_size else None,
+            vad=vad.strip().lower() not in _FALSE_VALUES if vad else None,
+            vad_min_silence_ms=int(min_silence) if min_silence else None,
+            compute_type=compute_type or None,
+        )
+
+    def with_overrides(
+        self,
+        *,
+        beam_size: Optional[int] = None,
+        vad: Optional[bool] = None,
+        vad_min_silence_ms: Optional[int] = None,
+        compute_type: Optional[str] = None,
+    ) -> "TranscriptionOptions":
+        """
+        Return a copy with the given values replaced; raises ValueError for invalid ones.
+        """
+        options = replace(
+            self,
+            beam_size=self.beam_size if beam_size is None else beam_size,
+            vad=self.vad if vad is None else vad,
+            vad_min_silence_ms=self.vad_min_silence_ms if vad_min_silence_ms is None else vad_min_silence_ms,
+            compute_type=self.compute_type if compute_type is None else compute_type.strip().lower(),
+        )
+        if not 1 <= options.beam_size <= 10:
+            raise ValueError(f"beam_size must be between 1 and 10, got {options.beam_size}.")
+        if options.vad_min_silence_ms < 0:
+            raise ValueError("vad_min_silence_ms must not be negative.")
+        if options.compute_type not in COMPUTE_TYPES:
+            raise ValueError(
+                f"Unknown compute_type '{options.compute_type}'; expected one of {', '.join(sorted(COMPUTE_TYPES))}."
+            )
+        return options
+
+    def for_request(
+        self,
+        *,
+        beam_size: Optional[int] = None,
+        vad: Optional[bool] = None,
+        compute_type: Optional[str] = None,
+    ) -> "TranscriptionOptions":
+        """
+        ``with_overrides`` for client-supplied values. Each compute type is a
+        separately loaded Whisper model, so a request may only pick the
+        default or one listed in ``TRANSCRIPTION_REQUEST_COMPUTE_TYPES``.
+        """
+        options = self.with_overrides(beam_size=beam_size, vad=vad, compute_type=compute_type)
+        allowed = {self.compute_type} | {
+            value.strip().lower()
+            for value in os.getenv("TRANSCRIPTION_REQUEST_COMPUTE_TYPES", "").split(",")
+            if value.strip()
+        }
+        if options.compute_type not in allowed:
+            raise ValueError(
+                f"compute_type '{options.compute_type}' is not enabled; expected one of {', '.join(sorted(allowed))}."
+            )
+        return options
+
+
+@dataclass
+class TimestampMap:
+    """
+    Maps times in VAD-trimmed audio back to the original recording.
+
+    ``chunks`` are the kept ``(start, end)`` sample ranges of the original
+    audio, in order; the trimmed audio is their concatenation.
+    """
+
+    chunks: List[Tuple[int, int]] = field(default_factory=list)
+    sample_rate: int = SAMPLE_RATE
+
+    def __post_init__(self) -> None:
+        self._offsets: List[int] = []
+        total = 0
+        for start, end in self.chunks:
+            self._offsets.append(total)
+            total += end - start
+
+    def to_original(self, seconds: float) -> float:
+        if not self.chunks:
+            return seconds
+        sample = int(round(seconds * self.sample_rate))
+        index = max(0, bisect_right(self._offsets, sample) - 1)
+        start, end = self.chunks[index]
+        original = min(end, start + sample - self._offsets[index])
+        return original / self.sample_rate
+
+
+@dataclass
+class PreparedAudio:
+    audio: Any  # float32 numpy array, 16 kHz mono
+    duration: float
+    speech_duration: float
+    timestamps: TimestampMap
+    decode_seconds: float
+    vad_seconds: float
+
+
+def prepare_audio(path: Path | str, options: TranscriptionOptions) -> PreparedAudio:
+    """
+    Decode ``path`` once to 16 kHz mono float PCM and, when ``options.vad`` is
+    set, drop silences longer than ``options.vad_min_silence_ms``.
+
+    The returned array is what Whisper transcribes; ``timestamps`` converts
+    segment times from it back to positions in the original recording.
+    """
+    if not whisper_available():
+        raise RuntimeError("Audio preprocessing requires faster-whisper (pip install faster-whisper).")
+    # Imported lazily so loading the API doesn't pull in PyAV, numpy and onnxruntime.
+    import numpy as np  # type: ignore
+    from faster_whisper.audio import decode_audio  # type: ignore
+    from faster_whisper.vad import VadOptions, get_speech_timestamps  # type: ignore
+
+    started = time.perf_counter()
+    audio = decode_audio(str(path), sampling_rate=SAMPLE_RATE)
+    decoded = time.perf_counter()
+    duration = len(audio) / SAMPLE_RATE
+    if not options.vad or not len(audio):
+        return PreparedAudio(
+            audio=audio,
+            duration=duration,
+            speech_duration=duration,
+            timestamps=TimestampMap(),
+            decode_seconds=decoded - started,
+            vad_seconds=0.0,
+        )
+
+    speech = get_speech_timestamps(
+        audio,
+        VadOptions(min_silence_duration_ms=options.vad_min_silence_ms),
+    )
+    chunks = [(int(item["start"]), int(item["end"])) for item in speech]
+    if chunks:
+        trimmed = np.concatenate([audio[start:end] for start, end in chunks])
+    else:
+        trimmed = audio[:0]
+    return PreparedAudio(
+        audio=trimmed,
+        duration=duration,
+        speech_duration=len(trimmed) / SAMPLE_RATE,
+        timestamps=TimestampMap(chunks),
+        decode_seconds=decoded - started,
+        vad_seconds=time.perf_counter() - decoded,
+    )
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import re
+from typing import List
+
+_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def split_transcript(text: str, *, window: int, overlap: int) -> List[str]:
+    """
+    Split ``text`` into windows of at most ``window`` characters that overlap
+    by roughly ``overlap`` characters.
+
+    Cuts prefer sentence or line boundaries in the second half of a window so
+    that statements are not split mid-way; text without boundaries is cut hard.
+    """
+    text = text.strip()
+    if not text:
+        return []
+    if len(text) <= window:
+        return [text]
+    overlap = max(0, min(overlap, window // 2))
+
+    chunks: List[str] = []
+    start = 0
+    while start < len(text):
+        end = min(len(text), start + window)
+        if end < len(text):
+            cut = None
+            for match in _BOUNDARY.finditer(text, start + window // 2, end):
+                cut = match.end()
+            if cut:
+                end = cut
+        chunks.append(text[start:end].strip())
+        if end >= len(text):
+            break
+        next_start = end - overlap
+        # Start the overlap on a word boundary.
+        space = text.find(" ", next_start, end)
+        start = max(start + 1, space + 1 if space != -1 else next_start)
+    return [chunk for chunk in chunks if chunk]
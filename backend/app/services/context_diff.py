@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from ..schemas import IssueReference, MeetingContext, Participant, PlanningPlan, PlanUpdate, ProjectInfo
+
+COMPONENTS = ("project", "participants", "issues", "transcript")
+
+
+def context_hashes(context: MeetingContext) -> Dict[str, str]:
+    """
+    A sha256 per ``MeetingContext`` component. Participants and issues are
+    hashed in sorted order, so reordering them is not a change.
+    """
+    values: Dict[str, Any] = {
+        "project": context.project.model_dump(mode="json"),
+        "participants": sorted(
+            (participant.model_dump(mode="json") for participant in context.participants),
+            key=lambda item: (item["name"], item["role"]),
+        ),
+        "issues": sorted(
+            (issue.model_dump(mode="json") for issue in context.issues),
+            key=lambda item: json.dumps(item, sort_keys=True),
+        ),
+        "transcript": context.transcript,
+    }
+    return {
+        component: hashlib.sha256(
+            json.dumps(values[component], sort_keys=True, ensure_ascii=False).encode("utf-8")
+        ).hexdigest()
+        for component in COMPONENTS
+    }
+
+
+def context_hash(context: MeetingContext) -> str:
+    """
+    One hash for the whole context, meeting id included.
+    """
+    hashes = context_hashes(context)
+    combined = context.meetingId + "".join(hashes[component] for component in COMPONENTS)
+    return hashlib.sha256(combined.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class ContextDiff:
+    """
+    What changed between two contexts for the same meeting. ``transcriptTail``
+    is set when the new transcript extends the old one. ``transcriptRewritten``
+    means earlier text changed, so the plan can't be updated incrementally.
+    """
+
+    changed: List[str] = field(default_factory=list)
+    project: Optional[ProjectInfo] = None
+    addedParticipants: List[Participant] = field(default_factory=list)
+    removedParticipants: List[Participant] = field(default_factory=list)
+    changedRoles: List[tuple[Participant, Participant]] = field(default_factory=list)
+    addedIssues: List[IssueReference] = field(default_factory=list)
+    removedIssues: List[IssueReference] = field(default_factory=list)
+    transcriptTail: Optional[str] = None
+    transcriptRewritten: bool = False
+
+    def __bool__(self) -> bool:
+        return bool(self.changed)
+
+    @property
+    def incremental(self) -> bool:
+        return bool(self.changed) and not self.transcriptRewritten
+
+    def describe(self) -> str:
+        """
+        The changes as prompt text, one line per change (the transcript tail last).
+        """
+        lines: List[str] = []
+        if self.project is not None:
+            lines.append(
+                f"- Project is now: {self.project.name} (goal: {self.project.goal or 'Unknown'}, "
+                f"repository: {self.project.repositoryUrl or 'Unknown'})"
+            )
+        lines += [f"- New participant: {p.name} ({p.role})" for p in self.addedParticipants]
+        lines += [f"- Participant left: {p.name} ({p.role}); reassign their tasks" for p in self.removedParticipants]
+        lines += [f"- {new.name}'s role changed from {old.role} to {new.role}" for old, new in self.changedRoles]
+        lines += [f"- New issue: {_issue(issue)}" for issue in self.addedIssues]
+        lines += [f"- Issue no longer relevant: {_issue(issue)}" for issue in self.removedIssues]
+        return "\n".join(lines) or "- No metadata changes."
+
+
+def diff_contexts(previous: MeetingContext, current: MeetingContext) -> ContextDiff:
+    """
+    Compare two contexts component by component; the diff is falsy when they
+    hash the same.
+    """
+    old_hashes, new_hashes = context_hashes(previous), context_hashes(current)
+    diff = ContextDiff(changed=[name for name in COMPONENTS if old_hashes[name] != new_hashes[name]])
+    if "project" in diff.changed:
+        diff.project = current.project
+    if "participants" in diff.changed:
+        old_people = {p.name.strip().lower(): p for p in previous.participants}
+        new_people = {p.name.strip().lower(): p for p in current.participants}
+        diff.addedParticipants = [p for key, p in new_people.items() if key not in old_people]
+        diff.removedParticipants = [p for key, p in old_people.items() if key not in new_people]
+        diff.changedRoles = [
+            (old_people[key], p) for key, p in new_people.items() if key in old_people and old_people[key].role != p.role
+        ]
+    if "issues" in diff.changed:
+        old_issues = {_issue_key(issue): issue for issue in previous.issues}
+        new_issues = {_issue_key(issue): issue for issue in current.issues}
+        diff.addedIssues = [issue for key, issue in new_issues.items() if key not in old_issues]
+        diff.removedIssues = [issue for key, issue in old_issues.items() if key not in new_issues]
+    if "transcript" in diff.changed:
+        old_text, new_text = previous.transcript.rstrip(), current.transcript
+        if old_text and new_text.startswith(old_text):
+            diff.transcriptTail = new_text[len(old_text):].strip() or None
+        else:
+            diff.transcriptRewritten = True
+    return diff
+
+
+def apply_plan_update(plan: PlanningPlan, update: PlanUpdate) -> PlanningPlan:
+    """
+    Merge an incremental update into ``plan``. Milestones are matched by title
+    (ignoring case): returned milestones replace their namesakes in place,
+    new ones are appended, and ``removedMilestones`` are dropped.
+    """
+    removed = {title.strip().lower() for title in update.removedMilestones}
+    replacements = {milestone.title.strip().lower(): milestone for milestone in update.milestones}
+    milestones = []
+    for milestone in plan.milestones:
+        key = milestone.title.strip().lower()
+        if key in removed:
+            continue
+        milestones.append(replacements.pop(key, milestone))
+    milestones.extend(replacements.values())
+    return PlanningPlan(
+        summary=update.summary or plan.summary,
+        risks=update.risks if update.risks else plan.risks,
+        milestones=milestones,
+    )
+
+
+# --- Internals ------------------------------------------------------- #
+
+
+def _issue_key(issue: IssueReference) -> str:
+    return str(issue.url or issue.id or issue.title.strip().lower())
+
+
+def _issue(issue: IssueReference) -> str:
+    return f"{issue.title} ({issue.url or issue.id or 'no link'})"
@@ -2,12 +2,21 @@ from __future__ import annotations
 
 import os
 import re
-from dataclasses import dataclass
-from typing import Any, Iterable, List, Optional
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Any, Iterable, List, Optional, Tuple
 from urllib.parse import urlparse
 
 import httpx
 
+from .http_transport import get_http_client
+from .metrics import cache_result
+from .profiling import propagate
+from .rate_limit import RequestBudget, shared_budget
+
 
 STOPWORDS = {
     "a",
@@ -37,13 +46,53 @@ class CodeReference:
     fragment: Optional[str]
 
 
+@dataclass
+class _CachedSearch:
+    matches: List[CodeReference]
+    etag: Optional[str]
+    fetched_at: float = field(default_factory=time.time)
+
+
 class GitHubCodeSearcher:
     """
     Lightweight helper that queries the GitHub code search API for relevant files.
+
+    Queries for one request run concurrently. Results are cached per
+    repository and query, revalidated with ETag conditional requests, and the
+    ``X-RateLimit-*`` headers are tracked so that once the quota is exhausted
+    the searcher serves stale results (or says it is rate limited) instead of
+    issuing requests that are bound to fail. Requests wait for the
+    process-wide ``GITHUB`` request budget. The cache keeps the most recently
+    used ``GITHUB_CACHE_MAX_ENTRIES`` searches.
     """
 
-    def __init__(self, token: Optional[str] = None) -> None:
+    _DEFAULT_API_URL = "https://api.github.com"
+
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        *,
+        api_url: Optional[str] = None,
+        timeout: Optional[float] = None,
+        cache_ttl: Optional[float] = None,
+        max_concurrency: int = 4,
+        budget: Optional[RequestBudget] = None,
+        max_cache_entries: Optional[int] = None,
+    ) -> None:
         self._token = token or os.getenv("GITHUB_TOKEN")
+        base_url = (api_url or os.getenv("GITHUB_API_URL") or self._DEFAULT_API_URL).rstrip("/")
+        self._search_url = f"{base_url}/search/code"
+        timeout_override = os.getenv("GITHUB_TIMEOUT")
+        self._timeout = float(timeout_override) if timeout_override else (timeout or 10.0)
+        ttl_override = os.getenv("GITHUB_CACHE_TTL")
+        self._cache_ttl = float(ttl_override) if ttl_override else (cache_ttl if cache_ttl is not None else 300.0)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="nova-github")
+        max_entries_override = os.getenv("GITHUB_CACHE_MAX_ENTRIES")
+        self._max_cache_entries = int(max_entries_override) if max_entries_override else (max_cache_entries or 1024)
+        self._cache: "OrderedDict[Tuple[str, str, int], _CachedSearch]" = OrderedDict()
+        self._lock = Lock()
+        self._rate_limited_until = 0.0
+        self._budget = budget or shared_budget("GITHUB")
 
     def gather_context(
         self,
@@ -63,10 +112,15 @@ class GitHubCodeSearcher:
             return f"Repository: {owner}/{repo} (no specific queries derived from action items)."
 
         results: list[str] = [f"Repository: {owner}/{repo}"]
-        for query in queries:
-            matches = self._search(owner, repo, query, per_page=per_query)
+        run_search = propagate(self._search)
+        searches = [
+            self._executor.submit(run_search, owner, repo, query, per_page=per_query)
+            for query in queries
+        ]
+        for query, search in zip(queries, searches):
+            matches, note = search.result()
             if not matches:
-                results.append(f"- `{query}` → (no matches)")
+                results.append(f"- `{query}` → ({note or 'no matches'})")
                 continue
             for match in matches:
                 snippet = match.fragment.replace("\n", " ") if match.fragment else ""
@@ -108,28 +162,67 @@ class GitHubCodeSearcher:
                 break
         return queries
 
-    def _search(self, owner: str, repo: str, query: str, *, per_page: int) -> List[CodeReference]:
+    def _search(
+        self, owner: str, repo: str, query: str, *, per_page: int
+    ) -> Tuple[List[CodeReference], Optional[str]]:
+        """
+        Return matches for ``query`` plus a note explaining an empty or stale result.
+        """
+        cache_key = (f"{owner}/{repo}".lower(), query, per_page)
+        with self._lock:
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                self._cache.move_to_end(cache_key)
+            rate_limited = time.time() < self._rate_limited_until
+        fresh = bool(cached) and time.time() - cached.fetched_at < self._cache_ttl
+        cache_result("github", fresh)
+        if fresh:
+            return cached.matches, None
+        if rate_limited:
+            if cached:
+                return cached.matches, None
+            return [], "GitHub rate limit reached; no cached results"
+
         headers = {
             "Accept": "application/vnd.github.text-match+json",
         }
         if self._token:
             headers["Authorization"] = f"Bearer {self._token}"
+        if cached and cached.etag:
+            headers["If-None-Match"] = cached.etag
         params = {
             "q": f"{query} repo:{owner}/{repo}",
             "per_page": per_page,
         }
         try:
-            with httpx.Client(timeout=15.0) as client:
-                response = client.get(
-                    "https://api.github.com/search/code",
+            with self._budget.slot():
+                response = get_http_client().get(
+                    self._search_url,
                     params=params,
                     headers=headers,
+                    timeout=self._timeout,
                 )
-            if response.status_code >= 400:
-                return []
+        except Exception as exc:
+            if cached:
+                return cached.matches, None
+            return [], f"search failed: {type(exc).__name__}"
+
+        self._track_rate_limit(response)
+        if response.status_code == 304 and cached:
+            with self._lock:
+                cached.fetched_at = time.time()
+            return cached.matches, None
+        if response.status_code >= 400:
+            if cached:
+                return cached.matches, None
+            if response.status_code in (403, 429) and time.time() < self._rate_limited_until:
+                return [], "GitHub rate limit reached; no cached results"
+            return [], f"search failed: HTTP {response.status_code}"
+
+        try:
             data = response.json()
-        except Exception:
-            return []
+        except ValueError:
+            return (cached.matches, None) if cached else ([], "search failed: invalid response")
 
         matches: list[CodeReference] = []
         for item in data.get("items", []):
@@ -140,6 +233,30 @@ class GitHubCodeSearcher:
                 fragment = text_matches[0].get("fragment")
             if path:
                 matches.append(CodeReference(path=path, fragment=fragment))
-        return matches
-
+        with self._lock:
+            self._cache[cache_key] = _CachedSearch(matches=matches, etag=response.headers.get("ETag"))
+            self._cache.move_to_end(cache_key)
+            while len(self._cache) > self._max_cache_entries:
+                self._cache.popitem(last=False)
+        return matches, None
 
+    def _track_rate_limit(self, response: httpx.Response) -> None:
+        """
+        Back off until the quota resets once GitHub reports it exhausted.
+        """
+        retry_after = response.headers.get("Retry-After")
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        reset = response.headers.get("X-RateLimit-Reset")
+        blocked_until = 0.0
+        if retry_after and retry_after.isdigit():
+            blocked_until = time.time() + int(retry_after)
+        elif remaining == "0" and reset and reset.isdigit():
+            blocked_until = float(reset)
+        if blocked_until <= self._rate_limited_until:
+            return
+        with self._lock:
+            self._rate_limited_until = max(self._rate_limited_until, blocked_until)
+        print(
+            f"[github] Rate limit exhausted; serving cached results for "
+            f"{max(0, int(blocked_until - time.time()))}s"
+        )
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import weakref
+from threading import Lock
+from typing import Optional
+
+import httpx
+
+try:
+    import h2  # type: ignore  # noqa: F401
+except ImportError:
+    _HTTP2_AVAILABLE = False
+else:
+    _HTTP2_AVAILABLE = True
+
+
+_sync_client: Optional[httpx.Client] = None
+# AsyncClient connection pools are bound to the loop that created them.
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+_lock = Lock()
+
+
+def _pool_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "50")),
+        max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE", "20")),
+        keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30")),
+    )
+
+
+def _http2_enabled() -> bool:
+    requested = os.getenv("HTTP2_ENABLED", "").strip().lower() in {"1", "true", "yes"}
+    if requested and not _HTTP2_AVAILABLE:
+        print("[http] HTTP2_ENABLED is set but the 'h2' package is missing; using HTTP/1.1")
+    return requested and _HTTP2_AVAILABLE
+
+
+def get_http_client() -> httpx.Client:
+    """
+    Return the process-wide ``httpx.Client`` with keep-alive connection pooling.
+
+    Callers pass their own per-request ``timeout``; the shared client only owns
+    the connection pool so TCP/TLS handshakes are reused across calls and retries.
+    """
+    global _sync_client
+    with _lock:
+        if _sync_client is None or _sync_client.is_closed:
+            _sync_client = httpx.Client(limits=_pool_limits(), http2=_http2_enabled())
+        return _sync_client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """
+    Return the pooled ``httpx.AsyncClient`` for the running event loop.
+    """
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(limits=_pool_limits(), http2=_http2_enabled())
+            _async_clients[loop] = client
+        return client
+
+
+async def aclose_http_clients() -> None:
+    """
+    Close pooled clients; intended for application shutdown.
+    """
+    global _sync_client
+    with _lock:
+        sync_client, _sync_client = _sync_client, None
+        loop = asyncio.get_running_loop()
+        async_client = _async_clients.pop(loop, None)
+    if sync_client is not None:
+        sync_client.close()
+    if async_client is not None:
+        await async_client.aclose()
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from threading import Lock
+from typing import Any, Callable, Iterator
+
+
+class JobQueueFullError(RuntimeError):
+    """Raised when the job queue has no room for another submission."""
+
+
+class PlanningJobQueue:
+    """
+    Bounded worker pool for background plan generation.
+
+    At most ``max_workers`` jobs run at once and at most ``max_pending`` more
+    wait for a free worker. Submissions beyond that are rejected so the API can
+    push back instead of accumulating unbounded work. Limits are read from
+    ``{env_prefix}_WORKERS`` and ``{env_prefix}_QUEUE_SIZE``.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_workers: int | None = None,
+        max_pending: int | None = None,
+        env_prefix: str = "PLANNING",
+        thread_name_prefix: str = "nova-plan",
+    ) -> None:
+        workers_override = os.getenv(f"{env_prefix}_WORKERS")
+        pending_override = os.getenv(f"{env_prefix}_QUEUE_SIZE")
+        self._max_workers = max(1, int(workers_override) if workers_override else (max_workers or 2))
+        self._max_pending = max(0, int(pending_override) if pending_override else (max_pending or 16))
+        self._executor = ThreadPoolExecutor(
+            max_workers=self._max_workers,
+            thread_name_prefix=thread_name_prefix,
+        )
+        self._lock = Lock()
+        self._in_flight = 0
+
+    @property
+    def capacity(self) -> int:
+        return self._max_workers + self._max_pending
+
+    @property
+    def in_flight(self) -> int:
+        with self._lock:
+            return self._in_flight
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        """
+        Schedule ``fn`` on the worker pool, raising ``JobQueueFullError`` when saturated.
+        """
+        with self.reserve() as submit:
+            return submit(fn, *args, **kwargs)
+
+    @contextmanager
+    def reserve(self) -> Iterator[Callable[..., Future]]:
+        """
+        Claim a queue slot up front and yield a ``submit`` callable bound to it.
+
+        Callers use this to record a job as queued only once capacity is
+        guaranteed; the slot is released if the block exits without submitting.
+        """
+        self._acquire()
+        submitted = False
+
+        def submit(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+            nonlocal submitted
+            future = self._executor.submit(fn, *args, **kwargs)
+            submitted = True
+            future.add_done_callback(lambda _: self._release())
+            return future
+
+        try:
+            yield submit
+        finally:
+            if not submitted:
+                self._release()
+
+    def shutdown(self, *, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def _acquire(self) -> None:
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                raise JobQueueFullError(
+                    f"Planning queue is full ({self._in_flight} jobs in flight); retry later."
+                )
+            self._in_flight += 1
+
+    def _release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
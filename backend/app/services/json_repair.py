@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, Optional, Type
+
+from pydantic import BaseModel, ValidationError
+
+from .partial_json import PartialJSONParser
+
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+_MAX_COERCION_PASSES = 5
+
+
+def repair_json_locally(payload: str, model: Type[BaseModel]) -> Optional[BaseModel]:
+    """
+    Try to turn an almost-valid LLM response into ``model`` without another LLM call.
+
+    Handles markdown fences and surrounding prose, ``//`` and ``/* */``
+    comments, trailing commas, smart quotes, truncated output (open strings,
+    arrays and objects are closed) and common type mismatches such as
+    ``"etaDays": "3 days"`` or a bare string where a list is expected.
+    Returns None when the payload can't be salvaged.
+    """
+    for candidate in _candidates(payload):
+        data = _loads(candidate)
+        if data is None:
+            continue
+        validated = _validate_with_coercion(data, model)
+        if validated is not None:
+            return validated
+    return None
+
+
+def _candidates(payload: str) -> list[str]:
+    cleaned = _strip_comments_and_trailing_commas(_extract_object(payload))
+    candidates = [cleaned]
+    smart = cleaned.translate(_SMART_QUOTES)
+    if smart != cleaned:
+        candidates.append(_strip_comments_and_trailing_commas(smart))
+    return candidates
+
+
+def _loads(candidate: str) -> Optional[Any]:
+    try:
+        return json.loads(candidate)
+    except ValueError:
+        pass
+    # Close whatever the model left open (e.g. it hit max_tokens).
+    parser = PartialJSONParser()
+    parser.feed(candidate)
+    completed = parser.completion()
+    if completed is None:
+        return None
+    try:
+        return json.loads(_strip_comments_and_trailing_commas(completed))
+    except ValueError:
+        return None
+
+
+def _extract_object(payload: str) -> str:
+    # Anything after the root object closes (e.g. a closing fence) is ignored
+    # by PartialJSONParser, so only leading prose needs trimming here.
+    start = payload.find("{")
+    return payload[start:] if start != -1 else payload.strip()
+
+
+def _strip_comments_and_trailing_commas(text: str) -> str:
+    """
+    Remove comments and commas directly before ``}``/``]``, outside of strings.
+    """
+    out: list[str] = []
+    i = 0
+    in_string = False
+    length = len(text)
+    while i < length:
+        char = text[i]
+        if in_string:
+            out.append(char)
+            if char == "\\" and i + 1 < length:
+                out.append(text[i + 1])
+                i += 2
+                continue
+            if char == '"':
+                in_string = False
+            i += 1
+            continue
+        if char == '"':
+            in_string = True
+        elif text.startswith("//", i):
+            newline = text.find("\n", i)
+            i = length if newline == -1 else newline
+            continue
+        elif text.startswith("/*", i):
+            close = text.find("*/", i + 2)
+            i = length if close == -1 else close + 2
+            continue
+        elif char == ",":
+            rest = text[i + 1 :].lstrip()
+            if rest.startswith(("}", "]")):
+                i += 1
+                continue
+        out.append(char)
+        i += 1
+    return "".join(out)
+
+
+def _validate_with_coercion(data: Any, model: Type[BaseModel]) -> Optional[BaseModel]:
+    for _ in range(_MAX_COERCION_PASSES):
+        try:
+            return model.model_validate(data)
+        except ValidationError as exc:
+            if not isinstance(data, dict) or not _coerce(data, exc.errors()):
+                return None
+    return None
+
+
+def _coerce(data: dict[str, Any], errors: list[Any]) -> bool:
+    """
+    Patch ``data`` in place for each validation error; False if any error is unfixable.
+    """
+    removals: dict[tuple[int, int], tuple[list[Any], int]] = {}
+    for error in errors:
+        loc = list(error["loc"])
+        parent: Any = data
+        try:
+            for part in loc[:-1]:
+                parent = parent[part]
+        except (KeyError, IndexError, TypeError):
+            return False
+        key = loc[-1]
+        value = parent.get(key) if isinstance(parent, dict) else parent[key]
+        kind = error["type"]
+
+        if kind.startswith("int_"):
+            match = re.search(r"-?\d+", str(value)) if value is not None else None
+            parent[key] = int(match.group()) if match else None
+        elif kind.startswith("date"):
+            parent[key] = None
+        elif kind == "list_type":
+            parent[key] = [value] if isinstance(value, (str, dict)) else []
+        elif kind == "string_type":
+            if isinstance(value, list):
+                parent[key] = ", ".join(str(item) for item in value)
+            elif isinstance(value, (int, float, bool)):
+                parent[key] = str(value)
+            elif value is None and key == "title":
+                parent[key] = "Untitled"
+            elif isinstance(parent, list):
+                removals[(id(parent), key)] = (parent, key)
+            else:
+                parent[key] = None
+        elif kind == "missing" and key == "title":
+            parent[key] = "Untitled"
+        elif kind in {"model_type", "dict_type", "model_attributes_type"} and isinstance(parent, list):
+            removals[(id(parent), key)] = (parent, key)
+        else:
+            return False
+    for container, index in sorted(removals.values(), key=lambda item: item[1], reverse=True):
+        del container[index]
+    return True
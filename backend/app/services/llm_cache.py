@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+from typing import Any, Iterable, Optional
+
+_DEFAULT_CACHE_DIR = Path(__file__).resolve().parent.parent.parent / "data" / "llm_cache"
+
+
+def completion_cache_key(
+    model: str,
+    messages: Iterable[dict[str, str]],
+    temperature: float,
+    max_tokens: int,
+) -> str:
+    """
+    Content-address a chat completion request.
+    """
+    canonical = json.dumps(
+        {
+            "model": model,
+            "messages": list(messages),
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    Interface for completion caches. Implementations must be thread-safe.
+    """
+
+    def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: str) -> None:
+        raise NotImplementedError
+
+    def stats(self) -> dict[str, Any]:
+        raise NotImplementedError
+
+
+class MemoryLRUCache(LLMResponseCache):
+    """
+    Bounded in-memory tier with LRU eviction and a per-entry TTL.
+    """
+
+    def __init__(self, *, max_entries: int = 256, ttl_seconds: float = 86400.0) -> None:
+        self._entries: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+        self._max_entries = max_entries
+        self._ttl = ttl_seconds
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() - entry[0] > self._ttl:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class DiskCache(LLMResponseCache):
+    """
+    On-disk tier: one JSON file per key, evicted by TTL and total size (LRU by mtime).
+    """
+
+    def __init__(
+        self,
+        directory: Path | str | None = None,
+        *,
+        max_bytes: int = 100 * 1024 * 1024,
+        ttl_seconds: float = 7 * 86400.0,
+    ) -> None:
+        self._dir = Path(directory) if directory else _DEFAULT_CACHE_DIR
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._max_bytes = max_bytes
+        self._ttl = ttl_seconds
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # key -> (last access, size); rebuilt from the directory on start-up.
+        self._index: "OrderedDict[str, tuple[float, int]]" = OrderedDict()
+        self._total_bytes = 0
+        entries = []
+        for path in self._dir.glob("*.json"):
+            stat = path.stat()
+            entries.append((stat.st_mtime, path.stem, stat.st_size))
+        for mtime, key, size in sorted(entries):
+            self._index[key] = (mtime, size)
+            self._total_bytes += size
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        with self._lock:
+            try:
+                payload = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                self._forget(key)
+                self.misses += 1
+                return None
+            if time.time() - payload.get("created", 0) > self._ttl:
+                self._remove(key)
+                self.misses += 1
+                return None
+            now = time.time()
+            try:
+                os.utime(path, (now, now))
+            except OSError:
+                pass
+            size = self._index.get(key, (now, path.stat().st_size))[1]
+            self._index[key] = (now, size)
+            self._index.move_to_end(key)
+            self.hits += 1
+            return payload.get("value")
+
+    def set(self, key: str, value: str) -> None:
+        path = self._path(key)
+        data = json.dumps({"created": time.time(), "value": value}, ensure_ascii=False)
+        tmp_path = path.with_suffix(".tmp")
+        with self._lock:
+            try:
+                tmp_path.write_text(data, encoding="utf-8")
+                os.replace(tmp_path, path)
+            except OSError as exc:
+                print(f"[llm-cache] Failed to write {path.name}: {exc}")
+                return
+            self._forget(key)
+            size = path.stat().st_size
+            self._index[key] = (time.time(), size)
+            self._total_bytes += size
+            while self._total_bytes > self._max_bytes and len(self._index) > 1:
+                oldest = next(iter(self._index))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._index),
+                "bytes": self._total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _path(self, key: str) -> Path:
+        return self._dir / f"{key}.json"
+
+    def _forget(self, key: str) -> None:
+        entry = self._index.pop(key, None)
+        if entry:
+            self._total_bytes -= entry[1]
+
+    def _remove(self, key: str) -> None:
+        self._forget(key)
+        try:
+            self._path(key).unlink()
+        except OSError:
+            pass
+
+
+class TieredLLMCache(LLMResponseCache):
+    """
+    Memory tier in front of a disk tier; disk hits are promoted into memory.
+    """
+
+    def __init__(self, memory: MemoryLRUCache, disk: Optional[DiskCache] = None) -> None:
+        self._memory = memory
+        self._disk = disk
+
+    @classmethod
+    def from_env(cls) -> Optional["TieredLLMCache"]:
+        """
+        Build the cache from ``LLM_CACHE_*`` settings, or return None when disabled.
+        """
+        if os.getenv("LLM_CACHE_ENABLED", "true").strip().lower() in {"0", "false", "no"}:
+            return None
+        ttl = float(os.getenv("LLM_CACHE_TTL", "86400"))
+        memory = MemoryLRUCache(
+            max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "256")),
+            ttl_seconds=ttl,
+        )
+        disk = None
+        if os.getenv("LLM_CACHE_DISK", "true").strip().lower() not in {"0", "false", "no"}:
+            disk = DiskCache(
+                os.getenv("LLM_CACHE_DIR") or None,
+                max_bytes=int(os.getenv("LLM_CACHE_MAX_BYTES", str(100 * 1024 * 1024))),
+                ttl_seconds=ttl,
+            )
+        return cls(memory, disk)
+
+    def get(self, key: str) -> Optional[str]:
+        value = self._memory.get(key)
+        if value is not None or self._disk is None:
+            return value
+        value = self._disk.get(key)
+        if value is not None:
+            self._memory.set(key, value)
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        self._memory.set(key, value)
+        if self._disk is not None:
+            self._disk.set(key, value)
+
+    def stats(self) -> dict[str, Any]:
+        memory = self._memory.stats()
+        disk = self._disk.stats() if self._disk else None
+        return {
+            "hits": memory["hits"] + (disk["hits"] if disk else 0),
+            "misses": disk["misses"] if disk else memory["misses"],
+            "memory": memory,
+            "disk": disk,
+        }
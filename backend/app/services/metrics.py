@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+_TOKEN_BUCKETS = (50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+_RATIO_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 5.0)
+
+LabelValues = Tuple[str, ...]
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _format_labels(self, values: LabelValues, extra: Optional[Tuple[str, str]] = None) -> str:
+        pairs = list(zip(self.labelnames, values))
+        if extra:
+            pairs.append(extra)
+        if not pairs:
+            return ""
+        inner = ",".join(f'{name}="{_escape(value)}"' for name, value in pairs)
+        return "{" + inner + "}"
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:  # pragma: no cover - overridden
+        return []
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{self._format_labels(key)} {_number(value)}" for key, value in items]
+
+
+class Gauge(_Metric):
+    """
+    A gauge whose value is either set directly or read from a callback at scrape time.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._functions: Dict[LabelValues, Callable[[], float]] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set_function(self, fn: Callable[[], float], **labels: str) -> None:
+        with self._lock:
+            self._functions[self._key(labels)] = fn
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+            functions = dict(self._functions)
+        for key, fn in functions.items():
+            try:
+                values[key] = float(fn())
+            except Exception:
+                continue
+        return [f"{self.name}{self._format_labels(key)} {_number(value)}" for key, value in sorted(values.items())]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        *,
+        buckets: Sequence[float] = _LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._buckets = tuple(sorted(buckets))
+        # label values -> (per-bucket counts incl. +Inf, sum)
+        self._series: Dict[LabelValues, Tuple[List[int], float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect_left(self._buckets, value)
+        with self._lock:
+            counts, total = self._series.get(key) or ([0] * (len(self._buckets) + 1), 0.0)
+            counts[index] += 1
+            self._series[key] = (counts, total + value)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            series = sorted((key, (list(counts), total)) for key, (counts, total) in self._series.items())
+        lines = []
+        for key, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip(self._buckets + (math.inf,), counts):
+                cumulative += count
+                le = "+Inf" if bound == math.inf else _number(bound)
+                lines.append(f"{self.name}_bucket{self._format_labels(key, ('le', le))} {cumulative}")
+            lines.append(f"{self.name}_sum{self._format_labels(key)} {_number(total)}")
+            lines.append(f"{self.name}_count{self._format_labels(key)} {cumulative}")
+        return lines
+
+
+_M = TypeVar("_M", bound=_Metric)
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _M) -> _M:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """
+        Everything in the Prometheus text exposition format (version 0.0.4).
+        """
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.register(
+    Histogram("nova_stage_duration_seconds", "Wall-clock duration of a pipeline stage.", ("step",))
+)
+STAGE_TOTAL = REGISTRY.register(
+    Counter("nova_stage_total", "Pipeline stage executions by outcome.", ("step", "outcome"))
+)
+TRANSCRIPTION_RTF = REGISTRY.register(
+    Histogram(
+        "nova_transcription_real_time_factor",
+        "Transcription wall time divided by audio duration.",
+        buckets=_RATIO_BUCKETS,
+    )
+)
+RETRIES = REGISTRY.register(
+    Counter("nova_retries_total", "Retried upstream calls.", ("step",))
+)
+CACHE_REQUESTS = REGISTRY.register(
+    Counter("nova_cache_requests_total", "Cache lookups by cache and result (hit or miss).", ("cache", "result"))
+)
+PLAN_PARSE = REGISTRY.register(
+    Counter("nova_plan_parse_total", "How plan responses were parsed (direct, local_repair, llm_repair, failed).", ("path",))
+)
+COALESCED = REGISTRY.register(
+    Counter(
+        "nova_coalesced_total",
+        "Duplicate plan submissions or transcriptions attached to identical in-flight work, and plan "
+        "submissions that superseded or queued behind a job with a different context.",
+        ("kind", "outcome"),
+    )
+)
+REPLANS = REGISTRY.register(
+    Counter(
+        "nova_replans_total",
+        "Resubmitted meeting contexts by how the plan was refreshed (reused, delta, full).",
+        ("mode",),
+    )
+)
+PROMPT_TOKENS = REGISTRY.register(
+    Histogram(
+        "nova_prompt_tokens",
+        "Input tokens per prompt section (instructions, transcript, repository, ...), by LLM step.",
+        ("step", "section"),
+        buckets=_TOKEN_BUCKETS,
+    )
+)
+LLM_REQUESTS = REGISTRY.register(
+    Counter(
+        "nova_llm_requests_total",
+        "Completed LLM requests by request policy, winning attempt (primary, hedge, failover) and model.",
+        ("policy", "winner", "model"),
+    )
+)
+LLM_HEDGES = REGISTRY.register(
+    Counter("nova_llm_hedges_total", "Hedged duplicate LLM requests sent, by model.", ("model",))
+)
+LLM_FAILOVERS = REGISTRY.register(
+    Counter(
+        "nova_llm_failovers_total",
+        "LLM requests moved to the next model, by failed model and reason (status code or connection).",
+        ("model", "reason"),
+    )
+)
+IN_FLIGHT = REGISTRY.register(
+    Gauge("nova_in_flight", "Work currently queued or running.", ("stage",))
+)
+
+
+@contextmanager
+def timed(step: str) -> Iterator[None]:
+    """
+    Record the duration and outcome (``ok``/``error``) of the block under ``step``.
+    """
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - started, step=step)
+        STAGE_TOTAL.inc(step=step, outcome=outcome)
+
+
+def cache_result(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
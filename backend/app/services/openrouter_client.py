@@ -1,22 +1,38 @@
 from __future__ import annotations
 
+import asyncio
+import json
 import os
 import time
-from typing import Iterable, Optional
+from typing import Any, Iterable, Iterator, Optional
 
 import httpx
 
+from .http_transport import get_async_http_client, get_http_client
+from .metrics import LLM_FAILOVERS, LLM_HEDGES, LLM_REQUESTS, RETRIES
+from .rate_limit import RequestBudget, shared_budget
+from .request_policy import RequestPolicy, run_on_background_loop
+
 
 class OpenRouterError(RuntimeError):
     """Raised when the OpenRouter API returns an error response."""
 
+    def __init__(self, message: str, *, status_code: Optional[int] = None, retryable: bool = False) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+        # 5xx, 429 and connection failures: worth trying the next model.
+        self.retryable = retryable
+
 
 class OpenRouterClient:
     """
     Minimal client for the OpenRouter chat completions API.
 
     The client reads configuration from the environment but allows explicit
-    overrides for tests. Each request is executed synchronously using httpx.
+    overrides for tests. Requests share a pooled httpx client so connections are
+    kept alive across calls and retries; ``acomplete`` serves async callers.
+    Every request waits for the process-wide ``OPENROUTER`` request budget, and
+    the ``RequestPolicy`` decides on failover and hedging.
     """
 
     _DEFAULT_BASE_URL = "https://openrouter.ai/api/v1"
@@ -30,6 +46,8 @@ class OpenRouterClient:
         model: Optional[str] = None,
         timeout: float = 120.0,
         max_retries: Optional[int] = None,
+        budget: Optional[RequestBudget] = None,
+        policy: Optional[RequestPolicy] = None,
     ) -> None:
         self._api_key = api_key or os.getenv("OPENROUTER_API_KEY")
         if not self._api_key:
@@ -44,6 +62,12 @@ class OpenRouterClient:
         self._timeout = float(timeout_override) if timeout_override else timeout
         retries_override = os.getenv("OPENROUTER_RETRIES")
         self._max_retries = int(retries_override) if retries_override else (max_retries or 2)
+        self._budget = budget or shared_budget("OPENROUTER")
+        self._policy = policy or RequestPolicy.from_env()
+
+    @property
+    def model(self) -> str:
+        return self._model
 
     def complete(
         self,
@@ -51,42 +75,283 @@ class OpenRouterClient:
         *,
         temperature: float = 0.7,
         max_tokens: int = 1200,
+        model: Optional[str] = None,
     ) -> str:
         """
         Execute a chat completion request and return the assistant message content.
+
+        ``model`` overrides the configured model for this call. The request
+        policy applies: failover along the model chain and, when hedging is
+        on, a hedged duplicate raced on the background loop.
         """
-        url = f"{self._base_url}/chat/completions"
-        headers = {
-            "Authorization": f"Bearer {self._api_key}",
-            "Content-Type": "application/json",
-            "X-Title": "Nova Sprint Planner",
-        }
-        payload = {
-            "model": self._model,
-            "messages": list(messages),
-            "temperature": temperature,
-            "max_tokens": max_tokens,
-        }
+        model = model or self._model
+        if self._policy.hedging:
+            return run_on_background_loop(
+                self.acomplete(messages, temperature=temperature, max_tokens=max_tokens, model=model)
+            )
+        chain = self._policy.chain(model)
+        for index, candidate in enumerate(chain):
+            started = time.perf_counter()
+            try:
+                result = self._complete_once(messages, temperature, max_tokens, candidate)
+            except OpenRouterError as exc:
+                if not exc.retryable or index == len(chain) - 1:
+                    raise
+                self._record_failover(candidate, exc)
+                continue
+            self._policy.observe(candidate, time.perf_counter() - started)
+            self._record_winner("primary" if index == 0 else "failover", candidate)
+            return result
+        raise OpenRouterError("No model to send the request to.")  # pragma: no cover - chain is never empty
+
+    async def acomplete(
+        self,
+        messages: Iterable[dict[str, str]],
+        *,
+        temperature: float = 0.7,
+        max_tokens: int = 1200,
+        model: Optional[str] = None,
+    ) -> str:
+        """
+        Async variant of ``complete`` for callers running on the event loop.
+        """
+        messages = list(messages)
+        chain = self._policy.chain(model or self._model)
+        for index, candidate in enumerate(chain):
+            try:
+                if self._policy.hedging:
+                    result, winner, winning_model = await self._hedged(messages, temperature, max_tokens, candidate)
+                else:
+                    result = await self._observed(messages, temperature, max_tokens, candidate)
+                    winner, winning_model = "primary", candidate
+            except OpenRouterError as exc:
+                if not exc.retryable or index == len(chain) - 1:
+                    raise
+                self._record_failover(candidate, exc)
+                continue
+            self._record_winner(winner if index == 0 else "failover", winning_model)
+            return result
+        raise OpenRouterError("No model to send the request to.")  # pragma: no cover - chain is never empty
+
+    def stream_complete(
+        self,
+        messages: Iterable[dict[str, str]],
+        *,
+        temperature: float = 0.7,
+        max_tokens: int = 1200,
+        model: Optional[str] = None,
+    ) -> Iterator[str]:
+        """
+        Execute a streaming (``stream=true``) completion and yield content deltas
+        as they arrive. Connection failures are retried, and the request fails
+        over along the model chain, until the first delta; streams aren't hedged.
+        """
+        messages = list(messages)
+        chain = self._policy.chain(model or self._model)
+        for index, candidate in enumerate(chain):
+            received = False
+            try:
+                for delta in self._stream_once(messages, temperature, max_tokens, candidate):
+                    received = True
+                    yield delta
+            except OpenRouterError as exc:
+                if received or not exc.retryable or index == len(chain) - 1:
+                    raise
+                self._record_failover(candidate, exc)
+                continue
+            self._record_winner("primary" if index == 0 else "failover", candidate)
+            return
+
+    # --- Internals ------------------------------------------------------- #
+
+    async def _hedged(
+        self,
+        messages: list[dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        model: str,
+    ) -> tuple[str, str, str]:
+        """
+        Send to ``model``; if it hasn't answered within the hedge delay, send a
+        duplicate and return the first non-empty answer as ``(text, winner,
+        model)``. The slower request is cancelled.
+        """
+        primary = asyncio.ensure_future(self._observed(messages, temperature, max_tokens, model))
+        done, _ = await asyncio.wait({primary}, timeout=self._policy.hedge_delay(model))
+        if done:
+            return primary.result(), "primary", model
+        hedge_model = self._policy.hedge_model(model)
+        LLM_HEDGES.inc(model=hedge_model)
+        hedge = asyncio.ensure_future(self._observed(messages, temperature, max_tokens, hedge_model))
+        attempts = {primary: ("primary", model), hedge: ("hedge", hedge_model)}
+        pending: set[asyncio.Future[str]] = set(attempts)
+        fallback: Optional[tuple[str, str, str]] = None
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                    elif task.result():
+                        return (task.result(), *attempts[task])
+                    else:
+                        fallback = fallback or (task.result(), *attempts[task])
+        finally:
+            for task in pending:
+                task.cancel()
+        if fallback is not None:
+            return fallback
+        assert error is not None
+        raise error
+
+    async def _observed(self, messages: list[dict[str, str]], temperature: float, max_tokens: int, model: str) -> str:
+        started = time.perf_counter()
+        result = await self._acomplete_once(messages, temperature, max_tokens, model)
+        self._policy.observe(model, time.perf_counter() - started)
+        return result
+
+    def _record_winner(self, winner: str, model: str) -> None:
+        LLM_REQUESTS.inc(policy=self._policy.name, winner=winner, model=model)
+
+    def _record_failover(self, model: str, exc: OpenRouterError) -> None:
+        reason = str(exc.status_code) if exc.status_code else "connection"
+        LLM_FAILOVERS.inc(model=model, reason=reason)
+        print(f"[openrouter] {model} failed ({reason}); failing over to the next model")
+
+    def _complete_once(
+        self,
+        messages: Iterable[dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        model: str,
+    ) -> str:
+        url, headers, payload = self._build_request(messages, temperature, max_tokens, model)
+        client = get_http_client()
 
         last_exc: Optional[Exception] = None
         for attempt in range(1, self._max_retries + 1):
             try:
-                with httpx.Client(timeout=self._timeout) as client:
-                    response = client.post(url, json=payload, headers=headers)
+                with self._budget.slot():
+                    response = client.post(url, json=payload, headers=headers, timeout=self._timeout)
                 break
             except (httpx.TimeoutException, httpx.RequestError) as exc:
                 last_exc = exc
                 if attempt == self._max_retries:
-                    raise OpenRouterError(f"OpenRouter request failed after {attempt} attempts: {exc}") from exc
+                    raise OpenRouterError(
+                        f"OpenRouter request failed after {attempt} attempts: {exc}",
+                        retryable=True,
+                    ) from exc
+                RETRIES.inc(step="openrouter_request")
                 sleep_for = min(4, attempt)
                 time.sleep(sleep_for)
         else:  # pragma: no cover - defensive guard
             raise OpenRouterError(f"OpenRouter request failed: {last_exc}")
 
+        return self._parse_response(response)
+
+    async def _acomplete_once(
+        self,
+        messages: Iterable[dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        model: str,
+    ) -> str:
+        url, headers, payload = self._build_request(messages, temperature, max_tokens, model)
+        client = get_async_http_client()
+
+        last_exc: Optional[Exception] = None
+        for attempt in range(1, self._max_retries + 1):
+            try:
+                async with self._budget.aslot():
+                    response = await client.post(url, json=payload, headers=headers, timeout=self._timeout)
+                break
+            except (httpx.TimeoutException, httpx.RequestError) as exc:
+                last_exc = exc
+                if attempt == self._max_retries:
+                    raise OpenRouterError(
+                        f"OpenRouter request failed after {attempt} attempts: {exc}",
+                        retryable=True,
+                    ) from exc
+                RETRIES.inc(step="openrouter_request")
+                await asyncio.sleep(min(4, attempt))
+        else:  # pragma: no cover - defensive guard
+            raise OpenRouterError(f"OpenRouter request failed: {last_exc}")
+
+        return self._parse_response(response)
+
+    def _stream_once(
+        self,
+        messages: Iterable[dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        model: str,
+    ) -> Iterator[str]:
+        url, headers, payload = self._build_request(messages, temperature, max_tokens, model)
+        payload["stream"] = True
+        client = get_http_client()
+
+        for attempt in range(1, self._max_retries + 1):
+            received = False
+            try:
+                with self._budget.slot(), client.stream(
+                    "POST", url, json=payload, headers=headers, timeout=self._timeout
+                ) as response:
+                    if response.status_code >= 400:
+                        response.read()
+                        raise _status_error(response)
+                    for line in response.iter_lines():
+                        # SSE: "data: {...}" events; ":"-prefixed lines are keep-alive comments.
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[len("data:"):].strip()
+                        if data == "[DONE]":
+                            return
+                        try:
+                            chunk = json.loads(data)
+                        except ValueError:
+                            continue
+                        if "error" in chunk:
+                            raise OpenRouterError(f"OpenRouter stream error: {chunk['error']}")
+                        choices = chunk.get("choices") or [{}]
+                        delta = (choices[0].get("delta") or {}).get("content")
+                        if delta:
+                            received = True
+                            yield delta
+                return
+            except (httpx.TimeoutException, httpx.RequestError) as exc:
+                if received or attempt == self._max_retries:
+                    raise OpenRouterError(
+                        f"OpenRouter stream failed after {attempt} attempts: {exc}",
+                        retryable=not received,
+                    ) from exc
+                RETRIES.inc(step="openrouter_stream")
+                time.sleep(min(4, attempt))
+
+    def _build_request(
+        self,
+        messages: Iterable[dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        model: Optional[str] = None,
+    ) -> tuple[str, dict[str, str], dict[str, Any]]:
+        url = f"{self._base_url}/chat/completions"
+        headers = {
+            "Authorization": f"Bearer {self._api_key}",
+            "Content-Type": "application/json",
+            "X-Title": "Nova Sprint Planner",
+        }
+        payload = {
+            "model": model or self._model,
+            "messages": list(messages),
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+        return url, headers, payload
+
+    def _parse_response(self, response: httpx.Response) -> str:
         if response.status_code >= 400:
-            raise OpenRouterError(
-                f"OpenRouter error {response.status_code}: {response.text}"
-            )
+            raise _status_error(response)
 
         data = response.json()
         try:
@@ -95,3 +360,9 @@ class OpenRouterClient:
             raise OpenRouterError(f"Unexpected OpenRouter response: {data}") from exc
 
 
+def _status_error(response: httpx.Response) -> OpenRouterError:
+    return OpenRouterError(
+        f"OpenRouter error {response.status_code}: {response.text}",
+        status_code=response.status_code,
+        retryable=response.status_code == 429 or response.status_code >= 500,
+    )
@@ -1,55 +1,405 @@
 from __future__ import annotations
 
 import json
+import os
+import re
+import threading
 import time
 import textwrap
-from typing import Any, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Collection, List, Optional
 
 from pydantic import ValidationError
 
-from ..schemas import MeetingContext, Milestone, PlanningPlan, TaskAssignment
+from ..schemas import MeetingContext, Milestone, PlanningPlan, PlanUpdate, TaskAssignment
+from .chunking import split_transcript
+from .context_diff import ContextDiff, apply_plan_update
 from .github_search import GitHubCodeSearcher
+from .json_repair import repair_json_locally
+from .llm_cache import LLMResponseCache, completion_cache_key
+from .metrics import PLAN_PARSE, REPLANS, RETRIES, cache_result, timed
 from .openrouter_client import OpenRouterClient, OpenRouterError
+from .partial_json import PartialJSONParser
+from .profiling import propagate, span
+from .prompt_budget import PromptSection, compress_transcript, dedupe_lines, fit_sections, record_prompt_tokens
+from .stage_graph import Stage, StageGraph
+
+_DIGEST_KEYS = ("decisions", "actionItems", "risks")
+_SYSTEM_PROMPT = "You are a meticulous sprint-planning assistant."
+
+
+def _parse_stage_models(value: str) -> dict[str, str]:
+    # "summary=openai/gpt-4o-mini,risks=openai/gpt-4o-mini"
+    models = {}
+    for entry in value.split(","):
+        stage, _, model = entry.partition("=")
+        if stage.strip() and model.strip():
+            models[stage.strip()] = model.strip()
+    return models
+
+
+# Sent as the system message so every combined-plan request starts with the
+# same prefix, which providers with prompt caching reuse.
+_COMBINED_PLAN_INSTRUCTIONS = textwrap.dedent(
+    """
+    You are an expert sprint planner. Given the meeting context in the user message, produce a JSON object that follows exactly this schema:
+
+    {
+      "summary": string,   // concise paragraph summarising goals, constraints, decisions
+      "risks": [string, ...], // at least two concrete risks or open questions with mitigation ideas
+      "milestones": [
+        {
+          "title": string,
+          "dueDate": string | null,  // ISO date if specified, otherwise null
+          "tasks": [
+            {
+              "title": string,
+              "owner": string | null,   // participant responsible or null
+              "areas": [string, ...],   // relevant repository files/directories/issues
+              "etaDays": integer | null,
+              "notes": string | null,
+              "dependsOn": [string, ...] // array of task titles this task depends on (use exact title from other tasks)
+            }
+          ]
+        }
+      ]
+    }
+
+    Requirements:
+    - Produce valid JSON only. No markdown, no comments.
+    - "summary" must be non-empty, reflecting project goals, key workstreams, and constraints.
+    - Provide at least three risks; infer risks from the transcript and issues if not explicit.
+    - Generate at least three milestones covering discovery, implementation, QA/deployment/documentation.
+    - Each milestone must contain at least two tasks. Tasks must map to code areas using the repository context.
+    - Prefer the participant most suited to own each task (use their role as a hint).
+    - Identify task dependencies: "dependsOn" should list exact task titles that must be completed first. Use empty array [] if no dependencies.
+    - Use null only when the information cannot be inferred.
+    """
+).strip()
+
+_UPDATE_PLAN_INSTRUCTIONS = textwrap.dedent(
+    """
+    You are an expert sprint planner updating an existing sprint plan after the meeting context changed.
+    Return JSON only, in this form:
+
+    {
+      "summary": string | null,       // new summary if the changes affect it, otherwise null
+      "risks": [string, ...] | null,  // the full new risk list if it changes, otherwise null
+      "milestones": [ ... ],          // only new or changed milestones, each complete with all its tasks,
+                                      // in the plan's milestone format; a milestone replaces the one with the same title
+      "removedMilestones": [string, ...] // titles of milestones to drop
+    }
+
+    Requirements:
+    - Change only what the listed changes and new transcript content require; leave everything else out.
+    - Reassign tasks owned by participants who left; use new participants and roles where they fit better.
+    - Keep task titles stable so "dependsOn" references stay valid.
+    - Produce valid JSON only. No markdown, no comments.
+    """
+).strip()
 
 
 class OpenRouterPlanningPipeline:
     """
-    Generates a sprint plan by orchestrating six sequential OpenRouter prompts.
+    Generates a sprint plan from a meeting context in one of two modes.
+
+    By default (``PLANNING_MODE=combined``) one combined prompt carries the
+    participants, issues, GitHub signals and transcript, fitted to
+    ``PLANNING_PROMPT_TOKENS``. Transcripts longer than
+    ``PLANNING_CHUNK_CHARS`` are planned map-reduce style: overlapping windows
+    are digested concurrently into decisions, action items and risks, and the
+    combined prompt plans from that digest.
+
+    With ``PLANNING_MODE=staged`` the plan is built by a stage graph instead
+    (see ``_planning_stages``): summary, risks, action items and the GitHub
+    lookup run concurrently, each LLM stage's output is cached on its own, and
+    ``PLANNING_STAGE_MODELS`` can give each LLM stage a smaller model.
+
+    ``update_plan`` revises an existing plan from a context diff instead of
+    planning from scratch.
     """
 
-    def __init__(self, client: OpenRouterClient, searcher: GitHubCodeSearcher | None = None) -> None:
+    def __init__(
+        self,
+        client: OpenRouterClient,
+        searcher: GitHubCodeSearcher | None = None,
+        cache: LLMResponseCache | None = None,
+    ) -> None:
         self._client = client
         self._searcher = searcher or GitHubCodeSearcher()
-        self._last_prompt: str | None = None
+        self._cache = cache
+        # Plans are generated concurrently by the job workers, so the last prompt
+        # is tracked per thread rather than on the shared pipeline instance.
+        self._local = threading.local()
+        self._parse_lock = threading.Lock()
+        self._parse_stats = {"direct": 0, "local_repair": 0, "llm_repair": 0, "failed": 0}
+        self._chunk_chars = int(os.getenv("PLANNING_CHUNK_CHARS", "4000"))
+        self._chunk_overlap = int(os.getenv("PLANNING_CHUNK_OVERLAP", "400"))
+        self._streaming = os.getenv("PLANNING_STREAM", "true").strip().lower() not in {"0", "false", "no"}
+        self._mode = os.getenv("PLANNING_MODE", "combined").strip().lower()
+        # Tokens shared by the variable parts of a prompt (transcript, participants,
+        # issues, repository signals); the fixed instructions come on top.
+        self._prompt_tokens = int(os.getenv("PLANNING_PROMPT_TOKENS", "6000"))
+        self._stage_models = _parse_stage_models(os.getenv("PLANNING_STAGE_MODELS", ""))
+        self._map_executor = ThreadPoolExecutor(
+            max_workers=max(1, int(os.getenv("PLANNING_MAP_CONCURRENCY", "4"))),
+            thread_name_prefix="nova-map",
+        )
+        self._stage_executor = ThreadPoolExecutor(
+            max_workers=max(1, int(os.getenv("PLANNING_STAGE_CONCURRENCY", "8"))),
+            thread_name_prefix="nova-stage",
+        )
 
     @property
     def last_prompt(self) -> str | None:
-        return self._last_prompt
+        return getattr(self._local, "last_prompt", None)
 
-    def generate_plan(self, context: MeetingContext) -> PlanningPlan:
+    def parse_stats(self) -> dict[str, int]:
+        """
+        How many plan responses validated directly, needed a local repair,
+        needed an LLM repair call, or could not be repaired at all.
+        """
+        with self._parse_lock:
+            return dict(self._parse_stats)
+
+    def generate_plan(
+        self,
+        context: MeetingContext,
+        on_partial: Optional[Callable[[dict[str, Any]], None]] = None,
+        checkpoint: Optional[Callable[[], None]] = None,
+        rerun_stages: Collection[str] = (),
+    ) -> PlanningPlan:
+        """
+        Generate the plan. With ``on_partial`` (and ``PLANNING_STREAM`` enabled)
+        the final completion is streamed and ``on_partial`` receives the
+        summary, risks and milestones parsed so far each time they change.
+
+        ``checkpoint`` is called before every LLM call, on whichever thread
+        makes it; raising from it abandons the plan. In staged mode,
+        ``rerun_stages`` names stages to recompute, bypassing the stage and
+        response caches, while the other stages are still served from cache.
+        """
+        self._local.last_prompt = None
+        self._local.checkpoint = checkpoint
+        if self._mode == "staged":
+            return self._generate_staged(context, on_partial, rerun_stages)
         combined_prompt = self._build_combined_prompt(context)
-        self._last_prompt = combined_prompt
-        plan_json = self._call_text(
+        self._local.last_prompt = f"{_COMBINED_PLAN_INSTRUCTIONS}\n\n{combined_prompt}"
+        on_delta = self._partial_plan_emitter(on_partial) if on_partial and self._streaming else None
+        return self._call_text(
             combined_prompt,
             temperature=0.3,
             max_tokens=2000,
             step="combined_plan",
+            on_delta=on_delta,
+            system=_COMBINED_PLAN_INSTRUCTIONS,
+            sections=self._local.prompt_sections,
+            parse=self._parse_plan,
         )
-        plan = self._parse_plan(plan_json)
-        return plan
 
-    # --- Prompt steps ----------------------------------------------------- #
+    def update_plan(
+        self,
+        plan: PlanningPlan,
+        diff: ContextDiff,
+        context: MeetingContext,
+        on_partial: Optional[Callable[[dict[str, Any]], None]] = None,
+        checkpoint: Optional[Callable[[], None]] = None,
+    ) -> PlanningPlan:
+        """
+        Update ``plan`` for a changed context: the model gets the current plan
+        and ``diff`` (metadata changes and the new transcript tail) and returns
+        only the milestones it changes. Falls back to ``generate_plan`` when the
+        transcript was rewritten or the update can't be parsed.
+        """
+        if not diff.incremental:
+            REPLANS.inc(mode="full")
+            return self.generate_plan(context, on_partial, checkpoint)
+        self._local.last_prompt = None
+        self._local.checkpoint = checkpoint
+        prompt = self._build_update_prompt(plan, diff, context)
+        self._local.last_prompt = f"{_UPDATE_PLAN_INSTRUCTIONS}\n\n{prompt}"
+        try:
+            update = self._call_text(
+                prompt,
+                temperature=0.2,
+                max_tokens=2000,
+                step="update_plan",
+                system=_UPDATE_PLAN_INSTRUCTIONS,
+                sections=self._local.prompt_sections,
+                parse=self._parse_update,
+            )
+        except ValueError:
+            print("[openrouter:update_plan] update could not be parsed; planning from scratch")
+            REPLANS.inc(mode="full")
+            return self.generate_plan(context, on_partial, checkpoint)
+        REPLANS.inc(mode="delta")
+        return apply_plan_update(plan, update)
+
+    def _partial_plan_emitter(self, on_partial: Callable[[dict[str, Any]], None]) -> Callable[[str], None]:
+        parser = PartialJSONParser()
+        last_emitted: list[Any] = [None]
+
+        def on_delta(delta: str) -> None:
+            parser.feed(delta)
+            snapshot = parser.snapshot()
+            if not isinstance(snapshot, dict):
+                return
+            partial = {
+                "summary": snapshot.get("summary") if isinstance(snapshot.get("summary"), str) else None,
+                "risks": [risk for risk in snapshot.get("risks") or [] if isinstance(risk, str) and risk],
+                "milestones": [m for m in snapshot.get("milestones") or [] if isinstance(m, dict)],
+            }
+            if partial != last_emitted[0]:
+                last_emitted[0] = partial
+                on_partial(partial)
+
+        return on_delta
+
+    def _generate_staged(
+        self,
+        context: MeetingContext,
+        on_partial: Optional[Callable[[dict[str, Any]], None]] = None,
+        rerun_stages: Collection[str] = (),
+    ) -> PlanningPlan:
+        partial: dict[str, Any] = {"summary": None, "risks": [], "milestones": []}
+
+        def on_stage(name: str, output: Any) -> None:
+            if on_partial and name in partial:
+                partial[name] = output
+                on_partial(dict(partial))
+
+        values = self._planning_stages(rerun_stages).run(
+            {"context": context},
+            self._stage_executor,
+            cache=self._cache,
+            force=rerun_stages,
+            on_stage=on_stage,
+        )
+        self._local.last_prompt = self._milestones_prompt(values)
+        summary, risks, action_items = values["summary"], values["risks"], values["action_items"]
+        plan = PlanningPlan(
+            summary=summary or None,
+            risks=risks,
+            milestones=[Milestone.model_validate(milestone) for milestone in values["milestones"]],
+        )
+        return self._ensure_plan_completeness(
+            plan,
+            summary_text=summary,
+            risks_text="\n".join(risks) or self._fallback_risks(summary),
+            action_items_text=action_items,
+            code_mapping_text=values["repository"],
+        )
 
-    def _build_combined_prompt(self, context: MeetingContext) -> str:
-        transcript_excerpt = context.transcript[:4000]
-        repository_context = self._gather_repository_context(context, transcript_excerpt)
+    def _planning_stages(self, rerun: Collection[str] = ()) -> StageGraph:
+        """
+        The staged plan, as a graph: the transcript (or its map-reduce digest)
+        feeds summary, risks, action items and the repository lookup, which run
+        side by side; milestones are planned from the summary, action items and
+        repository signals. LLM calls made by the stages in ``rerun`` skip the
+        response cache.
+        """
+
+        def llm_stage(name: str, consumes: tuple[str, ...], run: Callable[..., Any]) -> Stage:
+            model = self._stage_models.get(name)
+            run = self._carry_call_state(run, refresh=name in rerun)
+            return Stage(name, consumes, lambda values: run(values, model=model), model=model)
+
+        return StageGraph(
+            [
+                Stage(
+                    "transcript",
+                    ("context",),
+                    self._carry_call_state(self._stage_transcript, refresh="transcript" in rerun),
+                ),
+                llm_stage("summary", ("context", "transcript"), self._stage_summary),
+                llm_stage("risks", ("context", "transcript"), self._stage_risks),
+                llm_stage("action_items", ("context", "transcript"), self._stage_action_items),
+                Stage(
+                    "repository",
+                    ("context", "transcript"),
+                    lambda values: self._gather_repository_context(values["context"], values["transcript"]["queryText"]),
+                    # The searcher caches and revalidates on GITHUB_CACHE_TTL.
+                    cacheable=False,
+                ),
+                llm_stage("milestones", ("context", "summary", "action_items", "repository"), self._stage_milestones),
+            ],
+            inputs=("context",),
+        )
+
+    # --- Stages ----------------------------------------------------------- #
+
+    def _stage_transcript(self, values: dict[str, Any]) -> dict[str, str]:
+        section, query_text = self._transcript_for_prompt(values["context"])
+        section = fit_sections([PromptSection("transcript", section, keep_tail=True)], self._prompt_tokens)["transcript"]
+        return {"section": section, "queryText": query_text}
+
+    def _stage_summary(self, values: dict[str, Any], *, model: Optional[str]) -> str:
+        context: MeetingContext = values["context"]
+        prompt = textwrap.dedent(
+            f"""
+            Summarise this sprint-planning meeting in one concise paragraph covering the goals,
+            key workstreams, decisions and constraints. Return the paragraph only.
+
+            Project: {context.project.name} (goal: {context.project.goal or 'Unknown'})
+            Participants:
+            {self._format_participants(context)}
+
+            {values["transcript"]["section"]}
+            """
+        )
+        return self._call_text(prompt, temperature=0.3, max_tokens=400, step="stage_summary", model=model).strip()
+
+    def _stage_risks(self, values: dict[str, Any], *, model: Optional[str]) -> list[str]:
+        context: MeetingContext = values["context"]
+        prompt = textwrap.dedent(
+            f"""
+            List at least three concrete risks or open questions raised or implied by this meeting,
+            each with a mitigation idea. One per line; no numbering, no markdown.
+
+            Known issues:
+            {self._format_issues(context)}
+
+            {values["transcript"]["section"]}
+            """
+        )
+        raw = self._call_text(prompt, temperature=0.5, max_tokens=500, step="stage_risks", model=model)
+        return self._extract_list_from_text(raw, default_fallback=[])
+
+    def _stage_action_items(self, values: dict[str, Any], *, model: Optional[str]) -> str:
+        context: MeetingContext = values["context"]
+        prompt = textwrap.dedent(
+            f"""
+            List the action items agreed in this meeting, one per line, in the form:
+            - <task> (Owner: <participant name or TBD>)
+            Return the list only.
+
+            Participants:
+            {self._format_participants(context)}
+
+            {values["transcript"]["section"]}
+            """
+        )
+        return self._call_text(prompt, temperature=0.2, max_tokens=600, step="stage_action_items", model=model)
+
+    def _stage_milestones(self, values: dict[str, Any], *, model: Optional[str]) -> list[dict[str, Any]]:
+        plan = self._call_text(
+            self._milestones_prompt(values),
+            temperature=0.3,
+            max_tokens=1800,
+            step="stage_milestones",
+            model=model,
+            parse=self._parse_plan,
+        )
+        return [milestone.model_dump(mode="json") for milestone in plan.milestones]
+
+    def _milestones_prompt(self, values: dict[str, Any]) -> str:
+        context: MeetingContext = values["context"]
         return textwrap.dedent(
             f"""
-            You are an expert sprint planner. Given the following meeting context, produce a JSON object that follows exactly this schema:
+            You are an expert sprint planner. Organise the action items below into milestones and
+            produce a JSON object that follows exactly this schema:
 
             {{
-              "summary": string,   // concise paragraph summarising goals, constraints, decisions
-              "risks": [string, ...], // at least two concrete risks or open questions with mitigation ideas
               "milestones": [
                 {{
                   "title": string,
@@ -61,7 +411,7 @@ class OpenRouterPlanningPipeline:
                       "areas": [string, ...],   // relevant repository files/directories/issues
                       "etaDays": integer | null,
                       "notes": string | null,
-                      "dependsOn": [string, ...] // array of task titles this task depends on (use exact title from other tasks)
+                      "dependsOn": [string, ...] // exact titles of tasks that must be completed first
                     }}
                   ]
                 }}
@@ -70,32 +420,152 @@ class OpenRouterPlanningPipeline:
 
             Requirements:
             - Produce valid JSON only. No markdown, no comments.
-            - "summary" must be non-empty, reflecting project goals, key workstreams, and constraints.
-            - Provide at least three risks; infer risks from the transcript and issues if not explicit.
             - Generate at least three milestones covering discovery, implementation, QA/deployment/documentation.
-            - Each milestone must contain at least two tasks. Tasks must map to code areas using the repository context.
+            - Each milestone must contain at least two tasks. Tasks must map to code areas using the repository signals.
             - Prefer the participant most suited to own each task (use their role as a hint).
-            - Identify task dependencies: "dependsOn" should list exact task titles that must be completed first. Use empty array [] if no dependencies.
-            - Use null only when the information cannot be inferred.
-
-            Project:
-            - Name: {context.project.name}
-            - Goal: {context.project.goal or 'Unknown'}
-            - Repository URL: {context.project.repositoryUrl or 'Unknown'}
+            - "dependsOn" lists exact task titles; use [] if there are no dependencies.
 
+            Project: {context.project.name} (goal: {context.project.goal or 'Unknown'})
             Participants:
             {self._format_participants(context)}
 
+            Summary:
+            {values["summary"]}
+
+            Action items:
+            {values["action_items"]}
+
             Known issues:
             {self._format_issues(context)}
 
             Repository signals:
-            {repository_context}
+            {values["repository"]}
+            """
+        )
 
-            Meeting transcript excerpt:
-            \"\"\"{transcript_excerpt}\"\"\"
+    # --- Prompt steps ----------------------------------------------------- #
+
+    def _build_combined_prompt(self, context: MeetingContext) -> str:
+        """
+        The meeting context for the combined plan, fitted to ``PLANNING_PROMPT_TOKENS``.
+        The schema and requirements go in the system message
+        (``_COMBINED_PLAN_INSTRUCTIONS``), an identical prefix on every call.
+        """
+        transcript_section, action_items = self._transcript_for_prompt(context)
+        sections = fit_sections(
+            [
+                PromptSection("participants", self._format_participants(context)),
+                PromptSection("issues", self._format_issues(context)),
+                PromptSection("repository", self._gather_repository_context(context, action_items), weight=2.0),
+                PromptSection("transcript", transcript_section, weight=4.0, keep_tail=True),
+            ],
+            self._prompt_tokens,
+        )
+        project = (
+            f"Project:\n- Name: {context.project.name}\n- Goal: {context.project.goal or 'Unknown'}\n"
+            f"- Repository URL: {context.project.repositoryUrl or 'Unknown'}"
+        )
+        self._local.prompt_sections = {"project": project, **sections}
+        return "\n\n".join(
+            [
+                project,
+                f"Participants:\n{sections['participants']}",
+                f"Known issues:\n{sections['issues']}",
+                f"Repository signals:\n{sections['repository']}",
+                sections["transcript"],
+            ]
+        )
+
+    def _build_update_prompt(self, plan: PlanningPlan, diff: ContextDiff, context: MeetingContext) -> str:
+        if diff.transcriptTail:
+            tail_context = context.model_copy(update={"transcript": diff.transcriptTail})
+            transcript_section, action_items = self._transcript_for_prompt(tail_context)
+            transcript_section = "New since the plan was made:\n" + transcript_section
+        else:
+            transcript_section, action_items = "The transcript has not changed.", ""
+        repository = (
+            self._gather_repository_context(context, action_items)
+            if action_items or diff.project is not None
+            else "Unchanged."
+        )
+        sections = fit_sections(
+            [
+                PromptSection("plan", plan.model_dump_json(exclude_none=True), weight=3.0),
+                PromptSection("changes", diff.describe()),
+                PromptSection("participants", self._format_participants(context)),
+                PromptSection("repository", repository, weight=2.0),
+                PromptSection("transcript", transcript_section, weight=4.0, keep_tail=True),
+            ],
+            self._prompt_tokens,
+        )
+        self._local.prompt_sections = sections
+        return "\n\n".join(
+            [
+                f"Current plan:\n{sections['plan']}",
+                f"Changes to the meeting context:\n{sections['changes']}",
+                f"Participants now:\n{sections['participants']}",
+                f"Repository signals:\n{sections['repository']}",
+                sections["transcript"],
+            ]
+        )
+
+    def _transcript_for_prompt(self, context: MeetingContext) -> tuple[str, str]:
+        """
+        Return the transcript section of the combined prompt and the text used
+        to derive repository search queries. Filler is stripped from the
+        transcript first, so fewer chunks need digesting.
+        """
+        transcript = compress_transcript(context.transcript)
+        chunks = split_transcript(transcript, window=self._chunk_chars, overlap=self._chunk_overlap)
+        if len(chunks) <= 1:
+            transcript_excerpt = transcript
+            return f'Meeting transcript:\n\"\"\"{transcript_excerpt}\"\"\"', transcript_excerpt
+
+        digest = propagate(self._carry_call_state(self._digest_chunk))
+        digests = list(self._map_executor.map(digest, chunks, range(1, len(chunks) + 1)))
+        merged: dict[str, list[str]] = {key: [] for key in _DIGEST_KEYS}
+        for digest in digests:
+            for key in _DIGEST_KEYS:
+                for item in digest.get(key, []):
+                    if item.lower() not in {existing.lower() for existing in merged[key]}:
+                        merged[key].append(item)
+
+        def _bullets(items: list[str]) -> str:
+            return "\n".join(f"- {item}" for item in items) or "- None identified"
+
+        section = (
+            f"Meeting notes (digested from all {len(chunks)} segments of the transcript):\n"
+            f"Decisions:\n{_bullets(merged['decisions'])}\n"
+            f"Action items:\n{_bullets(merged['actionItems'])}\n"
+            f"Risks and open questions:\n{_bullets(merged['risks'])}"
+        )
+        action_items = "\n".join(merged["actionItems"]) or transcript[: self._chunk_chars]
+        return section, action_items
+
+    def _digest_chunk(self, chunk: str, index: int) -> dict[str, list[str]]:
+        prompt = textwrap.dedent(
+            f"""
+            Extract the planning-relevant content from this segment of a meeting transcript.
+            Return JSON only, in the form:
+            {{"decisions": [string, ...], "actionItems": [string, ...], "risks": [string, ...]}}
+            Action items should name the owner when the transcript does. Use empty arrays when nothing applies.
+
+            Transcript segment:
+            \"\"\"{chunk}\"\"\"
             """
         )
+        raw = self._call_text(prompt, temperature=0.0, max_tokens=700, step=f"digest_chunk_{index}")
+        try:
+            data = json.loads(raw.strip().removeprefix("```json").removeprefix("```").removesuffix("```"))
+        except ValueError:
+            # Keep the content even when the model ignores the JSON instruction.
+            return {"actionItems": self._extract_list_from_text(raw, default_fallback=[])}
+        if not isinstance(data, dict):
+            return {}
+        return {
+            key: [str(item).strip() for item in data.get(key) or [] if str(item).strip()]
+            for key in _DIGEST_KEYS
+        }
 
     # --- Helpers ---------------------------------------------------------- #
 
@@ -106,32 +576,172 @@ class OpenRouterPlanningPipeline:
         temperature: float = 0.7,
         max_tokens: int = 600,
         step: str,
-    ) -> str:
+        on_delta: Optional[Callable[[str], None]] = None,
+        model: Optional[str] = None,
+        system: str = _SYSTEM_PROMPT,
+        sections: Optional[dict[str, str]] = None,
+        parse: Optional[Callable[[str], Any]] = None,
+    ) -> Any:
+        """
+        Run one prompt step, retrying empty responses. ``sections`` names the
+        parts ``prompt`` was assembled from, for the per-section token counts.
+
+        With ``parse`` the parsed response is returned instead of the text, and
+        the response is only cached once ``parse`` accepts it, so a malformed
+        completion is asked for again on the next request.
+        """
         messages = [
-            {"role": "system", "content": "You are a meticulous sprint-planning assistant."},
+            {"role": "system", "content": system},
             {"role": "user", "content": prompt},
         ]
         attempts = 0
         result: str = ""
+        key: Optional[str] = None
         max_attempts = 3
-        while attempts < max_attempts:
-            attempts += 1
-            result = self._client.complete(messages, temperature=temperature, max_tokens=max_tokens).strip()
-            if result:
-                break
-            print(f"[openrouter:{step}] empty response on attempt {attempts}, retrying...")
-            time.sleep(min(2, attempts))
-        if not result:
-            raise OpenRouterError(f"OpenRouter returned an empty response after {attempts} attempts.")
+        # Per-chunk steps (digest_chunk_3) share one metric label.
+        metric_step = re.sub(r"_\d+$", "", step)
+        checkpoint = getattr(self._local, "checkpoint", None)
+        if checkpoint is not None:
+            checkpoint()
+        record_prompt_tokens(metric_step, {"instructions": system, **(sections or {"prompt": prompt})})
+        with timed(metric_step), span(f"call_text:{step}"):
+            while attempts < max_attempts:
+                attempts += 1
+                result, key = self._complete(
+                    messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    on_delta=on_delta,
+                    model=model,
+                )
+                if result:
+                    break
+                print(f"[openrouter:{step}] empty response on attempt {attempts}, retrying...")
+                RETRIES.inc(step=metric_step)
+                time.sleep(min(2, attempts))
+            if not result:
+                raise OpenRouterError(f"OpenRouter returned an empty response after {attempts} attempts.")
         print(f"[openrouter:{step}] {result}")
-        return result
+        if parse is None:
+            self._remember(key, result)
+            return result
+        parsed = parse(result)
+        self._remember(key, result)
+        return parsed
+
+    def _complete(
+        self,
+        messages: list[dict[str, str]],
+        *,
+        temperature: float,
+        max_tokens: int,
+        on_delta: Optional[Callable[[str], None]] = None,
+        model: Optional[str] = None,
+    ) -> tuple[str, Optional[str]]:
+        """
+        Run a completion through the response cache, keyed by the full request.
+        Returns the completion and, on a cache miss, the key to store it under
+        with ``_remember`` once the caller has validated it.
+
+        With ``on_delta`` the completion is streamed and every content delta is
+        forwarded as it arrives; a cache hit is forwarded as a single delta.
+        """
+        key = None
+        if self._cache is not None:
+            key = completion_cache_key(model or self._client.model, messages, temperature, max_tokens)
+            # A refreshed call (a forced stage) is re-asked; its answer replaces the entry.
+            cached = None if getattr(self._local, "refresh", False) else self._cache.get(key)
+            cache_result("llm", cached is not None)
+            if cached is not None:
+                if on_delta:
+                    on_delta(cached)
+                return cached, None
+        if on_delta is None:
+            result = self._client.complete(
+                messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                model=model,
+            ).strip()
+        else:
+            parts = []
+            for delta in self._client.stream_complete(
+                messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                model=model,
+            ):
+                parts.append(delta)
+                on_delta(delta)
+            result = "".join(parts).strip()
+        return result, key
+
+    def _carry_call_state(self, fn: Callable[..., Any], *, refresh: bool = False) -> Callable[..., Any]:
+        """
+        Wrap ``fn`` so that, run on an executor thread, its LLM calls check
+        this thread's ``checkpoint`` and skip the response cache when this
+        thread does (or ``refresh`` is set).
+        """
+        checkpoint = getattr(self._local, "checkpoint", None)
+        refresh = refresh or getattr(self._local, "refresh", False)
+        if checkpoint is None and not refresh:
+            return fn
+
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            self._local.checkpoint, self._local.refresh = checkpoint, refresh
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._local.checkpoint, self._local.refresh = None, False
+
+        return wrapper
+
+    def _remember(self, key: Optional[str], result: str) -> None:
+        if result and key is not None and self._cache is not None:
+            self._cache.set(key, result)
 
     def _parse_plan(self, plan_json: str) -> PlanningPlan:
+        """
+        Validate the plan, repairing it locally first and only asking the LLM
+        to fix it when the local repair can't salvage the payload.
+        """
         try:
-            return PlanningPlan.model_validate_json(plan_json)
+            with timed("parse"):
+                plan = PlanningPlan.model_validate_json(plan_json)
         except ValidationError:
-            repaired = self._repair_json(plan_json)
-            return PlanningPlan.model_validate_json(repaired)
+            pass
+        else:
+            self._count_parse("direct")
+            return plan
+        with timed("local_repair"):
+            plan = repair_json_locally(plan_json, PlanningPlan)
+        if plan is not None:
+            self._count_parse("local_repair")
+            print("[openrouter:parse] plan JSON repaired locally")
+            return plan
+        print("[openrouter:parse] local repair failed, falling back to LLM repair")
+        try:
+            with timed("repair"):
+                repaired = self._repair_json(plan_json)
+            plan = repair_json_locally(repaired, PlanningPlan)
+            if plan is None:
+                plan = PlanningPlan.model_validate_json(repaired)
+        except Exception:
+            self._count_parse("failed")
+            raise
+        self._count_parse("llm_repair")
+        return plan
+
+    def _parse_update(self, raw: str) -> PlanUpdate:
+        update = repair_json_locally(raw, PlanUpdate)
+        if update is None:
+            raise ValueError("plan update could not be parsed")
+        return update
+
+    def _count_parse(self, path: str) -> None:
+        with self._parse_lock:
+            self._parse_stats[path] += 1
+        PLAN_PARSE.inc(path=path)
 
     def _repair_json(self, payload: str) -> str:
         prompt = textwrap.dedent(
@@ -148,9 +758,10 @@ class OpenRouterPlanningPipeline:
             {"role": "system", "content": "You fix JSON documents so that they are valid and schema-compliant."},
             {"role": "user", "content": prompt},
         ]
-        fixed = self._client.complete(messages, temperature=0.0, max_tokens=1800).strip()
-        # Ensure the result parses as JSON before returning it further.
+        fixed, key = self._complete(messages, temperature=0.0, max_tokens=1800)
+        # Ensure the result parses as JSON before returning (and caching) it.
         json.loads(fixed)
+        self._remember(key, fixed)
         return fixed
 
     def _format_participants(self, context: MeetingContext) -> str:
@@ -168,10 +779,13 @@ class OpenRouterPlanningPipeline:
         if not self._searcher:
             return "No repository lookup performed."
         repository_url = str(context.project.repositoryUrl) if context.project.repositoryUrl else None
-        return self._searcher.gather_context(
-            repository_url,
-            action_items,
-        )
+        with timed("github_context"), span("gather_repository_context"):
+            signals = self._searcher.gather_context(
+                repository_url,
+                action_items,
+            )
+        # Different queries often land on the same file and snippet.
+        return dedupe_lines(signals, key=lambda line: line.partition("→")[2] or line)
 
     def _ensure_plan_completeness(
         self,
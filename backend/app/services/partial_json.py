@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import json
+from typing import Any, List, Optional
+
+_LITERAL_END = set(",}]: \t\r\n")
+_MISSING = object()
+
+
+class _Frame:
+    __slots__ = ("kind", "state", "value", "key")
+
+    def __init__(self, kind: str, state: str) -> None:
+        self.kind = kind  # "{" or "["
+        # Objects: key -> colon -> value -> comma; arrays: value -> comma.
+        self.state = state
+        # Completed members only; an open member is the next frame up.
+        self.value: Any = {} if kind == "{" else []
+        self.key: Optional[str] = None  # objects: the key of the member being received
+
+
+class PartialJSONParser:
+    """
+    Incrementally scans a JSON document as it streams in.
+
+    ``feed`` is O(len(chunk)) and builds the parsed values as they complete.
+    ``snapshot`` closes whatever is still open (strings, arrays, objects,
+    dangling keys), so a truncated document such as
+    ``{"summary": "Ship the", "risks": ["a`` yields
+    ``{"summary": "Ship the", "risks": ["a"]}``; a half-received key is
+    dropped. It only copies the containers still open and the string being
+    received, so snapshotting after every delta stays linear in the document
+    length. Text before the first ``{`` (e.g. a markdown fence) is ignored.
+    """
+
+    def __init__(self) -> None:
+        self._buffer: List[str] = []
+        self._started = False
+        self._done = False
+        self._stack: List[_Frame] = []
+        self._in_string = False
+        self._string_is_key = False
+        self._string_start = 0
+        self._string: List[str] = []  # raw characters of the open string
+        self._escape = False
+        self._unicode_left = 0
+        self._literal = ""
+        self._root: Any = None
+
+    @property
+    def done(self) -> bool:
+        return self._done
+
+    @property
+    def text(self) -> str:
+        return "".join(self._buffer)
+
+    def feed(self, chunk: str) -> None:
+        for char in chunk:
+            if self._done:
+                return
+            if not self._started:
+                if char != "{":
+                    continue
+                self._started = True
+            self._buffer.append(char)
+            self._consume(char)
+
+    def snapshot(self) -> Optional[Any]:
+        """
+        The document received so far, or None before its opening ``{``.
+
+        Values completed before this call are shared with earlier snapshots
+        and must not be modified.
+        """
+        if not self._started:
+            return None
+        if self._done:
+            return self._root
+        child = self._pending()
+        for frame in reversed(self._stack):
+            container = dict(frame.value) if frame.kind == "{" else list(frame.value)
+            if child is not _MISSING:
+                if frame.kind == "[":
+                    container.append(child)
+                elif frame.key is not None:
+                    container[frame.key] = child
+            child = container
+        return child
+
+    def completion(self) -> Optional[str]:
+        """
+        Return the text received so far with every open construct closed.
+        """
+        if not self._started:
+            return None
+        text = self.text
+        if self._done:
+            return text
+        stack = [frame.state for frame in self._stack]
+        if self._in_string:
+            if self._string_is_key:
+                # Drop a half-received key entirely rather than inventing one.
+                text = text[: self._string_start]
+            else:
+                if self._escape:
+                    text = text[:-1]
+                elif self._unicode_left:
+                    text = text[: text.rfind("\\u")]
+                text += '"'
+                stack[-1] = "comma"
+        elif self._literal:
+            try:
+                json.loads(self._literal)
+                stack[-1] = "comma"
+            except ValueError:
+                text = text[: len(text) - len(self._literal)]
+        text = text.rstrip()
+        if text.endswith(","):
+            text = text[:-1]
+        if self._stack and self._stack[-1].kind == "{":
+            # Only the innermost frame can be waiting on a colon or a value.
+            if stack[-1] == "colon":
+                text += ":null"
+            elif stack[-1] == "value":
+                text += "null"
+        closers = ["}" if frame.kind == "{" else "]" for frame in reversed(self._stack)]
+        return text + "".join(closers)
+
+    def _pending(self) -> Any:
+        # The innermost member still being received, closed as completion() would.
+        top = self._stack[-1]
+        if self._in_string:
+            if self._string_is_key:
+                return _MISSING
+            raw = "".join(self._string)
+            if self._escape:
+                raw = raw[:-1]
+            elif self._unicode_left:
+                raw = raw[: raw.rfind("\\u")]
+            return _decode_string(raw)
+        if self._literal:
+            value = _decode_literal(self._literal)
+            if value is not _MISSING:
+                return value
+        if top.kind == "{" and top.state in ("colon", "value"):
+            return None
+        return _MISSING
+
+    # --- Scanner --------------------------------------------------------- #
+
+    def _consume(self, char: str) -> None:
+        if self._in_string:
+            self._consume_string(char)
+            return
+        if self._literal:
+            if char not in _LITERAL_END:
+                self._literal += char
+                return
+            literal, self._literal = self._literal, ""
+            self._value_done(_decode_literal(literal))
+        if char in " \t\r\n":
+            return
+        top = self._stack[-1] if self._stack else None
+        if char in "{[":
+            self._stack.append(_Frame(char, "key" if char == "{" else "value"))
+        elif char in "}]":
+            if self._stack:
+                self._value_done(self._stack.pop().value)
+            else:
+                self._value_done()
+        elif char == '"':
+            self._in_string = True
+            self._string = []
+            self._string_start = len(self._buffer) - 1
+            self._string_is_key = bool(top and top.kind == "{" and top.state == "key")
+        elif char == ":":
+            if top:
+                top.state = "value"
+        elif char == ",":
+            if top:
+                top.state = "key" if top.kind == "{" else "value"
+                top.key = None
+        else:
+            self._literal = char
+
+    def _consume_string(self, char: str) -> None:
+        if self._unicode_left:
+            self._unicode_left -= 1
+        elif self._escape:
+            self._escape = False
+            if char == "u":
+                self._unicode_left = 4
+        elif char == "\\":
+            self._escape = True
+        elif char == '"':
+            self._in_string = False
+            value = _decode_string("".join(self._string))
+            if self._string_is_key:
+                self._stack[-1].state = "colon"
+                self._stack[-1].key = value
+            else:
+                self._value_done(value)
+            return
+        self._string.append(char)
+
+    def _value_done(self, value: Any = _MISSING) -> None:
+        if not self._stack:
+            self._done = True
+            self._root = value
+            return
+        top = self._stack[-1]
+        top.state = "comma"
+        if value is _MISSING:
+            return
+        if top.kind == "[":
+            top.value.append(value)
+        elif top.key is not None:
+            top.value[top.key] = value
+
+
+def _decode_string(raw: str) -> str:
+    try:
+        return json.loads(f'"{raw}"', strict=False)
+    except ValueError:
+        return raw
+
+
+def _decode_literal(literal: str) -> Any:
+    try:
+        return json.loads(literal)
+    except ValueError:
+        return _MISSING
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import atexit
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+from ..schemas import PlanningResponse
+from .metrics import timed
+
+_DEFAULT_OUTPUT_DIR = Path(__file__).resolve().parent.parent.parent / "data" / "plans"
+
+
+class PlanPersister:
+    """
+    Write-behind persistence of plan responses to ``data/plans/{meetingId}.json``.
+
+    ``submit`` only records the latest response for a meeting and returns; a
+    background thread serializes it after ``PLAN_PERSIST_DELAY`` seconds, so
+    bursts of updates to the same meeting coalesce into one write. Writes whose
+    content hash matches what is already on disk are skipped (hashes are kept
+    for the ``PLAN_PERSIST_MAX_HASHES`` most recently written meetings; older
+    ones are re-read from disk), and files are replaced atomically (temp file
+    + rename).
+    """
+
+    def __init__(
+        self,
+        output_dir: Path | str | None = None,
+        *,
+        delay: Optional[float] = None,
+        max_hashes: Optional[int] = None,
+    ) -> None:
+        resolved_dir = Path(output_dir or os.getenv("PLANS_OUTPUT_DIR") or _DEFAULT_OUTPUT_DIR)
+        resolved_dir.mkdir(parents=True, exist_ok=True)
+        self._output_dir = resolved_dir
+        delay_override = os.getenv("PLAN_PERSIST_DELAY")
+        self._delay = float(delay_override) if delay_override else (delay if delay is not None else 0.5)
+        self._pending: Dict[str, PlanningResponse] = {}
+        max_hashes_override = os.getenv("PLAN_PERSIST_MAX_HASHES")
+        self._max_hashes = int(max_hashes_override) if max_hashes_override else (max_hashes or 4096)
+        self._written: "OrderedDict[str, str]" = OrderedDict()
+        self._condition = threading.Condition()
+        self._write_lock = threading.Lock()
+        self.writes = 0
+        self.skipped = 0
+        self._thread = threading.Thread(target=self._run, name="nova-persist", daemon=True)
+        self._thread.start()
+        # The writer is a daemon thread; don't lose pending writes on interpreter exit.
+        atexit.register(self.flush)
+
+    @property
+    def output_dir(self) -> Path:
+        return self._output_dir
+
+    def submit(self, response: PlanningResponse) -> None:
+        with self._condition:
+            self._pending[response.meetingId] = response
+            self._condition.notify()
+
+    def flush(self) -> None:
+        """
+        Write everything pending right away (used on shutdown).
+        """
+        with self._condition:
+            pending, self._pending = self._pending, {}
+        self._write_all(pending)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+            # Let further updates for the same meetings accumulate before writing.
+            time.sleep(self._delay)
+            with self._condition:
+                pending, self._pending = self._pending, {}
+            self._write_all(pending)
+
+    def _write_all(self, pending: Dict[str, PlanningResponse]) -> None:
+        with self._write_lock:
+            for meeting_id, response in pending.items():
+                try:
+                    with timed("persistence"):
+                        self._write(meeting_id, response)
+                except Exception as exc:
+                    # Persistence failures shouldn't break the API; surface via stdout for now.
+                    print(f"[warn] Failed to persist plan for {meeting_id}: {exc}")  # pragma: no cover
+
+    def _write(self, meeting_id: str, response: PlanningResponse) -> None:
+        payload = response.model_dump_json(indent=2).encode("utf-8")
+        digest = hashlib.sha256(payload).hexdigest()
+        target_path = self._output_dir / f"{meeting_id}.json"
+        written = self._written.get(meeting_id)
+        if written is None and target_path.exists():
+            written = hashlib.sha256(target_path.read_bytes()).hexdigest()
+        if written == digest:
+            self.skipped += 1
+        else:
+            tmp_path = target_path.with_name(f".{target_path.name}.tmp")
+            with tmp_path.open("wb") as handle:
+                handle.write(payload)
+            os.replace(tmp_path, target_path)
+            self.writes += 1
+        self._written[meeting_id] = digest
+        self._written.move_to_end(meeting_id)
+        while len(self._written) > self._max_hashes:
+            self._written.popitem(last=False)
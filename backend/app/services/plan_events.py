@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, AsyncIterator, Dict, Optional
+
+TERMINAL_EVENTS = {"ready", "failed"}
+
+
+class _Channel:
+    def __init__(self, event: Dict[str, Any]) -> None:
+        self.latest = event
+        self.sequence = 0
+        self.waiters: set[tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+
+
+class PlanEventBroker:
+    """
+    Fan-out of plan progress events from job workers to SSE subscribers.
+
+    Each meeting keeps only its latest event: a slow subscriber skips
+    intermediate partial snapshots instead of queueing them, and a late one
+    immediately receives the current state. ``publish`` is safe to call from
+    worker threads.
+    """
+
+    def __init__(self, *, max_channels: int = 1024) -> None:
+        self._channels: "OrderedDict[str, _Channel]" = OrderedDict()
+        self._max_channels = max_channels
+        self._lock = Lock()
+
+    def publish(self, meeting_id: str, event: str, data: Dict[str, Any]) -> None:
+        with self._lock:
+            channel = self._channels.get(meeting_id)
+            if channel is None:
+                channel = _Channel({"event": event, "data": data})
+                self._channels[meeting_id] = channel
+                self._evict()
+            channel.latest = {"event": event, "data": data}
+            channel.sequence += 1
+            self._channels.move_to_end(meeting_id)
+            waiters = list(channel.waiters)
+        for loop, wakeup in waiters:
+            loop.call_soon_threadsafe(wakeup.set)
+
+    async def subscribe(
+        self,
+        meeting_id: str,
+        initial: Dict[str, Any],
+        *,
+        heartbeat: float = 15.0,
+    ) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Yield the latest event whenever it changes, ``None`` as a heartbeat
+        after ``heartbeat`` idle seconds, and stop after a terminal event.
+
+        ``initial`` seeds the channel when no job has published for this
+        meeting yet (e.g. the plan finished before the broker saw it).
+        """
+        loop = asyncio.get_running_loop()
+        wakeup = asyncio.Event()
+        waiter = (loop, wakeup)
+        with self._lock:
+            channel = self._channels.get(meeting_id)
+            if channel is None:
+                channel = _Channel(initial)
+                channel.sequence = 1
+                self._channels[meeting_id] = channel
+                self._evict()
+            channel.waiters.add(waiter)
+        seen = 0
+        try:
+            while True:
+                with self._lock:
+                    sequence, latest = channel.sequence, channel.latest
+                if sequence != seen:
+                    seen = sequence
+                    yield latest
+                    if latest["event"] in TERMINAL_EVENTS:
+                        return
+                    continue
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+                wakeup.clear()
+        finally:
+            with self._lock:
+                channel.waiters.discard(waiter)
+
+    def _evict(self) -> None:
+        while len(self._channels) > self._max_channels:
+            oldest_id, oldest = next(iter(self._channels.items()))
+            if oldest.waiters:
+                break
+            del self._channels[oldest_id]
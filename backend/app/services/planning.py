@@ -1,19 +1,29 @@
 from __future__ import annotations
 
 
+import asyncio
 import os
 import uuid
-from pathlib import Path
+from concurrent.futures import Future
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Optional
 
 from ..repository import PlanningRepository
-from ..schemas import MeetingContext, PlanStatus, PlanningResponse
+from ..schemas import MeetingContext, PlanStatus, PlanningPlan, PlanningRecord, PlanningResponse, TaskGraph
+from .context_diff import ContextDiff, context_hash, diff_contexts
+from .jobs import JobQueueFullError, PlanningJobQueue
+from .metrics import COALESCED, REPLANS, timed
 from .openrouter_pipeline import OpenRouterPlanningPipeline
+from .persistence import PlanPersister
+from .plan_events import PlanEventBroker
+from .profiling import ProfileStore, RequestProfile, activate, span
+from .response_cache import SerializedPlan, SerializedPlanCache
+from .single_flight import Flight, PlanFlights, chain
+from .task_graph import build_task_graph
 
-_DEFAULT_OUTPUT_DIR = (
-    Path(os.getenv("PLANS_OUTPUT_DIR"))
-    if os.getenv("PLANS_OUTPUT_DIR")
-    else Path(__file__).resolve().parent.parent.parent / "data" / "plans"
-)
+
+class _Superseded(Exception):
+    """Raised inside a running job once a newer submission replaced it."""
 
 
 class PlanningService:
@@ -21,55 +31,363 @@ class PlanningService:
         self,
         repository: PlanningRepository,
         pipeline: OpenRouterPlanningPipeline,
-        *,
-        output_dir: Path | str | None = None,
+        jobs: PlanningJobQueue,
+        persister: PlanPersister,
+        responses: SerializedPlanCache,
+        events: PlanEventBroker,
+        batch_jobs: Optional[PlanningJobQueue] = None,
+        profiles: Optional[ProfileStore] = None,
+        flights: Optional[PlanFlights] = None,
     ) -> None:
         self._repository = repository
         self._pipeline = pipeline
-        resolved_dir = Path(output_dir) if output_dir else _DEFAULT_OUTPUT_DIR
-        resolved_dir.mkdir(parents=True, exist_ok=True)
-        self._output_dir = resolved_dir
+        self._jobs = jobs
+        self._batch_jobs = batch_jobs or jobs
+        self._persister = persister
+        self._responses = responses
+        self._events = events
+        self._profiles = profiles or ProfileStore()
+        self._flights = flights or PlanFlights()
+        self._incremental = os.getenv("PLANNING_INCREMENTAL", "true").strip().lower() not in {"0", "false", "no"}
+        # What a submission with a different context does while the meeting has
+        # a job in flight: "supersede" it, or "queue" behind it.
+        self._conflict = os.getenv("PLANNING_CONFLICT", "supersede").strip().lower()
+        if self._conflict not in {"supersede", "queue"}:
+            raise ValueError(f"Unknown PLANNING_CONFLICT '{self._conflict}'; expected 'supersede' or 'queue'.")
+
+    def submit_plan(self, context: MeetingContext, *, profile: Optional[RequestProfile] = None) -> PlanningResponse:
+        """
+        Queue plan generation and return immediately with the queued job id.
+
+        A ``profile`` is stored under that job id and records the job's work.
+        Resubmitting a context identical to the one behind a ready plan
+        returns that plan without queuing anything.
+        """
+        record, _ = self._enqueue(context, profile=profile)
+        return self._to_response(record)
+
+    async def submit_plan_and_wait(
+        self,
+        context: MeetingContext,
+        *,
+        profile: Optional[RequestProfile] = None,
+    ) -> PlanningResponse:
+        """
+        Queue plan generation and await the finished plan without blocking the event loop.
+        """
+        _, future = self._enqueue(context, profile=profile)
+        # The future is shared with every submission attached to the job; a
+        # cancelled caller (e.g. a disconnected client) must not cancel it.
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    async def plan_batch(self, contexts: list[MeetingContext]) -> AsyncIterator[dict[str, Any]]:
+        """
+        Queue every context on the batch queue and yield one progress record per
+        state change: ``queued`` (or ``rejected`` when the queue is full),
+        ``processing``, then ``ready``/``failed``/``superseded`` with the plan,
+        in completion order. Jobs keep running if the consumer stops early.
+        """
+        loop = asyncio.get_running_loop()
+        updates: asyncio.Queue[tuple[int, str, Any]] = asyncio.Queue()
+        total = len(contexts)
+        pending = completed = 0
+        job_ids: dict[int, str] = {}
+
+        def notify(index: int, event: str, data: Any = None) -> None:
+            loop.call_soon_threadsafe(updates.put_nowait, (index, event, data))
+
+        for index, context in enumerate(contexts):
+            item = {"index": index, "meetingId": context.meetingId}
+            try:
+                record, future = self._enqueue(
+                    context,
+                    jobs=self._batch_jobs,
+                    on_start=lambda index=index: notify(index, "processing"),
+                )
+            except JobQueueFullError as exc:
+                completed += 1
+                yield {**item, "event": "rejected", "error": str(exc), "completed": completed, "total": total}
+                continue
+            pending += 1
+            job_ids[index] = record.agentJobId or ""
+            yield {**item, "event": "queued", "agentJobId": record.agentJobId}
+            future.add_done_callback(lambda done, index=index: notify(index, "done", done))
+
+        while pending:
+            index, event, data = await updates.get()
+            item = {"index": index, "meetingId": contexts[index].meetingId, "agentJobId": job_ids[index]}
+            if event != "done":
+                yield {**item, "event": event}
+                continue
+            pending -= 1
+            completed += 1
+            progress = {"completed": completed, "total": total}
+            try:
+                response = data.result()
+            except Exception as exc:  # pragma: no cover - _run_job records its own failures
+                yield {**item, "event": PlanStatus.failed.value, "error": str(exc), **progress}
+                continue
+            if response.agentJobId != job_ids[index]:
+                # A later item (or request) for the same meeting replaced this job.
+                yield {**item, "event": "superseded", "superseded_by": response.agentJobId, **progress}
+                continue
+            yield {**item, "event": response.status.value, **progress, "response": self.event_payload(response)}
+
+    def queued_behind(self, meeting_id: str, job_id: str) -> Optional[PlanningResponse]:
+        """
+        The state of a submission waiting for the meeting's running job
+        (``PLANNING_CONFLICT=queue``), or None.
+        """
+        waiting = self._flights.waiting(meeting_id)
+        if waiting is None or waiting.job_id != job_id:
+            return None
+        return self._to_response(waiting.record)
+
+    def get_profile(self, agent_job_id: str) -> Optional[RequestProfile]:
+        return self._profiles.get(agent_job_id)
+
+    def get_plan(self, meeting_id: str) -> PlanningResponse:
+        record = self._repository.get(meeting_id)
+        if not record:
+            raise ValueError(f"No plan found for meeting '{meeting_id}'.")
+
+        return self._to_response(record)
+
+    def get_task_graph(self, meeting_id: str) -> TaskGraph:
+        """
+        The plan's indexed task graph. Raises LookupError while no plan is ready.
+        """
+        record = self._repository.get(meeting_id)
+        if not record:
+            raise ValueError(f"No plan found for meeting '{meeting_id}'.")
+        if record.plan is None:
+            raise LookupError(f"Plan for meeting '{meeting_id}' is {record.status.value}; no task graph yet.")
+        # Plans stored before graphs were built get one on demand.
+        return record.graph or build_task_graph(record.plan)
+
+    def get_plan_serialized(self, meeting_id: str) -> SerializedPlan:
+        """
+        Return the JSON body and strong ETag for a plan, reusing the cached
+        bytes while the record is unchanged.
+        """
+        # Read the version first: if the record changes while we serialize,
+        # the entry is stored under the stale version and rebuilt next time.
+        version = self._repository.version(meeting_id)
+        if version is None:
+            raise ValueError(f"No plan found for meeting '{meeting_id}'.")
+        cached = self._responses.get(meeting_id, version)
+        if cached is not None:
+            return cached
+        response = self.get_plan(meeting_id)
+        return self._responses.put(
+            meeting_id,
+            version,
+            response.model_dump_json().encode("utf-8"),
+            response.agentJobId,
+        )
+
+    # --- Job execution ---------------------------------------------------- #
+
+    def _enqueue(
+        self,
+        context: MeetingContext,
+        *,
+        jobs: Optional[PlanningJobQueue] = None,
+        on_start: Optional[Callable[[], None]] = None,
+        profile: Optional[RequestProfile] = None,
+    ) -> tuple[PlanningRecord, Future]:
+        """
+        Single-flight per meeting and context hash: a context identical to the
+        meeting's queued or running job attaches to it and shares its result.
+        A different context supersedes that job, or with
+        ``PLANNING_CONFLICT=queue`` waits for it to finish (only the latest
+        waiting context is kept). The returned future resolves to the final
+        response; a superseded job's future resolves to its successor's.
+        """
+        fingerprint = context_hash(context)
+        with self._flights.lock:
+            attached = self._flights.find(context.meetingId, fingerprint)
+            if attached is not None:
+                COALESCED.inc(kind="plan", outcome="attached")
+                self._settle_profile(profile, attached.job_id)
+                return attached.record, attached.result
+            if self._flights.running(context.meetingId) is not None and self._conflict == "queue":
+                return self._queue_behind(context, fingerprint, jobs=jobs, on_start=on_start, profile=profile)
+            flight = self._start(context, fingerprint, jobs=jobs, on_start=on_start, profile=profile)
+        return flight.record, flight.result
 
-    def submit_plan(self, context: MeetingContext) -> PlanningResponse:
+    def _start(
+        self,
+        context: MeetingContext,
+        fingerprint: str,
+        *,
+        jobs: Optional[PlanningJobQueue] = None,
+        on_start: Optional[Callable[[], None]] = None,
+        profile: Optional[RequestProfile] = None,
+        job_id: Optional[str] = None,
+        result: Optional[Future] = None,
+    ) -> Flight:
+        # Called with the flights lock held.
+        previous = self._repository.get(context.meetingId) if self._incremental else None
+        update: Optional[tuple[PlanningPlan, ContextDiff]] = None
+        if previous is not None and previous.status is PlanStatus.ready and previous.plan is not None:
+            diff = diff_contexts(previous.context, context)
+            if not diff:
+                REPLANS.inc(mode="reused")
+                self._settle_profile(profile, previous.agentJobId)
+                reused = Flight(fingerprint, previous.agentJobId or "", previous, result or Future())
+                reused.result.set_result(self._to_response(previous))
+                return reused
+            # upsert_context clears the stored plan, so the job gets it from here.
+            update = (previous.plan, diff)
+        job_id = job_id or str(uuid.uuid4())
+        # Reserve a worker slot before touching the repository so a rejected
+        # submission leaves any existing plan for this meeting untouched.
+        with activate(profile, sample=False, finish_on_error=True), (jobs or self._jobs).reserve() as submit:
+            record = self._repository.upsert_context(context, agent_job_id=job_id)
+            self._events.publish(context.meetingId, "status", self.event_payload(self._to_response(record)))
+            if profile is not None:
+                self._profiles.put(job_id, profile)
+            job = submit(self._run_job, context, job_id, on_start, profile, update)
+        flight = Flight(fingerprint, job_id, record, result or Future())
+        if self._flights.add_running(context.meetingId, flight) is not None:
+            COALESCED.inc(kind="plan", outcome="superseded")
+        job.add_done_callback(lambda done: self._finish(flight, done))
+        return flight
+
+    def _queue_behind(
+        self,
+        context: MeetingContext,
+        fingerprint: str,
+        **options: Any,
+    ) -> tuple[PlanningRecord, Future]:
+        # Called with the flights lock held. The context only reaches the
+        # repository once the running job finishes; until then GET /plan
+        # answers for it through queued_behind().
         job_id = str(uuid.uuid4())
-        record = self._repository.upsert_context(context, agent_job_id=job_id)
-        prompt: str | None = None
+        record = PlanningRecord(meetingId=context.meetingId, context=context, agentJobId=job_id)
+        waiting = Flight(fingerprint, job_id, record, Future(), profile=options.get("profile"))
+        waiting.start = partial(self._start, context, fingerprint, job_id=job_id, result=waiting.result, **options)
+        replaced = self._flights.add_waiting(context.meetingId, waiting)
+        if replaced is not None:
+            chain(waiting.result, replaced.result)
+            if replaced.profile is not None:
+                replaced.profile.finish()
+            COALESCED.inc(kind="plan", outcome="superseded")
+        COALESCED.inc(kind="plan", outcome="queued")
+        return record, waiting.result
+
+    def _finish(self, flight: Flight, job: Future) -> None:
+        with self._flights.lock:
+            waiting = self._flights.finish(flight.record.meetingId, flight)
+            if waiting is not None and waiting.start is not None:
+                try:
+                    waiting.start()
+                except Exception as exc:  # queue full: the waiting callers get the error
+                    waiting.result.set_exception(exc)
+        if flight.superseded_by is not None:
+            chain(flight.superseded_by.result, flight.result)
+        elif job.exception() is not None:
+            flight.result.set_exception(job.exception())
+        else:
+            flight.result.set_result(job.result())
+
+    def _settle_profile(self, profile: Optional[RequestProfile], job_id: Optional[str]) -> None:
+        """
+        End the profile of a submission that did not start a job of its own,
+        keeping it under ``job_id`` unless that job already has a profile.
+        """
+        if profile is None:
+            return
+        profile.finish()
+        if job_id and self._profiles.get(job_id) is None:
+            self._profiles.put(job_id, profile)
+
+    def _run_job(
+        self,
+        context: MeetingContext,
+        job_id: str,
+        on_start: Optional[Callable[[], None]] = None,
+        profile: Optional[RequestProfile] = None,
+        update: Optional[tuple[PlanningPlan, ContextDiff]] = None,
+    ) -> PlanningResponse:
+        if profile is None:
+            return self._execute_job(context, job_id, on_start, update)
+        try:
+            with activate(profile), span("plan_job"):
+                return self._execute_job(context, job_id, on_start, update)
+        finally:
+            profile.finish()
+
+    def _execute_job(
+        self,
+        context: MeetingContext,
+        job_id: str,
+        on_start: Optional[Callable[[], None]] = None,
+        update: Optional[tuple[PlanningPlan, ContextDiff]] = None,
+    ) -> PlanningResponse:
+        if not self._repository.mark_processing(context.meetingId, job_id):
+            # Superseded by a newer submission before a worker picked it up.
+            return self.get_plan(context.meetingId)
+        if on_start:
+            on_start()
+        self._events.publish(
+            context.meetingId,
+            "status",
+            {"meetingId": context.meetingId, "status": PlanStatus.processing.value, "agentJobId": job_id},
+        )
+
+        def checkpoint() -> None:
+            if self._flights.is_superseded(job_id):
+                # Stop streaming or making LLM calls for a plan nobody will see.
+                raise _Superseded(job_id)
+
+        def on_partial(partial: dict[str, Any]) -> None:
+            checkpoint()
+            self._events.publish(context.meetingId, "partial", {"agentJobId": job_id, **partial})
+
         try:
-            plan = self._pipeline.generate_plan(context)
-            prompt = self._pipeline.last_prompt
-            self._repository.set_plan_result(context.meetingId, plan, prompt=prompt)
-            record.plan = plan
-            record.status = PlanStatus.ready
-            record.prompt = prompt
-            record.error = None
+            if update is not None:
+                plan = self._pipeline.update_plan(*update, context, on_partial=on_partial, checkpoint=checkpoint)
+            else:
+                plan = self._pipeline.generate_plan(context, on_partial=on_partial, checkpoint=checkpoint)
+            with timed("task_graph"):
+                graph = build_task_graph(plan)
+            record = self._repository.set_plan_result(
+                context.meetingId,
+                plan,
+                prompt=self._pipeline.last_prompt,
+                agent_job_id=job_id,
+                graph=graph,
+            )
+        except _Superseded:
+            return self.get_plan(context.meetingId)
         except Exception as exc:  # pragma: no cover - rely on runtime logging/handling
-            error_message = str(exc)
-            prompt = self._pipeline.last_prompt
-            self._repository.set_plan_result(
-                context.meetingId, None, error=error_message, prompt=prompt
+            record = self._repository.set_plan_result(
+                context.meetingId,
+                None,
+                error=str(exc),
+                prompt=self._pipeline.last_prompt,
+                agent_job_id=job_id,
             )
-            record.status = PlanStatus.failed
-            record.plan = None
-            record.error = error_message
-            record.prompt = prompt
-        response = PlanningResponse(
-            meetingId=record.meetingId,
-            status=record.status,
-            plan=record.plan,
-            agentJobId=record.agentJobId,
-            error=record.error,
-            transcript=context.transcript,
-            prompt=prompt,
-        )
-        self._persist_response(response)
+        if record is None:
+            return self.get_plan(context.meetingId)
+        self._responses.invalidate(context.meetingId)
+        response = self._to_response(record)
+        self._events.publish(context.meetingId, response.status.value, self.event_payload(response))
+        # Written off the request path; repeated results for a meeting coalesce.
+        self._persister.submit(response)
         return response
 
-    def get_plan(self, meeting_id: str) -> PlanningResponse:
-        record = self._repository.get(meeting_id)
-        if not record:
-            raise ValueError(f"No plan found for meeting '{meeting_id}'.")
+    @staticmethod
+    def event_payload(response: PlanningResponse) -> dict[str, Any]:
+        """
+        SSE payload for a plan state; omits the transcript and prompt.
+        """
+        return response.model_dump(mode="json", exclude={"transcript", "prompt"})
 
-        response = PlanningResponse(
+    def _to_response(self, record: PlanningRecord) -> PlanningResponse:
+        return PlanningResponse(
             meetingId=record.meetingId,
             status=record.status,
             plan=record.plan,
@@ -78,15 +396,3 @@ class PlanningService:
             transcript=record.context.transcript,
             prompt=record.prompt,
         )
-        self._persist_response(response)
-        return response
-
-    def _persist_response(self, response: PlanningResponse) -> None:
-        try:
-            target_path = self._output_dir / f"{response.meetingId}.json"
-            with target_path.open("w", encoding="utf-8") as handle:
-                handle.write(response.model_dump_json(indent=2))
-        except Exception:
-            # Persistence failures shouldn't break API responses; surface via stdout for now.
-            print(f"[warn] Failed to persist plan for {response.meetingId}")  # pragma: no cover
-
@@ -0,0 +1,295 @@
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar
+
+_SAMPLE_INTERVAL = 0.005
+_MAX_STACK_DEPTH = 128
+_T = TypeVar("_T")
+
+# The profile of the request the current thread or task is working for, if
+# any. A ContextVar (rather than a thread-local) keeps concurrent requests on
+# the event loop apart and follows Starlette's run_in_threadpool.
+_CURRENT: ContextVar[Optional["RequestProfile"]] = ContextVar("nova_profile", default=None)
+
+
+@dataclass
+class Span:
+    name: str
+    thread: str
+    start: float  # seconds since the profile started
+    duration: float
+
+
+class RequestProfile:
+    """
+    Sampled CPU stacks and wall-clock spans for one profiled request.
+
+    Only threads currently working for the request (see ``activate``) are
+    sampled, so concurrent unprofiled requests don't show up in the result.
+    """
+
+    def __init__(self, label: str) -> None:
+        self.label = label
+        self.agent_job_id: Optional[str] = None
+        self.started_at = time.time()
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._threads: Dict[int, int] = {}  # thread id -> activation depth
+        self._samples: Counter[str] = Counter()
+        self._spans: List[Span] = []
+        self.finished = False
+        self.duration: Optional[float] = None
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._origin
+
+    def add_span(self, name: str, start: float, duration: float) -> None:
+        with self._lock:
+            self._spans.append(Span(name, threading.current_thread().name, round(start, 6), round(duration, 6)))
+
+    def finish(self) -> None:
+        with self._lock:
+            if self.finished:
+                return
+            self.finished = True
+            self.duration = round(self.elapsed(), 6)
+        _SAMPLER.remove(self)
+
+    def collapsed(self) -> str:
+        """
+        Samples in the collapsed-stack format (``frame;frame;frame count``)
+        read by flamegraph.pl, inferno and speedscope.
+        """
+        with self._lock:
+            items = sorted(self._samples.items())
+        return "".join(f"{stack} {count}\n" for stack, count in items)
+
+    def chrome_trace(self) -> dict[str, Any]:
+        """
+        Spans as Chrome trace events (chrome://tracing, Perfetto, speedscope).
+        """
+        with self._lock:
+            spans = list(self._spans)
+        threads = {name: index for index, name in enumerate(sorted({span.thread for span in spans}), start=1)}
+        return {
+            "traceEvents": [
+                {
+                    "name": span.name,
+                    "ph": "X",
+                    "ts": int(span.start * 1e6),
+                    "dur": int(span.duration * 1e6),
+                    "pid": 1,
+                    "tid": threads[span.thread],
+                    "args": {"thread": span.thread},
+                }
+                for span in spans
+            ],
+            "displayTimeUnit": "ms",
+            "otherData": {"label": self.label, "agentJobId": self.agent_job_id},
+        }
+
+    def to_dict(self) -> dict[str, Any]:
+        with self._lock:
+            spans = [span.__dict__.copy() for span in self._spans]
+            sample_count = sum(self._samples.values())
+        return {
+            "agentJobId": self.agent_job_id,
+            "label": self.label,
+            "startedAt": self.started_at,
+            "finished": self.finished,
+            "durationSeconds": self.duration,
+            "sampleIntervalSeconds": _SAMPLER.interval,
+            "sampleCount": sample_count,
+            "spans": spans,
+            "collapsed": self.collapsed(),
+        }
+
+    # --- Sampler hooks --------------------------------------------------- #
+
+    def _enter_thread(self, thread_id: int) -> None:
+        with self._lock:
+            self._threads[thread_id] = self._threads.get(thread_id, 0) + 1
+
+    def _exit_thread(self, thread_id: int) -> None:
+        with self._lock:
+            depth = self._threads.get(thread_id, 0) - 1
+            if depth > 0:
+                self._threads[thread_id] = depth
+            else:
+                self._threads.pop(thread_id, None)
+
+    def _sample(self, frames: Dict[int, Any], names: Dict[int, str]) -> None:
+        with self._lock:
+            thread_ids = list(self._threads)
+        stacks = []
+        for thread_id in thread_ids:
+            frame = frames.get(thread_id)
+            if frame is not None:
+                stacks.append(_collapse(frame, names.get(thread_id, str(thread_id))))
+        if stacks:
+            with self._lock:
+                self._samples.update(stacks)
+
+
+class _Sampler:
+    """
+    One background thread that samples every active profile; it only runs
+    while at least one profile is active. ``PROFILE_SAMPLE_INTERVAL`` is read
+    each time the thread starts.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._profiles: List[RequestProfile] = []
+        self._thread: Optional[threading.Thread] = None
+        self.interval = _SAMPLE_INTERVAL
+
+    def add(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._profiles.append(profile)
+            if self._thread is None:
+                self.interval = float(os.getenv("PROFILE_SAMPLE_INTERVAL") or _SAMPLE_INTERVAL)
+                self._thread = threading.Thread(target=self._run, name="nova-profiler", daemon=True)
+                self._thread.start()
+
+    def remove(self, profile: RequestProfile) -> None:
+        with self._lock:
+            if profile in self._profiles:
+                self._profiles.remove(profile)
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                profiles = list(self._profiles)
+                if not profiles:
+                    self._thread = None
+                    return
+            frames = sys._current_frames()
+            names = {thread.ident: thread.name for thread in threading.enumerate() if thread.ident is not None}
+            for profile in profiles:
+                profile._sample(frames, names)
+            del frames
+            time.sleep(self.interval)
+
+
+_SAMPLER = _Sampler()
+
+
+def start_profile(label: str) -> RequestProfile:
+    profile = RequestProfile(label)
+    _SAMPLER.add(profile)
+    return profile
+
+
+def current() -> Optional[RequestProfile]:
+    return _CURRENT.get()
+
+
+@contextmanager
+def activate(
+    profile: Optional[RequestProfile],
+    *,
+    sample: bool = True,
+    finish_on_error: bool = False,
+) -> Iterator[None]:
+    """
+    Attribute work in this block to ``profile``.
+
+    With ``sample`` the current thread's stacks are sampled too; pass False on
+    the event loop thread, which also serves other requests. With
+    ``finish_on_error`` the profile ends if the block raises, for requests
+    that fail before handing the profile to a planning job.
+    """
+    if profile is None:
+        yield
+        return
+    token = _CURRENT.set(profile)
+    thread_id = threading.get_ident()
+    if sample:
+        profile._enter_thread(thread_id)
+    try:
+        yield
+    except BaseException:
+        if finish_on_error:
+            profile.finish()
+        raise
+    finally:
+        if sample:
+            profile._exit_thread(thread_id)
+        _CURRENT.reset(token)
+
+
+def propagate(fn: Callable[..., _T]) -> Callable[..., _T]:
+    """
+    Wrap ``fn`` so that, when run on another thread (e.g. an executor), its
+    work is attributed to the current thread's profile. Returns ``fn``
+    unchanged when nothing is being profiled.
+    """
+    profile = current()
+    if profile is None:
+        return fn
+
+    def wrapper(*args: Any, **kwargs: Any) -> _T:
+        with activate(profile):
+            return fn(*args, **kwargs)
+
+    return wrapper
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """
+    Record a wall-clock span on the current thread's profile; a no-op otherwise.
+    """
+    profile = current()
+    if profile is None:
+        yield
+        return
+    start = profile.elapsed()
+    try:
+        yield
+    finally:
+        profile.add_span(name, start, profile.elapsed() - start)
+
+
+class ProfileStore:
+    """
+    Keeps the most recent profiles (``PROFILE_MAX_STORED``) by agentJobId.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None) -> None:
+        max_override = os.getenv("PROFILE_MAX_STORED")
+        self._max_entries = int(max_override) if max_override else (max_entries or 32)
+        self._profiles: "OrderedDict[str, RequestProfile]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, agent_job_id: str, profile: RequestProfile) -> None:
+        profile.agent_job_id = agent_job_id
+        with self._lock:
+            self._profiles[agent_job_id] = profile
+            self._profiles.move_to_end(agent_job_id)
+            while len(self._profiles) > self._max_entries:
+                self._profiles.popitem(last=False)
+
+    def get(self, agent_job_id: str) -> Optional[RequestProfile]:
+        with self._lock:
+            return self._profiles.get(agent_job_id)
+
+
+def _collapse(frame: Any, thread_name: str) -> str:
+    names = []
+    while frame is not None and len(names) < _MAX_STACK_DEPTH:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    names.append(thread_name)
+    # Collapsed stacks run root-first and use ';' as the separator.
+    return ";".join(name.replace(";", ":") for name in reversed(names))
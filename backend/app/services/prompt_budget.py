@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence
+
+from .metrics import PROMPT_TOKENS
+
+try:  # Optional exact tokenizer
+    import tiktoken  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    tiktoken = None
+
+_ENCODING = "cl100k_base"
+# BPE vocabularies split long words into pieces of roughly four characters and
+# give punctuation its own token; without tiktoken this approximates that.
+_ESTIMATE_PATTERN = re.compile(r"\w{1,4}|[^\w\s]")
+_OMITTED = "[... {count} tokens omitted ...]"
+
+# Whole turns that carry nothing for planning.
+_STOP_TURNS = frozenset(
+    {
+        "ok", "okay", "right", "cool", "great", "mhm", "mm hmm", "uh huh", "got it", "thanks", "thank you",
+        "alright", "all right",
+    }
+)
+# Fillers removed inside turns. Multi-word fillers only when set off by commas,
+# so "what kind of cache" or "I mean the API" survive.
+_FILLER = re.compile(
+    r"\b(?:u+m+|u+h+|e+r+m+|h+m+)\b[,.]?\s*|,\s*(?:you know|i mean|like|basically|actually|sort of|kind of)\s*(?=,)",
+    re.IGNORECASE,
+)
+_SPEAKER = re.compile(r"^\s*([A-Z][\w .'-]{0,40}):\s*(.*)$")
+
+
+def count_tokens(text: str) -> int:
+    """
+    Token count of ``text``: exact with tiktoken installed
+    (``PROMPT_TOKEN_ENCODING``), otherwise an estimate.
+    """
+    if not text:
+        return 0
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return len(_ESTIMATE_PATTERN.findall(text))
+
+
+@lru_cache(maxsize=1)
+def _encoding() -> Any:
+    if tiktoken is None:
+        return None
+    # Read on first use, after main.py has loaded backend/.env.
+    name = os.getenv("PROMPT_TOKEN_ENCODING") or _ENCODING
+    try:
+        return tiktoken.get_encoding(name)
+    except Exception:  # unknown encoding or no cached vocabulary offline
+        print(f"[prompt] tiktoken encoding '{name}' unavailable; estimating token counts")
+        return None
+
+
+def compress_transcript(transcript: str) -> str:
+    """
+    Drop filler words, acknowledgement-only turns and immediately repeated
+    turns, and fold consecutive turns by the same speaker into one line. A
+    line repeated later in the meeting is kept; it may be a new decision.
+    """
+    turns: List[List[str]] = []  # [speaker, text]
+    previous: Optional[tuple[str, str]] = None
+    for line in transcript.splitlines():
+        match = _SPEAKER.match(line)
+        speaker, text = (match.group(1), match.group(2)) if match else ("", line)
+        text = " ".join(_FILLER.sub("", text).split())
+        key = _normalize(text)
+        if not key or key in _STOP_TURNS or (speaker, key) == previous:
+            continue
+        previous = (speaker, key)
+        if turns and turns[-1][0] == speaker:
+            turns[-1][1] += " " + text
+        else:
+            turns.append([speaker, text])
+    return "\n".join(f"{speaker}: {text}" if speaker else text for speaker, text in turns)
+
+
+def dedupe_lines(text: str, key: Optional[Callable[[str], str]] = None) -> str:
+    """
+    Keep the first of lines that are the same ignoring case, punctuation and
+    spacing (or that share ``key(line)``).
+    """
+    kept: List[str] = []
+    seen: set[str] = set()
+    for line in text.splitlines():
+        identity = _normalize(key(line) if key else line)
+        if identity and identity in seen:
+            continue
+        seen.add(identity)
+        kept.append(line)
+    return "\n".join(kept)
+
+
+@dataclass(frozen=True)
+class PromptSection:
+    """
+    A variable part of a prompt. Sections over their share of the budget are
+    cut between lines or sentences: from the end, or from the middle when
+    ``keep_tail`` (transcripts open with context and close with decisions).
+    """
+
+    name: str
+    text: str
+    weight: float = 1.0
+    keep_tail: bool = False
+
+
+def fit_sections(sections: Sequence[PromptSection], budget: int) -> Dict[str, str]:
+    """
+    Share ``budget`` tokens between ``sections`` by weight and cut each one to
+    its share. Sections that need less than their share keep everything, and
+    what they leave is shared among the rest.
+    """
+    needs = {section.name: count_tokens(section.text) for section in sections}
+    allowed: Dict[str, int] = {}
+    remaining = max(0, budget)
+    open_sections = [section for section in sections if needs[section.name]]
+    while open_sections:
+        total_weight = sum(section.weight for section in open_sections) or 1.0
+        fitting = [s for s in open_sections if needs[s.name] <= remaining * s.weight / total_weight]
+        if not fitting:
+            for section in open_sections:
+                allowed[section.name] = int(remaining * section.weight / total_weight)
+            break
+        for section in fitting:
+            allowed[section.name] = needs[section.name]
+            remaining -= needs[section.name]
+        open_sections = [section for section in open_sections if section.name not in allowed]
+    return {
+        section.name: (
+            section.text
+            if allowed.get(section.name, 0) >= needs[section.name]
+            else _truncate(section.text, allowed.get(section.name, 0), needs[section.name], section.keep_tail)
+        )
+        for section in sections
+    }
+
+
+def record_prompt_tokens(step: str, sections: Mapping[str, str]) -> Dict[str, int]:
+    """
+    Count the tokens of each section of a prompt sent for ``step``, export
+    them as ``nova_prompt_tokens`` and return the counts.
+    """
+    usage = {name: count_tokens(text) for name, text in sections.items()}
+    for name, tokens in usage.items():
+        PROMPT_TOKENS.observe(tokens, step=step, section=name)
+    print(f"[prompt:{step}] tokens " + " ".join(f"{name}={tokens}" for name, tokens in usage.items()))
+    return usage
+
+
+# --- Internals ------------------------------------------------------- #
+
+
+def _normalize(text: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+def _truncate(text: str, limit: int, total: int, keep_tail: bool) -> str:
+    # Cut between lines or sentences; each piece keeps its own separator.
+    pieces = [piece for piece in re.split(r"(?<=[.!?])(?=\s)|(?<=\n)", text) if piece]
+    costs = [count_tokens(piece) for piece in pieces]
+    available = limit - count_tokens(_OMITTED.format(count=total)) - 2
+    if available <= 0:
+        return ""
+    head: List[str] = []
+    tail: List[str] = []
+    low, high = 0, len(pieces) - 1
+    take_tail = False
+    while low <= high:
+        index = high if take_tail else low
+        if costs[index] > available:
+            if not head and not tail:
+                # One oversized piece: keep a proportional share of its characters.
+                head.append(pieces[index][: len(pieces[index]) * available // costs[index]])
+            break
+        available -= costs[index]
+        if take_tail:
+            tail.insert(0, pieces[index])
+            high -= 1
+        else:
+            head.append(pieces[index])
+            low += 1
+        take_tail = keep_tail and not take_tail
+    marker = _OMITTED.format(count=max(0, total - sum(count_tokens(piece) for piece in head + tail)))
+    return "\n".join(part for part in ("".join(head).rstrip(), marker, "".join(tail).strip()) if part)
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Dict, Iterator, Optional
+
+_DEFAULT_CONCURRENCY = {"OPENROUTER": 8, "GITHUB": 4}
+
+
+class RequestBudget:
+    """
+    Process-wide budget for calls to an upstream API: a semaphore capping
+    concurrent requests plus an optional token bucket capping the request rate.
+
+    ``rate`` is in requests per second (0 disables the bucket) and ``burst`` is
+    how many requests may start back to back after an idle period. Waiting
+    happens before the request is sent, so a large batch queues here instead of
+    tripping the upstream rate limit.
+    """
+
+    def __init__(self, *, max_concurrency: int, rate: float = 0.0, burst: Optional[int] = None) -> None:
+        self._max_concurrency = max(1, max_concurrency)
+        self._slots = threading.BoundedSemaphore(self._max_concurrency)
+        self._rate = max(0.0, rate)
+        self._burst = max(1, burst if burst is not None else int(self._rate) or 1)
+        self._tokens = float(self._burst)
+        self._refilled_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._active = 0
+        self._waiting = 0
+
+    @classmethod
+    def from_env(cls, name: str) -> "RequestBudget":
+        """
+        Build a budget from ``{name}_MAX_CONCURRENCY``, ``{name}_RATE_LIMIT`` and ``{name}_RATE_BURST``.
+        """
+        concurrency = os.getenv(f"{name}_MAX_CONCURRENCY")
+        rate = os.getenv(f"{name}_RATE_LIMIT")
+        burst = os.getenv(f"{name}_RATE_BURST")
+        return cls(
+            max_concurrency=int(concurrency) if concurrency else _DEFAULT_CONCURRENCY.get(name, 4),
+            rate=float(rate) if rate else 0.0,
+            burst=int(burst) if burst else None,
+        )
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            return {
+                "maxConcurrency": self._max_concurrency,
+                "active": self._active,
+                "waiting": self._waiting,
+                "ratePerSecond": self._rate,
+            }
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """
+        Block until a request may start; the concurrency slot is held for the block.
+        """
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def aslot(self) -> AsyncIterator[None]:
+        """
+        ``slot`` for coroutines; the wait happens off the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(None, self.acquire)
+        try:
+            await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # The slot may still be granted after we stop waiting; hand it back.
+            future.add_done_callback(lambda done: done.cancelled() or done.exception() or self.release())
+            raise
+        try:
+            yield
+        finally:
+            self.release()
+
+    def acquire(self) -> None:
+        with self._lock:
+            self._waiting += 1
+        try:
+            self._slots.acquire()
+            try:
+                self._take_token()
+            except BaseException:
+                self._slots.release()
+                raise
+        finally:
+            with self._lock:
+                self._waiting -= 1
+        with self._lock:
+            self._active += 1
+
+    def release(self) -> None:
+        with self._lock:
+            self._active -= 1
+        self._slots.release()
+
+    def _take_token(self) -> None:
+        if not self._rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self._burst, self._tokens + (now - self._refilled_at) * self._rate)
+                self._refilled_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self._rate
+            time.sleep(wait)
+
+
+_BUDGETS: Dict[str, RequestBudget] = {}
+_BUDGETS_LOCK = threading.Lock()
+
+
+def shared_budget(name: str) -> RequestBudget:
+    """
+    Return the process-wide budget for ``name`` (e.g. ``OPENROUTER``), creating it from the environment.
+    """
+    with _BUDGETS_LOCK:
+        budget = _BUDGETS.get(name)
+        if budget is None:
+            budget = _BUDGETS[name] = RequestBudget.from_env(name)
+        return budget
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from collections import deque
+from typing import Any, Coroutine, Deque, Dict, List, Optional, Sequence, TypeVar
+
+_T = TypeVar("_T")
+_WINDOW = 200
+
+
+class RequestPolicy:
+    """
+    How an LLM request is sent: the model chain to fail over along, and when
+    to hedge.
+
+    Configured by ``OPENROUTER_FALLBACK_MODELS`` (comma-separated models tried
+    after the primary on 5xx, 429 or a failed connection) and
+    ``OPENROUTER_HEDGE_PERCENTILE``. When that is set, a duplicate request is
+    sent to ``OPENROUTER_HEDGE_MODEL`` (default: the same model) once the
+    first has been running longer than that percentile of the model's recent
+    latencies. ``OPENROUTER_HEDGE_INITIAL_DELAY`` applies until enough
+    latencies have been seen, and ``OPENROUTER_HEDGE_MIN_DELAY`` is the floor.
+    """
+
+    def __init__(
+        self,
+        *,
+        fallback_models: Sequence[str] = (),
+        hedge_percentile: Optional[float] = None,
+        hedge_model: Optional[str] = None,
+        hedge_min_delay: float = 1.0,
+        hedge_initial_delay: float = 10.0,
+        min_samples: int = 20,
+    ) -> None:
+        self._fallback_models = [model for model in fallback_models if model]
+        self._hedge_percentile = hedge_percentile if hedge_percentile and 0 < hedge_percentile < 100 else None
+        self._hedge_model = hedge_model or None
+        self._hedge_min_delay = hedge_min_delay
+        self._hedge_initial_delay = hedge_initial_delay
+        self._min_samples = min_samples
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "RequestPolicy":
+        percentile = os.getenv("OPENROUTER_HEDGE_PERCENTILE")
+        return cls(
+            fallback_models=[model.strip() for model in os.getenv("OPENROUTER_FALLBACK_MODELS", "").split(",")],
+            hedge_percentile=float(percentile) if percentile else None,
+            hedge_model=os.getenv("OPENROUTER_HEDGE_MODEL"),
+            hedge_min_delay=float(os.getenv("OPENROUTER_HEDGE_MIN_DELAY", "1.0")),
+            hedge_initial_delay=float(os.getenv("OPENROUTER_HEDGE_INITIAL_DELAY", "10.0")),
+        )
+
+    @property
+    def hedging(self) -> bool:
+        return self._hedge_percentile is not None
+
+    @property
+    def name(self) -> str:
+        """
+        Metrics label: ``single``, ``failover``, ``hedged`` or ``hedged+failover``.
+        """
+        parts = (["hedged"] if self.hedging else []) + (["failover"] if self._fallback_models else [])
+        return "+".join(parts) or "single"
+
+    def chain(self, model: str) -> List[str]:
+        """
+        ``model`` followed by the fallback models, without repeats.
+        """
+        return list(dict.fromkeys([model, *self._fallback_models]))
+
+    def hedge_model(self, model: str) -> str:
+        return self._hedge_model or model
+
+    def hedge_delay(self, model: str) -> float:
+        """
+        Seconds to wait for ``model`` before sending the hedged duplicate.
+        """
+        with self._lock:
+            samples = sorted(self._latencies.get(model, ()))
+        if len(samples) < self._min_samples or self._hedge_percentile is None:
+            return max(self._hedge_min_delay, self._hedge_initial_delay)
+        index = min(len(samples) - 1, int(len(samples) * self._hedge_percentile / 100))
+        return max(self._hedge_min_delay, samples[index])
+
+    def observe(self, model: str, seconds: float) -> None:
+        """
+        Record the latency of a successful request.
+        """
+        with self._lock:
+            self._latencies.setdefault(model, deque(maxlen=_WINDOW)).append(seconds)
+
+
+class _BackgroundLoop:
+    """
+    An event loop on a daemon thread, so synchronous callers can race hedged
+    requests with real cancellation and a pooled async client of their own.
+    """
+
+    def __init__(self) -> None:
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def run(self, coro: Coroutine[Any, Any, _T]) -> _T:
+        return asyncio.run_coroutine_threadsafe(coro, self._get()).result()
+
+    def _get(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="nova-llm-loop", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+
+_LOOP = _BackgroundLoop()
+
+
+def run_on_background_loop(coro: Coroutine[Any, Any, _T]) -> _T:
+    """
+    Run ``coro`` on the shared background loop and block until it finishes.
+    """
+    return _LOOP.run(coro)
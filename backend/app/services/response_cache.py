@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class SerializedPlan:
+    body: bytes
+    etag: str
+    agent_job_id: Optional[str]
+
+
+class SerializedPlanCache:
+    """
+    Serialized ``GET /plan`` bodies keyed by meeting and repository version.
+
+    An entry is only served while the repository version it was built from is
+    still current, so any write to the record invalidates it implicitly.
+    """
+
+    def __init__(self, *, max_entries: int = 512) -> None:
+        self._entries: "OrderedDict[str, tuple[int, SerializedPlan]]" = OrderedDict()
+        self._max_entries = max_entries
+        self._lock = Lock()
+
+    def get(self, meeting_id: str, version: int) -> Optional[SerializedPlan]:
+        with self._lock:
+            entry = self._entries.get(meeting_id)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(meeting_id)
+            return entry[1]
+
+    def put(self, meeting_id: str, version: int, body: bytes, agent_job_id: Optional[str]) -> SerializedPlan:
+        serialized = SerializedPlan(
+            body=body,
+            etag=f'"{hashlib.sha256(body).hexdigest()}"',
+            agent_job_id=agent_job_id,
+        )
+        with self._lock:
+            self._entries[meeting_id] = (version, serialized)
+            self._entries.move_to_end(meeting_id)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return serialized
+
+    def invalidate(self, meeting_id: str) -> None:
+        with self._lock:
+            self._entries.pop(meeting_id, None)
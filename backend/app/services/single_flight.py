@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+from ..schemas import PlanningRecord
+from .profiling import RequestProfile
+
+
+@dataclass
+class Flight:
+    """
+    A meeting's queued or running plan job (or a submission waiting for one)
+    and the future every attached caller waits on.
+    """
+
+    fingerprint: str
+    job_id: str
+    record: PlanningRecord
+    result: Future
+    superseded_by: Optional["Flight"] = None
+    # Set on waiting submissions: submits the job once the running one ends,
+    # and the profile of the request that queued it.
+    start: Optional[Callable[[], "Flight"]] = None
+    profile: Optional[RequestProfile] = None
+
+
+class PlanFlights:
+    """
+    The in-flight plan job of every meeting, plus at most one submission
+    waiting behind it. A ``PlanningService`` is built per request, so this
+    state lives here and is shared. Hold ``lock`` across a lookup and the
+    registration that depends on it.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.RLock()
+        self._running: Dict[str, Flight] = {}
+        self._waiting: Dict[str, Flight] = {}
+        self._superseded: set[str] = set()
+
+    def find(self, meeting_id: str, fingerprint: str) -> Optional[Flight]:
+        """
+        The waiting or running flight for this exact context, if any.
+        """
+        with self.lock:
+            for flight in (self._waiting.get(meeting_id), self._running.get(meeting_id)):
+                if flight is not None and flight.fingerprint == fingerprint:
+                    return flight
+            return None
+
+    def running(self, meeting_id: str) -> Optional[Flight]:
+        return self._running.get(meeting_id)
+
+    def waiting(self, meeting_id: str) -> Optional[Flight]:
+        return self._waiting.get(meeting_id)
+
+    def add_running(self, meeting_id: str, flight: Flight) -> Optional[Flight]:
+        """
+        Register ``flight`` as the meeting's job; returns the job it supersedes.
+        """
+        with self.lock:
+            previous = self._running.get(meeting_id)
+            if previous is not None:
+                previous.superseded_by = flight
+                self._superseded.add(previous.job_id)
+            self._running[meeting_id] = flight
+            return previous
+
+    def add_waiting(self, meeting_id: str, flight: Flight) -> Optional[Flight]:
+        """
+        Queue ``flight`` behind the running job; returns the waiting submission it replaces.
+        """
+        with self.lock:
+            previous = self._waiting.get(meeting_id)
+            if previous is not None:
+                previous.superseded_by = flight
+            self._waiting[meeting_id] = flight
+            return previous
+
+    def finish(self, meeting_id: str, flight: Flight) -> Optional[Flight]:
+        """
+        Unregister a finished job; returns the submission waiting to run next.
+        """
+        with self.lock:
+            if self._running.get(meeting_id) is flight:
+                del self._running[meeting_id]
+            self._superseded.discard(flight.job_id)
+            if meeting_id in self._running:
+                return None
+            return self._waiting.pop(meeting_id, None)
+
+    def is_superseded(self, job_id: str) -> bool:
+        return job_id in self._superseded
+
+
+def chain(source: Future, target: Future) -> None:
+    """
+    Complete ``target`` with ``source``'s outcome once it is known.
+    """
+
+    def copy(done: Future) -> None:
+        if target.done():
+            return
+        if done.exception() is not None:
+            target.set_exception(done.exception())
+        else:
+            target.set_result(done.result())
+
+    source.add_done_callback(copy)
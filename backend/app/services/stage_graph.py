@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Collection, Dict, Iterable, List, Mapping, Optional
+
+from pydantic import BaseModel
+
+from .llm_cache import LLMResponseCache
+from .metrics import cache_result
+from .profiling import propagate, span
+
+
+class StageGraphError(ValueError):
+    """Raised when a stage graph is malformed (unknown inputs, duplicates, cycles)."""
+
+
+@dataclass(frozen=True)
+class Stage:
+    """
+    One step of a stage graph. The stage provides an output named ``name``,
+    computed by ``run`` from the outputs (or graph inputs) listed in
+    ``consumes``. Outputs must be JSON-serialisable when ``cacheable``.
+    ``model`` is the LLM the stage uses, if any; it is part of the cache key.
+    """
+
+    name: str
+    consumes: tuple[str, ...]
+    run: Callable[[Mapping[str, Any]], Any]
+    cacheable: bool = True
+    model: Optional[str] = None
+
+
+class StageGraph:
+    """
+    A declarative DAG of stages, each started as soon as everything it
+    consumes is available, so wall-clock time follows the graph's critical path.
+
+    With a cache, every cacheable stage's output is stored under a hash of the
+    stage, its model and the values it consumed. A later run therefore only
+    recomputes stages whose inputs changed, and ``force`` recomputes chosen
+    stages without redoing the others.
+    """
+
+    def __init__(self, stages: Iterable[Stage], *, inputs: Collection[str] = ()) -> None:
+        self._stages: Dict[str, Stage] = {}
+        for stage in stages:
+            if stage.name in self._stages or stage.name in inputs:
+                raise StageGraphError(f"Stage '{stage.name}' is defined twice.")
+            self._stages[stage.name] = stage
+        self._inputs = frozenset(inputs)
+        for stage in self._stages.values():
+            missing = [name for name in stage.consumes if name not in self._stages and name not in self._inputs]
+            if missing:
+                raise StageGraphError(f"Stage '{stage.name}' consumes unknown outputs: {', '.join(missing)}.")
+        self._order = self._topological_order()
+
+    @property
+    def order(self) -> List[str]:
+        return list(self._order)
+
+    def run(
+        self,
+        inputs: Mapping[str, Any],
+        executor: Executor,
+        *,
+        cache: Optional[LLMResponseCache] = None,
+        force: Collection[str] = (),
+        on_stage: Optional[Callable[[str, Any], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Run every stage and return all outputs (graph inputs included).
+
+        ``on_stage(name, output)`` is called from this thread as each stage
+        finishes. The first stage error cancels stages that haven't started
+        and is re-raised.
+        """
+        missing = self._inputs - set(inputs)
+        if missing:
+            raise StageGraphError(f"Missing graph inputs: {', '.join(sorted(missing))}.")
+        unknown = set(force) - set(self._stages)
+        if unknown:
+            raise StageGraphError(f"Cannot force unknown stages: {', '.join(sorted(unknown))}.")
+        values: Dict[str, Any] = dict(inputs)
+        remaining = {name: set(stage.consumes) - self._inputs for name, stage in self._stages.items()}
+        running: Dict[Future, str] = {}
+
+        def start_ready() -> None:
+            for name in self._order:
+                if name in remaining and not remaining[name]:
+                    del remaining[name]
+                    stage = self._stages[name]
+                    consumed = {key: values[key] for key in stage.consumes}
+                    running[executor.submit(propagate(self._run_stage), stage, consumed, cache, name in force)] = name
+
+        start_ready()
+        try:
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    values[name] = future.result()
+                    for waiting in remaining.values():
+                        waiting.discard(name)
+                    if on_stage:
+                        on_stage(name, values[name])
+                start_ready()
+        except BaseException:
+            for future in running:
+                future.cancel()
+            raise
+        return values
+
+    # --- Internals ------------------------------------------------------- #
+
+    def _run_stage(self, stage: Stage, consumed: Dict[str, Any], cache: Optional[LLMResponseCache], force: bool) -> Any:
+        key = _stage_key(stage, consumed) if cache is not None and stage.cacheable else None
+        with span(f"stage:{stage.name}"):
+            if key is not None and not force:
+                cached = cache.get(key)
+                cache_result("stage", cached is not None)
+                if cached is not None:
+                    return json.loads(cached)
+            started = time.perf_counter()
+            output = stage.run(consumed)
+            print(f"[stages] {stage.name} finished in {time.perf_counter() - started:.2f}s")
+        if key is not None:
+            cache.set(key, json.dumps(output, default=_jsonable))
+        return output
+
+    def _topological_order(self) -> List[str]:
+        order: List[str] = []
+        state: Dict[str, int] = {}  # 1 = visiting, 2 = done
+
+        def visit(name: str, trail: List[str]) -> None:
+            if state.get(name) == 2 or name in self._inputs:
+                return
+            if state.get(name) == 1:
+                raise StageGraphError(f"Stage cycle: {' -> '.join(trail[trail.index(name):] + [name])}.")
+            state[name] = 1
+            for dependency in self._stages[name].consumes:
+                visit(dependency, trail + [name])
+            state[name] = 2
+            order.append(name)
+
+        for name in self._stages:
+            visit(name, [])
+        return order
+
+
+def _stage_key(stage: Stage, consumed: Mapping[str, Any]) -> str:
+    canonical = json.dumps(
+        {"stage": stage.name, "model": stage.model, "inputs": consumed},
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+        default=_jsonable,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"{type(value).__name__} is not JSON serialisable")
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import difflib
+import re
+from typing import Dict, List, Optional, Tuple
+
+from ..schemas import PlanningPlan, TaskGraph, TaskNode, UnresolvedDependency
+
+# Tasks without an estimate still take time; count them as one day so they
+# can sit on the critical path.
+_DEFAULT_ETA_DAYS = 1
+_FUZZY_CUTOFF = 0.8
+
+
+class _TitleIndex:
+    """
+    Resolves free-text ``dependsOn`` entries to task ids: exact title first,
+    then the same title ignoring case and punctuation, then the closest title
+    by similarity, then a unique title containing every word of the reference.
+    """
+
+    def __init__(self, titles: List[Tuple[str, str]]) -> None:
+        self._exact: Dict[str, str] = {}
+        self._normalized: Dict[str, str] = {}
+        self._tokens: List[Tuple[frozenset[str], str]] = []
+        for task_id, title in titles:
+            # Duplicate titles resolve to the first task with that title.
+            self._exact.setdefault(title.strip(), task_id)
+            normalized = _normalize(title)
+            if normalized:
+                self._normalized.setdefault(normalized, task_id)
+                self._tokens.append((frozenset(normalized.split()), task_id))
+
+    def resolve(self, reference: str) -> Optional[str]:
+        task_id = self._exact.get(reference.strip())
+        if task_id:
+            return task_id
+        normalized = _normalize(reference)
+        if not normalized:
+            return None
+        task_id = self._normalized.get(normalized)
+        if task_id:
+            return task_id
+        close = difflib.get_close_matches(normalized, list(self._normalized), n=1, cutoff=_FUZZY_CUTOFF)
+        if close:
+            return self._normalized[close[0]]
+        words = set(normalized.split())
+        containing = {task_id for tokens, task_id in self._tokens if words <= tokens}
+        return containing.pop() if len(containing) == 1 else None
+
+
+def build_task_graph(plan: PlanningPlan) -> TaskGraph:
+    """
+    Index the plan's tasks as a DAG and schedule it.
+
+    Each task gets an id, its ``dependsOn`` titles are resolved to ids, and
+    dependency cycles are broken (and reported) at the edge that closes them.
+    The result has a topological order, earliest and latest start/finish
+    times from ``etaDays``, each task's slack, and the critical path.
+    """
+    nodes: Dict[str, TaskNode] = {}
+    references: Dict[str, List[str]] = {}
+    for milestone_index, milestone in enumerate(plan.milestones, start=1):
+        for task_index, task in enumerate(milestone.tasks, start=1):
+            task_id = f"{milestone_index}.{task_index}"
+            nodes[task_id] = TaskNode(
+                id=task_id,
+                title=task.title,
+                milestone=milestone.title,
+                owner=task.owner,
+                etaDays=task.etaDays,
+            )
+            references[task_id] = task.dependsOn
+
+    index = _TitleIndex([(task_id, node.title) for task_id, node in nodes.items()])
+    unresolved: List[UnresolvedDependency] = []
+    for task_id, node in nodes.items():
+        for reference in references[task_id]:
+            dependency = index.resolve(reference)
+            if dependency is None or dependency == task_id:
+                unresolved.append(UnresolvedDependency(taskId=task_id, reference=reference))
+            elif dependency not in node.dependsOn:
+                node.dependsOn.append(dependency)
+
+    order, cycles = _topological_order(nodes)
+    for task_id in order:
+        for dependency in nodes[task_id].dependsOn:
+            nodes[dependency].dependents.append(task_id)
+    duration = _schedule(nodes, order)
+    return TaskGraph(
+        nodes=list(nodes.values()),
+        order=order,
+        criticalPath=_critical_path(nodes, order, duration),
+        durationDays=duration,
+        cycles=cycles,
+        unresolved=unresolved,
+    )
+
+
+# --- Internals ------------------------------------------------------- #
+
+
+def _normalize(title: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9]+", title.lower()))
+
+
+def _topological_order(nodes: Dict[str, TaskNode]) -> Tuple[List[str], List[List[str]]]:
+    """
+    Depth-first post-order over ``dependsOn``, so prerequisites come first.
+
+    An edge back to a task still on the DFS stack closes a cycle: the cycle is
+    recorded and that edge removed from the node, leaving a DAG.
+    """
+    order: List[str] = []
+    cycles: List[List[str]] = []
+    state: Dict[str, int] = {}  # 1 = on the stack, 2 = done
+    for root in nodes:
+        if root in state:
+            continue
+        # Iterative, so very long dependency chains can't hit the recursion limit.
+        stack: List[Tuple[str, int]] = [(root, 0)]
+        path: List[str] = [root]
+        state[root] = 1
+        while stack:
+            task_id, position = stack[-1]
+            dependencies = nodes[task_id].dependsOn
+            if position < len(dependencies):
+                stack[-1] = (task_id, position + 1)
+                dependency = dependencies[position]
+                if state.get(dependency) == 1:
+                    cycles.append(path[path.index(dependency):] + [dependency])
+                    dependencies.pop(position)
+                    stack[-1] = (task_id, position)
+                elif dependency not in state:
+                    state[dependency] = 1
+                    stack.append((dependency, 0))
+                    path.append(dependency)
+                continue
+            stack.pop()
+            path.pop()
+            state[task_id] = 2
+            order.append(task_id)
+    return order, cycles
+
+
+def _schedule(nodes: Dict[str, TaskNode], order: List[str]) -> float:
+    duration = 0.0
+    for task_id in order:
+        node = nodes[task_id]
+        node.earliestStart = max((nodes[dep].earliestFinish for dep in node.dependsOn), default=0.0)
+        node.earliestFinish = node.earliestStart + _eta(node)
+        duration = max(duration, node.earliestFinish)
+    for task_id in reversed(order):
+        node = nodes[task_id]
+        node.latestFinish = min((nodes[dep].latestStart for dep in node.dependents), default=duration)
+        node.latestStart = node.latestFinish - _eta(node)
+        node.slack = node.latestStart - node.earliestStart
+        node.critical = node.slack <= 1e-9
+    return duration
+
+
+def _critical_path(nodes: Dict[str, TaskNode], order: List[str], duration: float) -> List[str]:
+    end = next(
+        (task_id for task_id in order if nodes[task_id].critical and nodes[task_id].earliestFinish == duration),
+        None,
+    )
+    path: List[str] = []
+    while end is not None:
+        path.append(end)
+        node = nodes[end]
+        end = next(
+            (
+                dep
+                for dep in node.dependsOn
+                if nodes[dep].critical and nodes[dep].earliestFinish == node.earliestStart
+            ),
+            None,
+        )
+    path.reverse()
+    return path
+
+
+def _eta(node: TaskNode) -> float:
+    return float(node.etaDays if node.etaDays is not None and node.etaDays >= 0 else _DEFAULT_ETA_DAYS)
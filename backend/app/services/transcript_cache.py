@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Optional
+
+from pydantic import ValidationError
+
+from ..schemas import TranscriptionResult
+from .audio_preprocessing import TranscriptionOptions
+from .llm_cache import DiskCache
+
+_DEFAULT_CACHE_DIR = Path(__file__).resolve().parent.parent.parent / "data" / "transcripts"
+
+
+def transcript_cache_key(
+    audio_sha256: str,
+    options: TranscriptionOptions,
+    language: Optional[str],
+    model: str,
+) -> str:
+    """
+    Content-address a transcript by the audio bytes and every setting that changes the output.
+    """
+    canonical = json.dumps(
+        {"audio": audio_sha256, "language": language, "model": model, **asdict(options)},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class TranscriptCache:
+    """
+    Content-addressed store of finished transcripts (text and segments).
+
+    Entries live on disk as one JSON file each, bounded by
+    ``TRANSCRIPT_CACHE_MAX_BYTES`` with least-recently-used eviction, so a
+    recording that is analyzed again skips transcription entirely.
+    """
+
+    def __init__(self, directory: Path | str | None = None, *, max_bytes: Optional[int] = None) -> None:
+        max_bytes_override = os.getenv("TRANSCRIPT_CACHE_MAX_BYTES")
+        self._store = DiskCache(
+            directory or os.getenv("TRANSCRIPT_CACHE_DIR") or _DEFAULT_CACHE_DIR,
+            max_bytes=int(max_bytes_override) if max_bytes_override else (max_bytes or 50 * 1024 * 1024),
+            # Transcripts of identical audio never go stale; only size evicts them.
+            ttl_seconds=float("inf"),
+        )
+
+    def get(self, key: str) -> Optional[TranscriptionResult]:
+        payload = self._store.get(key)
+        if payload is None:
+            return None
+        try:
+            return TranscriptionResult.model_validate_json(payload)
+        except ValidationError:
+            return None
+
+    def set(self, key: str, result: TranscriptionResult) -> None:
+        self._store.set(key, result.model_dump_json())
+
+    def stats(self) -> dict[str, Any]:
+        return self._store.stats()
+
+
+_CACHE: Optional[TranscriptCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_transcript_cache() -> Optional[TranscriptCache]:
+    """
+    Return the shared transcript cache, or None when ``TRANSCRIPT_CACHE_ENABLED`` is false.
+    """
+    global _CACHE
+    if os.getenv("TRANSCRIPT_CACHE_ENABLED", "true").strip().lower() in {"0", "false", "no"}:
+        return None
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = TranscriptCache()
+        return _CACHE
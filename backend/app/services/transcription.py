@@ -1,100 +1,440 @@
 from __future__ import annotations
 
+import asyncio
+import multiprocessing
 import os
-import tempfile
-from typing import Optional
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional
 
 from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
 
-try:
-    from faster_whisper import WhisperModel  # type: ignore
-except ImportError:
-    WhisperModel = None  # type: ignore
+from ..schemas import TranscriptionResult, TranscriptSegment
+from .audio_preprocessing import TranscriptionOptions, prepare_audio
+from .jobs import JobQueueFullError
+from .metrics import COALESCED, TRANSCRIPTION_RTF, cache_result, timed
+from .profiling import propagate, span
+from .transcript_cache import get_transcript_cache, transcript_cache_key
+from .uploads import peak_rss_bytes, spool_upload
+from .whisper_models import get_model_registry, transcript_language, whisper_available
 
 
-_WHISPER_MODEL: Optional["WhisperModel"] = None
-_LANGUAGE = os.getenv("TRANSCRIPT_LANGUAGE", "en").strip() or None
+@lru_cache(maxsize=1)
+def default_options() -> TranscriptionOptions:
+    """
+    The ``TRANSCRIPTION_*`` defaults, read on first use (after ``.env`` is loaded).
+    """
+    return TranscriptionOptions.from_env()
+
+
+# Running transcriptions by (event loop, transcript cache key), so identical
+# concurrent uploads wait for the first one instead of running Whisper again.
+_TRANSCRIBING: dict[tuple[asyncio.AbstractEventLoop, str], "asyncio.Future[TranscriptionResult]"] = {}
+
 
+class TranscriptionTimeoutError(RuntimeError):
+    """Raised when a transcription job exceeds its time budget."""
 
-def _get_whisper_model() -> Optional["WhisperModel"]:
-    """Get or initialize the Whisper model (singleton)"""
-    global _WHISPER_MODEL
-    if WhisperModel is None:
+
+class TranscriptionCancelledError(RuntimeError):
+    """Raised when a transcription job is cancelled, e.g. because the client went away."""
+
+
+def _get_whisper_model(compute_type: Optional[str] = None) -> Any:
+    """Get the Whisper model for ``compute_type`` from this process's registry"""
+    if not whisper_available():
         return None
-    if _WHISPER_MODEL is None:
-        print("[transcription] Loading faster-whisper model (small)...")
-        _WHISPER_MODEL = WhisperModel("small", device="cpu", compute_type="int8")
-        print("[transcription] Model loaded successfully")
-    return _WHISPER_MODEL
+    return get_model_registry().get(compute_type)
+
+
+def _preload_worker() -> dict[str, Any]:
+    registry = get_model_registry()
+    registry.preload()
+    return registry.status()
+
+
+class TranscriptionExecutor:
+    """
+    Runs Whisper off the event loop on a bounded thread or process pool.
+
+    ``TRANSCRIPTION_EXECUTOR`` selects ``thread`` (default; CTranslate2 releases
+    the GIL while decoding) or ``process``. ``TRANSCRIPTION_WORKERS`` jobs run
+    in parallel, ``TRANSCRIPTION_QUEUE_SIZE`` more may wait, and each job gets
+    ``TRANSCRIPTION_TIMEOUT`` seconds.
+    """
+
+    def __init__(
+        self,
+        *,
+        mode: Optional[str] = None,
+        max_workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> None:
+        self._mode = (mode or os.getenv("TRANSCRIPTION_EXECUTOR", "thread")).strip().lower()
+        workers_override = os.getenv("TRANSCRIPTION_WORKERS")
+        pending_override = os.getenv("TRANSCRIPTION_QUEUE_SIZE")
+        timeout_override = os.getenv("TRANSCRIPTION_TIMEOUT")
+        self._max_workers = max(1, int(workers_override) if workers_override else (max_workers or 2))
+        self._max_pending = max(0, int(pending_override) if pending_override else (max_pending or 4))
+        self._timeout = float(timeout_override) if timeout_override else (timeout or 1800.0)
+        self._executor: Executor
+        self._manager: Any = None
+        if self._mode == "process":
+            context = multiprocessing.get_context("spawn")
+            self._executor = ProcessPoolExecutor(max_workers=self._max_workers, mp_context=context)
+        else:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._max_workers,
+                thread_name_prefix="nova-whisper",
+            )
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._worker_status: list[dict[str, Any]] = []
+
+    @property
+    def in_flight(self) -> int:
+        with self._lock:
+            return self._in_flight
 
+    def preload(self) -> None:
+        """
+        Load and warm up the Whisper models the workers will use (blocking).
 
-async def transcribe_upload(file: UploadFile) -> str:
+        Threads share this process's registry; in process mode one preload job
+        per worker makes every worker process load its own model up front.
+        """
+        if self._mode != "process":
+            get_model_registry().preload()
+            return
+        futures = [self._executor.submit(_preload_worker) for _ in range(self._max_workers)]
+        statuses = []
+        for future in futures:
+            try:
+                statuses.append(future.result())
+            except Exception as exc:
+                statuses.append({"ready": False, "error": f"{type(exc).__name__}: {exc}"})
+        with self._lock:
+            self._worker_status = statuses
+
+    def status(self) -> dict[str, Any]:
+        """
+        Model readiness and load times, for the readiness endpoint.
+        """
+        if self._mode != "process":
+            return {"mode": self._mode, **get_model_registry().status()}
+        with self._lock:
+            workers = list(self._worker_status)
+        return {
+            "mode": self._mode,
+            "available": whisper_available(),
+            "ready": bool(workers) and all(worker.get("ready") for worker in workers),
+            "workers": workers,
+        }
+
+    async def transcribe(
+        self,
+        path: Path | str,
+        *,
+        size: Optional[int] = None,
+        options: Optional[TranscriptionOptions] = None,
+        is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+        on_done: Optional[Callable[[], None]] = None,
+    ) -> TranscriptionResult:
+        """
+        Transcribe ``path`` on the pool without blocking the event loop.
+
+        ``on_done`` runs once the worker has actually finished with the file,
+        which may be after this coroutine raised on timeout or disconnect.
+        """
+        with self._lock:
+            if self._in_flight >= self._max_workers + self._max_pending:
+                raise JobQueueFullError(
+                    f"Transcription queue is full ({self._in_flight} jobs in flight); retry later."
+                )
+            self._in_flight += 1
+        cancel_event = self._new_cancel_event()
+        # Worker processes can't be sampled from here; threads carry the profile along.
+        job = _run_transcription if self._mode == "process" else propagate(_run_transcription)
+        try:
+            future = self._executor.submit(
+                job,
+                str(path),
+                size,
+                cancel_event,
+                options or default_options(),
+            )
+        except BaseException:
+            self._release(on_done)
+            raise
+        future.add_done_callback(lambda _: self._release(on_done))
+
+        waiter = asyncio.wrap_future(future)
+        deadline = time.monotonic() + self._timeout
+        try:
+            while True:
+                done, _ = await asyncio.wait({waiter}, timeout=0.5)
+                if done:
+                    return waiter.result()
+                if time.monotonic() >= deadline:
+                    raise TranscriptionTimeoutError(
+                        f"Transcription exceeded {self._timeout:.0f}s and was cancelled."
+                    )
+                if is_disconnected is not None and await is_disconnected():
+                    raise TranscriptionCancelledError("Client disconnected; transcription cancelled.")
+        except BaseException:
+            # Covers timeouts, disconnects and cancellation of the request task.
+            future.cancel()
+            cancel_event.set()
+            raise
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._manager is not None:
+            self._manager.shutdown()
+
+    def _new_cancel_event(self) -> Any:
+        if self._mode != "process":
+            return threading.Event()
+        if self._manager is None:
+            self._manager = multiprocessing.get_context("spawn").Manager()
+        return self._manager.Event()
+
+    def _release(self, on_done: Optional[Callable[[], None]]) -> None:
+        with self._lock:
+            self._in_flight -= 1
+        if on_done is not None:
+            on_done()
+
+
+_EXECUTOR: Optional[TranscriptionExecutor] = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def get_transcription_executor() -> TranscriptionExecutor:
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = TranscriptionExecutor()
+        return _EXECUTOR
+
+
+def start_model_preload() -> None:
+    """
+    Preload and warm up Whisper in the background at startup (``WHISPER_PRELOAD``).
+
+    The API starts serving right away; ``transcription_status`` reports when
+    the models are ready, and requests arriving earlier wait for the one
+    in-progress load rather than starting another.
+    """
+    if os.getenv("WHISPER_PRELOAD", "true").strip().lower() in {"0", "false", "no"}:
+        return
+    if not whisper_available():
+        print("[transcription] faster-whisper not installed; skipping model preload")
+        return
+    executor = get_transcription_executor()
+    threading.Thread(target=executor.preload, name="nova-whisper-preload", daemon=True).start()
+
+
+def transcription_status() -> dict[str, Any]:
+    """
+    Readiness of the transcription stage. ``ready`` is also true when there is
+    nothing to wait for (faster-whisper missing or preloading disabled).
+    """
+    status = get_transcription_executor().status()
+    preload = os.getenv("WHISPER_PRELOAD", "true").strip().lower() not in {"0", "false", "no"}
+    status["preload"] = preload
+    status["ready"] = bool(status["ready"]) or not preload or not status["available"]
+    return status
+
+
+def shutdown_transcription_executor() -> None:
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        executor, _EXECUTOR = _EXECUTOR, None
+    if executor is not None:
+        executor.shutdown()
+
+
+async def transcribe_upload(
+    file: UploadFile,
+    *,
+    options: Optional[TranscriptionOptions] = None,
+    is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+) -> TranscriptionResult:
     """
     Transcribe an uploaded audio file using faster-whisper (local Whisper model).
+
+    The upload is streamed to disk first so the recording is never held in
+    memory as a whole; the transcription executor decodes and VAD-trims it
+    from the spooled file, leaving the event loop free for other requests.
+    ``options`` overrides the configured beam size, VAD and compute type.
+
+    The content hash computed while spooling keys the transcript cache, so a
+    recording that was already transcribed with the same options is returned
+    without running Whisper at all. Concurrent uploads of the same recording
+    share one transcription.
     """
 
-    raw = await file.read()
-    if not raw:
+    options = options or default_options()
+    upload = await spool_upload(file)
+    if not upload.size:
+        upload.cleanup()
         print("[transcription] No audio data received")
-        return ""
+        return TranscriptionResult()
 
-    print(f"[transcription] Received {len(raw)} bytes from file: {file.filename}")
-    
-    model = _get_whisper_model()
-    if model is None:
-        return (
-            f"Transcription unavailable: faster-whisper not installed. "
-            f"Received {len(raw)} bytes. Install with: pip install faster-whisper"
-        )
+    cache = get_transcript_cache()
+    cache_key = transcript_cache_key(upload.sha256, options, transcript_language(), get_model_registry().model_size)
+    if cache is not None:
+        cached = await run_in_threadpool(cache.get, cache_key)
+        cache_result("transcript", cached is not None)
+        if cached is not None:
+            upload.cleanup()
+            print(f"[transcription] Cache hit for audio {upload.sha256[:12]}; skipping transcription")
+            return cached
 
-    # Save to temporary file
-    suffix = _detect_extension(file.filename)
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        tmp.write(raw)
-        tmp.flush()
-        temp_path = tmp.name
-    
-    print(f"[transcription] Saved to temp file: {temp_path}")
-    
+    loop = asyncio.get_running_loop()
+    in_flight = _TRANSCRIBING.get((loop, cache_key))
+    if in_flight is not None:
+        shared = await asyncio.shield(in_flight)
+        # A failed run (e.g. its client disconnected) is retried by this caller.
+        if not shared.failed:
+            upload.cleanup()
+            COALESCED.inc(kind="transcription", outcome="attached")
+            return shared
+    leader: asyncio.Future[TranscriptionResult] = loop.create_future()
+    _TRANSCRIBING[(loop, cache_key)] = leader
+    result = TranscriptionResult(failed=True)
     try:
-        print(f"[transcription] Starting transcription (language={_LANGUAGE})...")
-        segments, info = model.transcribe(
-            temp_path,
-            language=_LANGUAGE,
-            beam_size=5,
-            condition_on_previous_text=False,
+        started = time.perf_counter()
+        with timed("transcription"), span("transcription"):
+            result = await get_transcription_executor().transcribe(
+                upload.path,
+                size=upload.size,
+                options=options,
+                is_disconnected=is_disconnected,
+                on_done=upload.cleanup,
+            )
+        if result.duration and not result.failed:
+            TRANSCRIPTION_RTF.observe((time.perf_counter() - started) / result.duration)
+        if cache is not None and not result.failed:
+            await run_in_threadpool(cache.set, cache_key, result)
+    finally:
+        if _TRANSCRIBING.get((loop, cache_key)) is leader:
+            del _TRANSCRIBING[(loop, cache_key)]
+        leader.set_result(result)
+    return result
+
+
+def _run_transcription(
+    path: str,
+    size: Optional[int],
+    cancel_event: Any,
+    options: TranscriptionOptions,
+) -> TranscriptionResult:
+    try:
+        return _transcribe_job(path, size=size, cancel_event=cancel_event, options=options)
+    finally:
+        print(f"[transcription] Process peak RSS after job: {peak_rss_bytes() / 1e6:.1f} MB")
+
+
+def transcribe_file(
+    path: Path | str,
+    *,
+    size: Optional[int] = None,
+    cancel_event: Any = None,
+    options: Optional[TranscriptionOptions] = None,
+) -> str:
+    """
+    Transcribe an audio file already on disk and return the text, or a
+    human-readable message when transcription is unavailable or fails.
+    """
+    return _transcribe_job(path, size=size, cancel_event=cancel_event, options=options).text
+
+
+def _transcribe_job(
+    path: Path | str,
+    *,
+    size: Optional[int],
+    cancel_event: Any,
+    options: Optional[TranscriptionOptions],
+) -> TranscriptionResult:
+    if not whisper_available():
+        return TranscriptionResult(
+            text=(
+                f"Transcription unavailable: faster-whisper not installed. "
+                f"Received {size if size is not None else 'unknown'} bytes. Install with: pip install faster-whisper"
+            ),
+            failed=True,
         )
-        
-        print(f"[transcription] Audio duration: {info.duration:.2f}s, language: {info.language}")
-        
-        text_parts = []
-        for segment in segments:
-            if segment.text:
-                text_parts.append(segment.text.strip())
-        
-        text = " ".join(text_parts)
-        print(f"[transcription] Transcription complete: {len(text)} characters")
-        
-        if text:
-            return text.strip()
-        else:
-            return "No speech detected in audio"
-            
+
+    try:
+        result = transcribe_audio(path, options=options, cancel_event=cancel_event)
+    except TranscriptionCancelledError:
+        print("[transcription] Cancelled; stopping early")
+        return TranscriptionResult(failed=True)
     except Exception as exc:
         print(f"[transcription] Error during transcription: {exc}")
-        return f"Transcription failed: {exc}"
-    finally:
-        try:
-            os.unlink(temp_path)
-        except OSError:
-            pass
+        return TranscriptionResult(text=f"Transcription failed: {exc}", failed=True)
+    if not result.text:
+        result.text = "No speech detected in audio"
+    return result
+
+
+def transcribe_audio(
+    path: Path | str,
+    *,
+    options: Optional[TranscriptionOptions] = None,
+    cancel_event: Any = None,
+) -> TranscriptionResult:
+    """
+    Decode, VAD-trim and transcribe ``path``; segment times refer to the original audio.
 
+    ``cancel_event`` is checked between segments so a cancelled job stops
+    decoding instead of running to the end.
+    """
+    options = options or default_options()
+    model = _get_whisper_model(options.compute_type)
+    if model is None:
+        raise RuntimeError("faster-whisper is not installed.")
 
-def _detect_extension(filename: Optional[str]) -> str:
-    if not filename:
-        return ".wav"
-    base, ext = os.path.splitext(filename)
-    if ext:
-        return ext
-    return ".wav"
+    prepared = prepare_audio(path, options)
+    print(
+        f"[transcription] Audio duration: {prepared.duration:.2f}s, speech after VAD: "
+        f"{prepared.speech_duration:.2f}s (decode {prepared.decode_seconds:.2f}s, vad {prepared.vad_seconds:.2f}s)"
+    )
+    result = TranscriptionResult(duration=prepared.duration, speechDuration=prepared.speech_duration)
+    if not len(prepared.audio):
+        return result
 
+    language = transcript_language()
+    print(
+        f"[transcription] Starting transcription (language={language}, beam_size={options.beam_size}, "
+        f"compute_type={options.compute_type})..."
+    )
+    segments, _ = model.transcribe(
+        prepared.audio,
+        language=language,
+        beam_size=options.beam_size,
+        condition_on_previous_text=False,
+        vad_filter=False,  # silence was already removed above
+    )
+    for segment in segments:
+        if cancel_event is not None and cancel_event.is_set():
+            raise TranscriptionCancelledError("Transcription cancelled.")
+        text = segment.text.strip() if segment.text else ""
+        if text:
+            result.segments.append(
+                TranscriptSegment(
+                    start=prepared.timestamps.to_original(segment.start),
+                    end=prepared.timestamps.to_original(segment.end),
+                    text=text,
+                )
+            )
+    result.text = " ".join(segment.text for segment in result.segments)
+    print(f"[transcription] Transcription complete: {len(result.text)} characters")
+    return result
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import sys
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Any, Optional
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from .metrics import timed
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None  # type: ignore
+
+_CHUNK_SIZE = 1024 * 1024
+_MAX_UPLOAD_BYTES = 512 * 1024 * 1024
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds the configured size cap."""
+
+
+@dataclass
+class SpooledUpload:
+    """
+    An upload streamed to a temporary file on disk.
+    """
+
+    path: Path
+    size: int
+    filename: Optional[str]
+    sha256: str = ""  # hex digest of the content, computed while streaming
+
+    def cleanup(self) -> None:
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+
+async def spool_upload(
+    file: UploadFile,
+    *,
+    max_bytes: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+) -> SpooledUpload:
+    """
+    Stream ``file`` to a temporary file chunk by chunk.
+
+    At most one chunk is held in memory at a time, and the content hash is
+    updated chunk by chunk as it is written. Raises ``UploadTooLargeError``
+    (and removes the partial file) once more than ``max_bytes`` have been
+    received.
+    """
+    limit = max_bytes if max_bytes is not None else int(os.getenv("UPLOAD_MAX_BYTES") or _MAX_UPLOAD_BYTES)
+    step = chunk_size or int(os.getenv("UPLOAD_CHUNK_BYTES") or _CHUNK_SIZE)
+    rss_before = peak_rss_bytes()
+    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=_detect_extension(file.filename))
+    spooled = SpooledUpload(path=Path(tmp.name), size=0, filename=file.filename)
+    digest = hashlib.sha256()
+    try:
+        with timed("upload_read"), tmp:
+            while True:
+                chunk = await file.read(step)
+                if not chunk:
+                    break
+                spooled.size += len(chunk)
+                if spooled.size > limit:
+                    raise UploadTooLargeError(
+                        f"Upload exceeds the {limit} byte limit."
+                    )
+                await run_in_threadpool(_write_and_hash, tmp, digest, chunk)
+    except BaseException:
+        spooled.cleanup()
+        raise
+    spooled.sha256 = digest.hexdigest()
+    rss_after = peak_rss_bytes()
+    print(
+        f"[upload] Spooled {spooled.size} bytes from {file.filename} to {spooled.path} "
+        f"(chunk={step} bytes, process peak RSS {rss_after / 1e6:.1f} MB, "
+        f"+{max(0, rss_after - rss_before) / 1e6:.1f} MB during upload)"
+    )
+    return spooled
+
+
+def _write_and_hash(handle: IO[bytes], digest: Any, chunk: bytes) -> None:
+    digest.update(chunk)
+    handle.write(chunk)
+
+
+def peak_rss_bytes() -> int:
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _detect_extension(filename: Optional[str]) -> str:
+    if not filename:
+        return ".wav"
+    base, ext = os.path.splitext(filename)
+    if ext:
+        return ext
+    return ".wav"
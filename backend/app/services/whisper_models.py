@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import importlib.util
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+def transcript_language() -> Optional[str]:
+    """
+    The language Whisper transcribes in (``TRANSCRIPT_LANGUAGE``, default
+    "en"); None lets Whisper detect it.
+    """
+    return os.getenv("TRANSCRIPT_LANGUAGE", "en").strip() or None
+
+
+def whisper_available() -> bool:
+    """
+    Whether faster-whisper is installed, without importing it.
+    """
+    return importlib.util.find_spec("faster_whisper") is not None
+
+
+def _default_replicas() -> int:
+    # Thread workers share this process's model, so give each one a replica;
+    # in process mode every worker process has its own registry.
+    if os.getenv("TRANSCRIPTION_EXECUTOR", "thread").strip().lower() == "process":
+        return 1
+    return int(os.getenv("TRANSCRIPTION_WORKERS") or 2)
+
+
+class WhisperModelRegistry:
+    """
+    Owns the Whisper models of this process, one per compute type.
+
+    Configured by ``WHISPER_MODEL`` (size or path), ``WHISPER_DEVICE``,
+    ``WHISPER_CPU_THREADS`` and ``WHISPER_REPLICAS`` (default: one per
+    transcription thread); the default compute type is
+    ``TRANSCRIPTION_COMPUTE_TYPE``. At most ``WHISPER_MAX_MODELS`` models stay
+    loaded; the least recently used one other than the default is dropped.
+    Replicas map to CTranslate2 ``num_workers``, so that many transcriptions
+    run truly in parallel on one loaded model. ``faster_whisper`` is only
+    imported when a model is loaded.
+    """
+
+    def __init__(
+        self,
+        *,
+        model_size: Optional[str] = None,
+        device: Optional[str] = None,
+        compute_type: Optional[str] = None,
+        cpu_threads: Optional[int] = None,
+        replicas: Optional[int] = None,
+        max_models: Optional[int] = None,
+    ) -> None:
+        threads_override = os.getenv("WHISPER_CPU_THREADS")
+        replicas_override = os.getenv("WHISPER_REPLICAS")
+        max_models_override = os.getenv("WHISPER_MAX_MODELS")
+        self._model_size = os.getenv("WHISPER_MODEL") or model_size or "small"
+        self._device = os.getenv("WHISPER_DEVICE") or device or "cpu"
+        self._compute_type = (
+            os.getenv("TRANSCRIPTION_COMPUTE_TYPE") or compute_type or "int8"
+        ).strip().lower()
+        self._cpu_threads = int(threads_override) if threads_override else (cpu_threads or 0)
+        self._replicas = max(1, int(replicas_override) if replicas_override else (replicas or _default_replicas()))
+        self._max_models = max(1, int(max_models_override) if max_models_override else (max_models or 2))
+        self._models: "OrderedDict[str, Any]" = OrderedDict()
+        self._load_seconds: Dict[str, float] = {}
+        self._warmup_seconds: Optional[float] = None
+        self._loading: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._error: Optional[str] = None
+
+    @property
+    def model_size(self) -> str:
+        return self._model_size
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def get(self, compute_type: Optional[str] = None) -> Any:
+        """
+        Return the model for ``compute_type``, loading it on first use.
+
+        Concurrent callers wait for a single load instead of each loading
+        their own copy.
+        """
+        compute_type = compute_type or self._compute_type
+        with self._lock:
+            model = self._models.get(compute_type)
+            if model is not None:
+                self._models.move_to_end(compute_type)
+                return model
+            load_lock = self._loading.setdefault(compute_type, threading.Lock())
+        with load_lock:
+            with self._lock:
+                model = self._models.get(compute_type)
+            if model is None:
+                model = self._load(compute_type)
+        return model
+
+    def preload(self, *, warm_up: bool = True) -> None:
+        """
+        Load the default model and run a short dummy clip through it so the
+        first real request doesn't pay for loading or first-call setup.
+        """
+        if not whisper_available():
+            self._error = "faster-whisper not installed"
+            print("[whisper] faster-whisper not installed; skipping preload")
+            return
+        try:
+            model = self.get()
+            if warm_up:
+                self._warm_up(model)
+        except Exception as exc:
+            self._error = f"{type(exc).__name__}: {exc}"
+            print(f"[whisper] Preload failed: {self._error}")
+            return
+        self._ready.set()
+
+    def status(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "available": whisper_available(),
+                "ready": self.ready,
+                "model": self._model_size,
+                "device": self._device,
+                "computeType": self._compute_type,
+                "cpuThreads": self._cpu_threads,
+                "replicas": self._replicas,
+                "loadedComputeTypes": list(self._models),
+                "loadSeconds": dict(self._load_seconds),
+                "warmupSeconds": self._warmup_seconds,
+                "error": self._error,
+            }
+
+    # --- Internals ------------------------------------------------------- #
+
+    def _load(self, compute_type: str) -> Any:
+        from faster_whisper import WhisperModel  # type: ignore
+
+        print(
+            f"[whisper] Loading {self._model_size} on {self._device} ({compute_type}, "
+            f"cpu_threads={self._cpu_threads}, replicas={self._replicas})..."
+        )
+        started = time.perf_counter()
+        model = WhisperModel(
+            self._model_size,
+            device=self._device,
+            compute_type=compute_type,
+            cpu_threads=self._cpu_threads,
+            num_workers=self._replicas,
+        )
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._models[compute_type] = model
+            self._load_seconds[compute_type] = round(elapsed, 3)
+            for loaded in list(self._models):
+                if len(self._models) <= self._max_models:
+                    break
+                if loaded not in (compute_type, self._compute_type):
+                    # Jobs already holding the model keep it alive until they finish.
+                    del self._models[loaded]
+                    print(f"[whisper] Unloaded {self._model_size} ({loaded}) to stay within {self._max_models} models")
+        print(f"[whisper] Loaded {self._model_size} ({compute_type}) in {elapsed:.1f}s")
+        return model
+
+    def _warm_up(self, model: Any) -> None:
+        import numpy as np  # type: ignore  # installed with faster-whisper
+
+        started = time.perf_counter()
+        # One second of quiet noise exercises the encoder and the decoder.
+        clip = (np.random.default_rng(0).standard_normal(16000) * 0.01).astype(np.float32)
+        segments, _ = model.transcribe(clip, language=transcript_language(), beam_size=1, vad_filter=False)
+        for _ in segments:
+            pass
+        self._warmup_seconds = round(time.perf_counter() - started, 3)
+        print(f"[whisper] Warm-up finished in {self._warmup_seconds:.2f}s")
+
+
+_REGISTRY: Optional[WhisperModelRegistry] = None
+_REGISTRY_LOCK = threading.Lock()
+
+
+def get_model_registry() -> WhisperModelRegistry:
+    global _REGISTRY
+    with _REGISTRY_LOCK:
+        if _REGISTRY is None:
+            _REGISTRY = WhisperModelRegistry()
+        return _REGISTRY
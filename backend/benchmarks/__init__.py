@@ -0,0 +1,12 @@
+"""
+Offline benchmarks for the planning backend. Run modules from ``backend/``,
+e.g. ``python -m benchmarks.transport``.
+"""
+
+import logging
+import os
+
+# ``app`` builds its OpenRouter client at import time; benchmarks never reach
+# the real API, so a placeholder key is enough.
+os.environ.setdefault("OPENROUTER_API_KEY", "benchmark-placeholder")
+logging.getLogger("httpx").setLevel(logging.WARNING)
@@ -0,0 +1,220 @@
+"""
+Concurrent /plan and /analyze load against ``create_app()`` with local
+OpenRouter and GitHub stand-ins.
+
+Run from ``backend/``::
+
+    python -m benchmarks.load --requests 200 --concurrency 16 --latency 0.05
+
+Everything runs offline: the app is driven in-process through httpx's ASGI
+transport, and OpenRouter and GitHub are stub servers on localhost with
+configurable latency, error and malformed-JSON rates. A ``/plan`` request is
+timed from submission until polling sees ``ready`` or ``failed``. An
+``/analyze`` request is timed until it returns the finished plan. A request
+still unfinished after ``--timeout`` seconds is counted as ``timeout``. Without
+faster-whisper installed, ``/analyze`` measures upload handling and planning
+only. With it installed, the model must already be in the local Hugging Face
+cache (``HF_HUB_OFFLINE`` is set).
+
+Configuration read at import time (``OPENROUTER_MAX_CONCURRENCY``,
+``PLANNING_WORKERS``, ...) can be exported as usual to compare settings.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import math
+import os
+import random
+import tempfile
+import time
+import wave
+from collections import Counter
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from .stubs import StubServer, github_handler, openrouter_handler
+
+_TERMINAL = {"ready", "failed"}
+_TRANSCRIPT = (
+    "Alice will fix the login timeout by Friday. Bob owns the payment webhook retries. "
+    "We agreed to add rate limiting to the search endpoint and to write a migration guide. "
+) * 8
+
+
+def _context(meeting_id: str) -> dict[str, Any]:
+    return {
+        "meetingId": meeting_id,
+        "project": {"name": "Benchmark", "repositoryUrl": "https://github.com/example/benchmark"},
+        "participants": [{"name": "Alice", "role": "Backend"}, {"name": "Bob", "role": "Payments"}],
+        "transcript": _TRANSCRIPT,
+        "issues": [],
+    }
+
+
+def _silent_wav(seconds: float = 1.0, sample_rate: int = 16000) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as handle:
+        handle.setnchannels(1)
+        handle.setsampwidth(2)
+        handle.setframerate(sample_rate)
+        handle.writeframes(b"\x00\x00" * int(seconds * sample_rate))
+    return buffer.getvalue()
+
+
+def _configure_environment(openrouter_url: str, github_url: str, scratch: Path, *, stream: bool) -> None:
+    # Must run before ``app`` is imported: its singletons read these on import.
+    os.environ["OPENROUTER_BASE_URL"] = openrouter_url
+    os.environ["GITHUB_API_URL"] = github_url
+    os.environ.setdefault("GITHUB_TOKEN", "benchmark-placeholder")
+    os.environ["PLANNING_STREAM"] = "true" if stream else "false"
+    os.environ["PLANS_OUTPUT_DIR"] = str(scratch / "plans")
+    os.environ["LLM_CACHE_DIR"] = str(scratch / "llm-cache")
+    os.environ["TRANSCRIPT_CACHE_DIR"] = str(scratch / "transcripts")
+    os.environ.setdefault("PLANNING_REPOSITORY", "memory")
+    # Identical prompts would otherwise be served from cache after the first run.
+    os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+    os.environ.setdefault("TRANSCRIPT_CACHE_ENABLED", "false")
+    os.environ.setdefault("GITHUB_CACHE_TTL", "0")
+    os.environ.setdefault("HF_HUB_OFFLINE", "1")
+
+
+async def _run_plan(client: httpx.AsyncClient, meeting_id: str, poll_interval: float) -> str:
+    response = await client.post(f"/api/v1/meetings/{meeting_id}/plan", json=_context(meeting_id))
+    if response.status_code != 202:
+        return f"http_{response.status_code}"
+    while True:
+        await asyncio.sleep(poll_interval)
+        response = await client.get(f"/api/v1/meetings/{meeting_id}/plan")
+        plan_status = response.json().get("status")
+        if plan_status in _TERMINAL:
+            return plan_status
+
+
+async def _run_analyze(client: httpx.AsyncClient, meeting_id: str, audio: bytes) -> str:
+    context = _context(meeting_id)
+    context["transcript"] = ""
+    response = await client.post(
+        "/api/v1/meetings/analyze",
+        data={"context": json.dumps(context)},
+        files={"meeting_audio": ("meeting.wav", audio, "audio/wav")},
+    )
+    if response.status_code != 200:
+        return f"http_{response.status_code}"
+    return response.json().get("status", "unknown")
+
+
+async def _drive(args: argparse.Namespace, audio: bytes) -> tuple[dict[str, list[float]], dict[str, Counter[str]], float]:
+    from app.main import create_app
+
+    if not args.verbose:
+        logging.getLogger("nova.app").setLevel(logging.WARNING)
+    kinds = ["analyze"] * round(args.requests * args.analyze_ratio)
+    kinds += ["plan"] * (args.requests - len(kinds))
+    random.Random(args.seed).shuffle(kinds)
+
+    latencies: dict[str, list[float]] = {"plan": [], "analyze": []}
+    outcomes: dict[str, Counter[str]] = {"plan": Counter(), "analyze": Counter()}
+    semaphore = asyncio.Semaphore(args.concurrency)
+    transport = httpx.ASGITransport(app=create_app())
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+
+        async def one(index: int, kind: str) -> None:
+            async with semaphore:
+                meeting_id = f"bench-{kind}-{index}"
+                started = time.perf_counter()
+                if kind == "plan":
+                    request = _run_plan(client, meeting_id, args.poll_interval)
+                else:
+                    request = _run_analyze(client, meeting_id, audio)
+                try:
+                    outcome = await asyncio.wait_for(request, args.timeout)
+                except asyncio.TimeoutError:
+                    outcome = "timeout"
+                except Exception as exc:  # keep going; the report shows what broke
+                    outcome = type(exc).__name__
+                latencies[kind].append(time.perf_counter() - started)
+                outcomes[kind][outcome] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(index, kind) for index, kind in enumerate(kinds)))
+        elapsed = time.perf_counter() - started
+    return latencies, outcomes, elapsed
+
+
+def _percentile(ordered: list[float], q: float) -> float:
+    # Nearest-rank percentile.
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def _report(latencies: dict[str, list[float]], outcomes: dict[str, Counter[str]], elapsed: float) -> None:
+    from app.services.metrics import PLAN_PARSE
+    from app.services.uploads import peak_rss_bytes
+
+    total = sum(len(samples) for samples in latencies.values())
+    print(f"{total} requests in {elapsed:.2f}s ({total / elapsed:.1f} req/s)")
+    print(f"{'endpoint':<9} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}  outcomes")
+    for kind, samples in latencies.items():
+        if not samples:
+            continue
+        ordered = sorted(samples)
+        row = [_percentile(ordered, q) * 1000 for q in (0.5, 0.95, 0.99)] + [ordered[-1] * 1000]
+        results = ", ".join(f"{name}={count}" for name, count in sorted(outcomes[kind].items()))
+        print(f"{kind:<9} {len(samples):>6} " + " ".join(f"{value:>9.1f}" for value in row) + f"  {results}")
+    parse_paths = ("direct", "local_repair", "llm_repair", "failed")
+    print("plan parse: " + ", ".join(f"{path}={int(PLAN_PARSE.value(path=path))}" for path in parse_paths))
+    print(f"peak RSS: {peak_rss_bytes() / 1e6:.1f} MB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16, help="requests in flight at once")
+    parser.add_argument("--analyze-ratio", type=float, default=0.2, help="share of requests sent to /analyze")
+    parser.add_argument("--latency", type=float, default=0.05, help="OpenRouter stub latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of OpenRouter calls answered with 503")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="share of plans returned as broken JSON")
+    parser.add_argument("--stream-delay", type=float, default=0.0, help="seconds between streamed chunks")
+    parser.add_argument("--no-stream", action="store_true", help="plan with plain completions (PLANNING_STREAM=false)")
+    parser.add_argument("--github-latency", type=float, default=0.02)
+    parser.add_argument("--audio", type=Path, help="audio file for /analyze (default: 1s of silence)")
+    parser.add_argument("--poll-interval", type=float, default=0.01, help="seconds between /plan status polls")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds before a request counts as timed out")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true", help="keep the app's per-request output")
+    args = parser.parse_args()
+
+    audio = args.audio.read_bytes() if args.audio else _silent_wav()
+    openrouter = openrouter_handler(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        malformed_rate=args.malformed_rate,
+        stream_delay=args.stream_delay,
+        seed=args.seed,
+    )
+    with tempfile.TemporaryDirectory(prefix="nova-bench-") as scratch, StubServer(openrouter) as llm, StubServer(
+        github_handler(latency=args.github_latency)
+    ) as github:
+        _configure_environment(llm.base_url, github.base_url, Path(scratch), stream=not args.no_stream)
+        print(
+            f"requests={args.requests} concurrency={args.concurrency} analyze_ratio={args.analyze_ratio} "
+            f"latency={args.latency}s error_rate={args.error_rate} malformed_rate={args.malformed_rate} "
+            f"stream={not args.no_stream}"
+        )
+        # The pipeline prints every LLM response; keep the report readable.
+        quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+        with quiet:
+            latencies, outcomes, elapsed = asyncio.run(_drive(args, audio))
+        _report(latencies, outcomes, elapsed)
+
+
+if __name__ == "__main__":
+    main()
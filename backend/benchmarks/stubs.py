@@ -0,0 +1,170 @@
+"""
+Local stand-ins for external services used by the benchmarks.
+
+Everything here binds to 127.0.0.1 on an ephemeral port and runs in a daemon
+thread, so benchmarks stay fully offline.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from typing import Any, Optional
+from urllib.parse import parse_qs, urlparse
+
+STUB_PLAN: dict[str, Any] = {
+    "summary": "Stub plan produced by the local OpenRouter stand-in.",
+    "risks": ["Stub risk one", "Stub risk two", "Stub risk three"],
+    "milestones": [
+        {
+            "title": "Discovery",
+            "dueDate": None,
+            "tasks": [
+                {"title": "Audit code", "owner": None, "areas": [], "etaDays": 2, "notes": None, "dependsOn": []},
+                {"title": "Write spec", "owner": None, "areas": [], "etaDays": 1, "notes": None, "dependsOn": ["Audit code"]},
+            ],
+        }
+    ],
+}
+
+# A fenced payload with trailing commas: what models commonly return instead
+# of bare JSON, and what the plan parser has to repair.
+_MALFORMED_PLAN = "```json\n" + json.dumps(STUB_PLAN, indent=2).replace('"\n', '",\n').replace("]\n", "],\n") + "\n```"
+_STREAM_CHUNK_CHARS = 24
+
+
+class StubServer:
+    """
+    Run a ``BaseHTTPRequestHandler`` subclass on a background thread.
+    """
+
+    def __init__(self, handler: type[BaseHTTPRequestHandler]) -> None:
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self._server.daemon_threads = True
+        self._thread = Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "StubServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def openrouter_handler(
+    *,
+    latency: float = 0.0,
+    error_rate: float = 0.0,
+    malformed_rate: float = 0.0,
+    stream_delay: float = 0.0,
+    seed: Optional[int] = None,
+) -> type[BaseHTTPRequestHandler]:
+    """
+    Build a handler that answers ``/chat/completions`` with ``STUB_PLAN``.
+
+    ``error_rate`` of the requests get a 503, and ``malformed_rate`` of the
+    answers are fenced and carry trailing commas, as models tend to produce.
+    Requests with ``"stream": true`` are answered as server-sent events, one
+    chunk every ``stream_delay`` seconds.
+    """
+    rng = random.Random(seed)
+    rng_lock = Lock()
+
+    def roll(rate: float) -> bool:
+        with rng_lock:
+            return rng.random() < rate
+
+    class _OpenRouterHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args: Any) -> None:  # silence per-request logging
+            pass
+
+        def do_POST(self) -> None:  # noqa: N802 - http.server naming
+            length = int(self.headers.get("Content-Length", 0))
+            try:
+                request = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                request = {}
+            if latency:
+                time.sleep(latency)
+            if error_rate and roll(error_rate):
+                self._send_json(503, {"error": {"message": "stub: upstream overloaded", "code": 503}})
+                return
+            content = _MALFORMED_PLAN if malformed_rate and roll(malformed_rate) else json.dumps(STUB_PLAN)
+            if request.get("stream"):
+                self._stream(content)
+                return
+            self._send_json(200, {"choices": [{"message": {"role": "assistant", "content": content}}]})
+
+        def _send_json(self, status: int, payload: dict[str, Any]) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _stream(self, content: str) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for start in range(0, len(content), _STREAM_CHUNK_CHARS):
+                delta = {"choices": [{"delta": {"content": content[start : start + _STREAM_CHUNK_CHARS]}}]}
+                self._write_chunk(f"data: {json.dumps(delta)}\n\n")
+                if stream_delay:
+                    time.sleep(stream_delay)
+            self._write_chunk("data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+
+        def _write_chunk(self, text: str) -> None:
+            data = text.encode("utf-8")
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            self.wfile.flush()
+
+    return _OpenRouterHandler
+
+
+def github_handler(*, latency: float = 0.0, matches: int = 3) -> type[BaseHTTPRequestHandler]:
+    """
+    Build a handler that answers GitHub's ``/search/code`` with ``matches`` fake hits.
+    """
+
+    class _GitHubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args: Any) -> None:  # silence per-request logging
+            pass
+
+        def do_GET(self) -> None:  # noqa: N802 - http.server naming
+            if latency:
+                time.sleep(latency)
+            query = parse_qs(urlparse(self.path).query).get("q", [""])[0].split(" repo:")[0]
+            items = [
+                {
+                    "path": f"src/{query.replace(' ', '_') or 'module'}_{index}.py",
+                    "text_matches": [{"fragment": f"def {query.replace(' ', '_')}(): ..."}],
+                }
+                for index in range(matches)
+            ]
+            body = json.dumps({"total_count": len(items), "items": items}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("X-RateLimit-Remaining", "1000")
+            self.end_headers()
+            self.wfile.write(body)
+
+    return _GitHubHandler
@@ -0,0 +1,78 @@
+"""
+Real-time factor of the transcription stage for several decoding configurations.
+
+Run from ``backend/`` (requires ``pip install faster-whisper``)::
+
+    python -m benchmarks.transcription --audio ../project_recording.mp3
+
+RTF is wall-clock transcription time divided by the recording's duration, so
+lower is faster and 1.0 means "as long as the audio". Model loading is done
+once per compute type before timing. The ``raw`` row is the previous
+behaviour: the file handed straight to Whisper with ``beam_size=5``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+
+from app.services.audio_preprocessing import TranscriptionOptions
+from app.services.transcription import _get_whisper_model, transcribe_audio
+from app.services.whisper_models import transcript_language
+
+_DEFAULT_AUDIO = Path(__file__).resolve().parents[2] / "project_recording.mp3"
+
+_CONFIGS = [
+    ("beam5 novad int8", TranscriptionOptions(beam_size=5, vad=False, compute_type="int8")),
+    ("beam5 vad int8", TranscriptionOptions(beam_size=5, vad=True, compute_type="int8")),
+    ("beam1 vad int8", TranscriptionOptions(beam_size=1, vad=True, compute_type="int8")),
+    ("beam1 novad int8", TranscriptionOptions(beam_size=1, vad=False, compute_type="int8")),
+    ("beam1 vad float32", TranscriptionOptions(beam_size=1, vad=True, compute_type="float32")),
+]
+
+
+def _raw(audio: Path) -> tuple[float, float]:
+    model = _get_whisper_model("int8")
+    started = time.perf_counter()
+    segments, info = model.transcribe(str(audio), language=transcript_language(), beam_size=5, condition_on_previous_text=False)
+    for _ in segments:
+        pass
+    return time.perf_counter() - started, info.duration
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--audio", type=Path, default=_DEFAULT_AUDIO)
+    parser.add_argument("--repeat", type=int, default=1, help="runs per configuration (best is reported)")
+    parser.add_argument("--skip-raw", action="store_true", help="skip the unpreprocessed baseline")
+    args = parser.parse_args()
+
+    if _get_whisper_model() is None:
+        raise SystemExit("faster-whisper is not installed; pip install faster-whisper")
+    for compute_type in {options.compute_type for _, options in _CONFIGS}:
+        _get_whisper_model(compute_type)
+
+    print(f"audio: {args.audio}")
+    print(f"{'config':<20} {'audio s':>8} {'speech s':>9} {'wall s':>8} {'RTF':>6} {'chars':>7}")
+    if not args.skip_raw:
+        wall, duration = min(_raw(args.audio) for _ in range(args.repeat))
+        print(f"{'raw beam5 int8':<20} {duration:>8.1f} {duration:>9.1f} {wall:>8.2f} {wall / duration:>6.3f} {'-':>7}")
+    for name, options in _CONFIGS:
+        best = None
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            result = transcribe_audio(args.audio, options=options)
+            wall = time.perf_counter() - started
+            if best is None or wall < best[0]:
+                best = (wall, result)
+        wall, result = best
+        rtf = wall / result.duration if result.duration else 0.0
+        print(
+            f"{name:<20} {result.duration:>8.1f} {result.speechDuration:>9.1f} "
+            f"{wall:>8.2f} {rtf:>6.3f} {len(result.text):>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
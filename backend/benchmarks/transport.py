@@ -0,0 +1,96 @@
+"""
+Compare per-call ``httpx.Client`` construction against the pooled transport.
+
+Run from ``backend/``::
+
+    python -m benchmarks.transport --requests 200
+
+The stub is plain HTTP on localhost, so the gap shown here is only the TCP
+connect and client setup cost; against OpenRouter each fresh client also pays
+a TLS handshake, so the real-world saving is larger.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Callable
+
+import httpx
+
+from app.services.openrouter_client import OpenRouterClient
+
+from .stubs import StubServer, openrouter_handler
+
+_MESSAGES = [{"role": "user", "content": "ping"}]
+
+
+def _per_call(base_url: str) -> Callable[[], None]:
+    def run() -> None:
+        with httpx.Client(timeout=10.0) as client:
+            response = client.post(f"{base_url}/chat/completions", json={"messages": _MESSAGES})
+            response.raise_for_status()
+
+    return run
+
+
+def _pooled(client: OpenRouterClient) -> Callable[[], None]:
+    def run() -> None:
+        client.complete(_MESSAGES)
+
+    return run
+
+
+def _measure(fn: Callable[[], None], requests: int) -> list[float]:
+    fn()  # warm-up
+    samples = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+async def _measure_async(client: OpenRouterClient, requests: int, concurrency: int) -> float:
+    await client.acomplete(_MESSAGES)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one() -> None:
+        async with semaphore:
+            await client.acomplete(_MESSAGES)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return time.perf_counter() - started
+
+
+def _report(label: str, samples: list[float]) -> None:
+    ordered = sorted(samples)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(
+        f"{label:<18} mean={statistics.mean(samples):7.2f}ms "
+        f"p50={statistics.median(samples):7.2f}ms p95={p95:7.2f}ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    with StubServer(openrouter_handler()) as server:
+        client = OpenRouterClient(api_key="bench", base_url=server.base_url)
+        _report("per-call client", _measure(_per_call(server.base_url), args.requests))
+        _report("pooled client", _measure(_pooled(client), args.requests))
+        elapsed = asyncio.run(_measure_async(client, args.requests, args.concurrency))
+        print(
+            f"{'pooled async':<18} {args.requests} requests in {elapsed * 1000:.1f}ms "
+            f"(concurrency={args.concurrency}, {args.requests / elapsed:.0f} req/s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
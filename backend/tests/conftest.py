@@ -0,0 +1,10 @@
+from __future__ import annotations
+
+import os
+import sys
+from pathlib import Path
+
+# Importing ``app`` builds the FastAPI singletons, which need a key but never call out in tests.
+os.environ.setdefault("OPENROUTER_API_KEY", "test")
+os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from app.schemas import IssueReference, MeetingContext, Milestone, Participant, PlanningPlan, PlanUpdate, ProjectInfo
+from app.services.context_diff import apply_plan_update, context_hash, diff_contexts
+
+
+def _context(**changes) -> MeetingContext:
+    values = {
+        "meetingId": "m1",
+        "project": ProjectInfo(name="Nova"),
+        "participants": [Participant(name="Alice", role="backend"), Participant(name="Bob", role="frontend")],
+        "issues": [IssueReference(id="1", title="Login bug"), IssueReference(id="2", title="Slow search")],
+        "transcript": "Alice: ship the API.",
+    }
+    values.update(changes)
+    return MeetingContext(**values)
+
+
+def test_reordering_participants_and_issues_is_not_a_change():
+    base = _context()
+    reordered = _context(participants=list(reversed(base.participants)), issues=list(reversed(base.issues)))
+    assert not diff_contexts(base, reordered)
+    assert context_hash(base) == context_hash(reordered)
+    assert context_hash(base) != context_hash(_context(meetingId="m2"))
+
+
+def test_participant_and_issue_changes():
+    diff = diff_contexts(
+        _context(),
+        _context(
+            participants=[Participant(name="alice ", role="lead"), Participant(name="Carol", role="qa")],
+            issues=[IssueReference(id="1", title="Login bug"), IssueReference(id="3", title="Flaky tests")],
+        ),
+    )
+    assert diff.changed == ["participants", "issues"]
+    assert [p.name for p in diff.addedParticipants] == ["Carol"]
+    assert [p.name for p in diff.removedParticipants] == ["Bob"]
+    assert [(old.role, new.role) for old, new in diff.changedRoles] == [("backend", "lead")]
+    assert [i.id for i in diff.addedIssues] == ["3"] and [i.id for i in diff.removedIssues] == ["2"]
+    assert diff.incremental
+    assert "Participant left: Bob (frontend)" in diff.describe()
+
+
+def test_appended_transcript_yields_tail():
+    diff = diff_contexts(_context(), _context(transcript="Alice: ship the API.\nBob: and the docs."))
+    assert diff.changed == ["transcript"]
+    assert diff.transcriptTail == "Bob: and the docs."
+    assert diff.incremental
+    assert diff.describe() == "- No metadata changes."
+
+
+def test_rewritten_transcript_is_not_incremental():
+    diff = diff_contexts(_context(), _context(transcript="Alice: ship the CLI."))
+    assert diff.transcriptRewritten
+    assert not diff.incremental
+
+
+def test_apply_plan_update_replaces_appends_and_removes_by_title():
+    plan = PlanningPlan(
+        summary="Old",
+        risks=["r1"],
+        milestones=[Milestone(title="API"), Milestone(title="Docs"), Milestone(title="Launch")],
+    )
+    update = PlanUpdate(
+        milestones=[Milestone(title="docs", dueDate="2026-01-01"), Milestone(title="QA")],
+        removedMilestones=[" launch "],
+    )
+    merged = apply_plan_update(plan, update)
+    assert [m.title for m in merged.milestones] == ["API", "docs", "QA"]
+    assert merged.milestones[1].dueDate is not None
+    assert merged.summary == "Old" and merged.risks == ["r1"]
+
+    replaced = apply_plan_update(plan, PlanUpdate(summary="New", risks=["r2"]))
+    assert (replaced.summary, replaced.risks) == ("New", ["r2"])
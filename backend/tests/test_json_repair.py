@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from app.schemas import PlanningPlan
+from app.services.json_repair import repair_json_locally
+
+
+def test_fenced_response_with_prose_comments_and_trailing_commas():
+    payload = """Here is the plan:
+```json
+{
+  // overview
+  "summary": "Ship v2",
+  "risks": ["Auth", /* maybe */ "Quotas",],
+  "milestones": [],
+}
+```
+Let me know if you need anything else."""
+    plan = repair_json_locally(payload, PlanningPlan)
+    assert plan == PlanningPlan(summary="Ship v2", risks=["Auth", "Quotas"])
+
+
+def test_comment_markers_inside_strings_are_kept():
+    plan = repair_json_locally('{"summary": "see https://example.com // docs", "risks": []}', PlanningPlan)
+    assert plan is not None and plan.summary == "see https://example.com // docs"
+
+
+def test_smart_quotes():
+    plan = repair_json_locally("{“summary”: “Ship v2”, “risks”: []}", PlanningPlan)
+    assert plan is not None and plan.summary == "Ship v2"
+
+
+def test_truncated_output_is_closed():
+    plan = repair_json_locally(
+        '{"summary": "Ship v2", "milestones": [{"title": "M1", "tasks": [{"title": "T1", "owner": "Ali',
+        PlanningPlan,
+    )
+    assert plan is not None
+    assert plan.milestones[0].tasks[0].owner == "Ali"
+
+
+def test_type_mismatches_are_coerced():
+    payload = """{
+      "summary": "Ship v2",
+      "risks": "Only one risk",
+      "milestones": [
+        {"title": null, "dueDate": "next sprint", "tasks": [
+          {"title": "T1", "etaDays": "3 days", "areas": "api/", "owner": ["Alice", "Bob"]},
+          "not a task"
+        ]}
+      ]
+    }"""
+    plan = repair_json_locally(payload, PlanningPlan)
+    assert plan is not None
+    assert plan.risks == ["Only one risk"]
+    milestone = plan.milestones[0]
+    assert milestone.title == "Untitled" and milestone.dueDate is None
+    assert len(milestone.tasks) == 1
+    task = milestone.tasks[0]
+    assert (task.etaDays, task.areas, task.owner) == (3, ["api/"], "Alice, Bob")
+
+
+def test_unsalvageable_payload_returns_none():
+    assert repair_json_locally("I could not produce a plan.", PlanningPlan) is None
+    assert repair_json_locally("[1, 2]", PlanningPlan) is None
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Optional
+
+import pytest
+
+from app.schemas import MeetingContext, Participant, ProjectInfo
+from app.services.llm_cache import MemoryLRUCache
+from app.services.openrouter_pipeline import OpenRouterPlanningPipeline
+from app.services.stage_graph import StageGraphError
+
+_PLAN = json.dumps(
+    {
+        "summary": "Ship the API.",
+        "risks": ["Load is unknown"],
+        "milestones": [{"title": "Build", "tasks": [{"title": "Write the API", "owner": "Alice"}]}],
+    }
+)
+
+
+class _Client:
+    model = "test/model"
+
+    def __init__(self, *responses: str) -> None:
+        self.responses = list(responses)
+        self.calls = 0
+
+    def complete(self, messages: list[dict[str, str]], *, temperature: float, max_tokens: int, model: Optional[str] = None) -> str:
+        self.calls += 1
+        return self.responses.pop(0)
+
+
+class _StagedClient(_Client):
+    """Answers each staged prompt by its kind and counts the calls per kind."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.stages: list[str] = []
+
+    def complete(self, messages: list[dict[str, str]], *, temperature: float, max_tokens: int, model: Optional[str] = None) -> str:
+        self.calls += 1
+        prompt = messages[-1]["content"]
+        for stage, marker, response in (
+            ("milestones", "Organise the action items", _PLAN),
+            ("summary", "Summarise this", "We ship the API."),
+            ("risks", "List at least three", "Load is unknown\nDocs may lag\nAuth is untested"),
+            ("action_items", "List the action items", "- Write the API (Owner: Alice)"),
+        ):
+            if marker in prompt:
+                self.stages.append(stage)
+                return response
+        raise AssertionError(f"unexpected prompt: {prompt[:80]}")
+
+
+class _Searcher:
+    def gather_context(self, repository_url: Optional[str], action_items: str) -> str:
+        return "No repository signals."
+
+
+def _context() -> MeetingContext:
+    return MeetingContext(
+        meetingId="m1",
+        project=ProjectInfo(name="Nova"),
+        participants=[Participant(name="Alice", role="backend")],
+        transcript="Alice: I'll write the API this sprint.",
+    )
+
+
+def _pipeline(client: _Client, monkeypatch, mode: str = "combined") -> OpenRouterPlanningPipeline:
+    monkeypatch.setenv("PLANNING_MODE", mode)
+    return OpenRouterPlanningPipeline(client, searcher=_Searcher(), cache=MemoryLRUCache())  # type: ignore[arg-type]
+
+
+def test_malformed_completion_is_not_cached(monkeypatch):
+    # The plan and the LLM repair both come back unusable, so the request fails.
+    client = _Client("this is not a plan", "still not JSON", _PLAN)
+    pipeline = _pipeline(client, monkeypatch)
+    with pytest.raises(ValueError):
+        pipeline.generate_plan(_context())
+    assert client.calls == 2
+
+    plan = pipeline.generate_plan(_context())
+    assert client.calls == 3
+    assert plan.summary == "Ship the API."
+
+
+def test_valid_completion_is_cached(monkeypatch):
+    client = _Client(_PLAN)
+    pipeline = _pipeline(client, monkeypatch)
+    first = pipeline.generate_plan(_context())
+    second = pipeline.generate_plan(_context())
+    assert client.calls == 1
+    assert first == second
+
+
+def test_checkpoint_runs_before_each_llm_call(monkeypatch):
+    monkeypatch.setenv("PLANNING_STREAM", "false")
+    client = _Client(_PLAN)
+    pipeline = _pipeline(client, monkeypatch)
+
+    def checkpoint() -> None:
+        raise RuntimeError("superseded")
+
+    with pytest.raises(RuntimeError, match="superseded"):
+        pipeline.generate_plan(_context(), checkpoint=checkpoint)
+    assert client.calls == 0
+
+
+def test_rerun_stages_recomputes_only_the_named_stages(monkeypatch):
+    client = _StagedClient()
+    pipeline = _pipeline(client, monkeypatch, mode="staged")
+    pipeline.generate_plan(_context())
+    assert sorted(client.stages) == ["action_items", "milestones", "risks", "summary"]
+
+    client.stages.clear()
+    pipeline.generate_plan(_context())
+    assert client.stages == []
+
+    plan = pipeline.generate_plan(_context(), rerun_stages={"risks"})
+    assert client.stages == ["risks"]
+    assert plan.risks == ["Load is unknown", "Docs may lag", "Auth is untested"]
+
+
+def test_rerun_of_unknown_stage_is_rejected(monkeypatch):
+    pipeline = _pipeline(_StagedClient(), monkeypatch, mode="staged")
+    with pytest.raises(StageGraphError, match="plan"):
+        pipeline.generate_plan(_context(), rerun_stages={"plan"})
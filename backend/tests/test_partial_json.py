@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from app.services.partial_json import PartialJSONParser
+
+PLAN = json.dumps(
+    {
+        "summary": "Ship the \"v2\" API\nthen the docs — café \U0001F680",
+        "risks": ["Auth migration", "", "Rate limits \\ quotas"],
+        "milestones": [
+            {
+                "title": "M1",
+                "dueDate": None,
+                "tasks": [
+                    {"title": "T1", "owner": "Alice", "etaDays": 3, "areas": ["api/"], "dependsOn": []},
+                    {"title": "T2", "owner": None, "etaDays": -1.5e2, "done": True, "dependsOn": ["T1"]},
+                ],
+            },
+            {"title": "M2", "tasks": []},
+        ],
+    },
+    indent=2,
+)
+
+
+def _reference(text: str):
+    # What the snapshot of a prefix should be: the prefix with everything closed.
+    parser = PartialJSONParser()
+    parser.feed(text)
+    completed = parser.completion()
+    return None if completed is None else json.loads(completed)
+
+
+@pytest.mark.parametrize("document", [PLAN, PLAN.replace("\n", "").replace("  ", ""), json.dumps(json.loads(PLAN))])
+def test_snapshot_matches_closed_prefix_at_every_step(document):
+    parser = PartialJSONParser()
+    for index, char in enumerate(document):
+        parser.feed(char)
+        assert parser.snapshot() == _reference(document[: index + 1]), document[: index + 1]
+    assert parser.done
+    assert parser.snapshot() == json.loads(document)
+
+
+def test_truncated_document_closes_open_constructs():
+    parser = PartialJSONParser()
+    parser.feed('```json\n{"summary": "Ship the", "risks": ["a')
+    assert parser.snapshot() == {"summary": "Ship the", "risks": ["a"]}
+
+
+def test_half_received_key_is_dropped_and_dangling_key_is_null():
+    parser = PartialJSONParser()
+    parser.feed('{"summary": "x", "ri')
+    assert parser.snapshot() == {"summary": "x"}
+    parser.feed('sks":')
+    assert parser.snapshot() == {"summary": "x", "risks": None}
+
+
+def test_partial_escapes_are_not_emitted():
+    parser = PartialJSONParser()
+    parser.feed('{"summary": "a\\')
+    assert parser.snapshot() == {"summary": "a"}
+    parser.feed("u00")
+    assert parser.snapshot() == {"summary": "a"}
+    parser.feed('e9"')
+    assert parser.snapshot() == {"summary": "aé"}
+
+
+def test_earlier_snapshots_are_not_changed_by_later_deltas():
+    parser = PartialJSONParser()
+    parser.feed('{"risks": ["a"')
+    first = parser.snapshot()
+    parser.feed(', "b"], "summary": "s"}')
+    assert first == {"risks": ["a"]}
+    assert parser.snapshot() == {"risks": ["a", "b"], "summary": "s"}
+
+
+def test_text_after_the_root_object_is_ignored():
+    parser = PartialJSONParser()
+    parser.feed('{"a": 1}\n```\n{"b": 2}')
+    assert parser.done
+    assert parser.snapshot() == {"a": 1}
+    assert parser.text == '{"a": 1}'
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Any, Callable, Optional
+
+import pytest
+
+from app.repository import PlanningRepository
+from app.schemas import MeetingContext, Milestone, Participant, PlanStatus, PlanningPlan, ProjectInfo
+from app.services.jobs import PlanningJobQueue
+from app.services.persistence import PlanPersister
+from app.services.plan_events import PlanEventBroker
+from app.services.profiling import _SAMPLER, ProfileStore, start_profile
+from app.services.response_cache import SerializedPlanCache
+from app.services.planning import PlanningService
+from app.services.single_flight import PlanFlights
+
+
+class _Pipeline:
+    last_prompt: Optional[str] = None
+
+    def __init__(self) -> None:
+        self.release = threading.Event()
+        self.release.set()
+        self.calls = 0
+        self.completed: list[str] = []
+
+    def generate_plan(
+        self,
+        context: MeetingContext,
+        on_partial: Optional[Callable[[dict[str, Any]], None]] = None,
+        checkpoint: Optional[Callable[[], None]] = None,
+    ):
+        self.calls += 1
+        self.release.wait(5)
+        if checkpoint:
+            checkpoint()
+        self.completed.append(context.transcript)
+        return PlanningPlan(summary=context.transcript, milestones=[Milestone(title="M1")])
+
+    def update_plan(self, plan: PlanningPlan, diff: Any, context: MeetingContext, on_partial: Any = None, checkpoint: Any = None):
+        return self.generate_plan(context, on_partial, checkpoint)
+
+
+def _context(transcript: str = "Alice: ship the API") -> MeetingContext:
+    return MeetingContext(
+        meetingId="m1",
+        project=ProjectInfo(name="Nova"),
+        participants=[Participant(name="Alice", role="backend")],
+        transcript=transcript,
+    )
+
+
+def _active_profiles() -> list:
+    with _SAMPLER._lock:
+        return list(_SAMPLER._profiles)
+
+
+@pytest.fixture
+def pipeline() -> _Pipeline:
+    return _Pipeline()
+
+
+@pytest.fixture
+def service(tmp_path, pipeline, monkeypatch) -> PlanningService:
+    monkeypatch.delenv("PLANNING_CONFLICT", raising=False)
+    return _service(tmp_path, pipeline)
+
+
+def _service(tmp_path, pipeline: _Pipeline) -> PlanningService:
+    return PlanningService(
+        repository=PlanningRepository(),
+        pipeline=pipeline,  # type: ignore[arg-type]
+        jobs=PlanningJobQueue(max_workers=2, max_pending=4),
+        persister=PlanPersister(tmp_path, delay=0),
+        responses=SerializedPlanCache(),
+        events=PlanEventBroker(),
+        profiles=ProfileStore(),
+        flights=PlanFlights(),
+    )
+
+
+def test_unchanged_resubmit_finishes_its_profile(service, pipeline):
+    first = asyncio.run(service.submit_plan_and_wait(_context()))
+
+    profile = start_profile("plan")
+    response = service.submit_plan(_context(), profile=profile)
+
+    assert response.status is PlanStatus.ready
+    assert pipeline.calls == 1
+    assert profile.finished
+    assert profile not in _active_profiles()
+    assert service.get_profile(first.agentJobId) is profile
+
+
+def test_attached_submission_finishes_its_profile(service, pipeline):
+    pipeline.release.clear()
+    first = service.submit_plan(_context())
+
+    profile = start_profile("plan")
+    attached = service.submit_plan(_context(), profile=profile)
+    pipeline.release.set()
+
+    assert attached.agentJobId == first.agentJobId
+    assert profile.finished
+    assert profile not in _active_profiles()
+    assert service.get_profile(first.agentJobId) is profile
+
+
+def test_replaced_waiting_submission_finishes_its_profile(tmp_path, pipeline, monkeypatch):
+    monkeypatch.setenv("PLANNING_CONFLICT", "queue")
+    service = _service(tmp_path, pipeline)
+    pipeline.release.clear()
+    service.submit_plan(_context())
+
+    replaced, latest = start_profile("plan"), start_profile("plan")
+    service.submit_plan(_context("Alice: ship the API\nBob: and the docs"), profile=replaced)
+    _, future = service._enqueue(_context("Alice: ship the API\nBob: and the CLI"), profile=latest)
+    assert replaced.finished
+    assert replaced not in _active_profiles()
+
+    pipeline.release.set()
+    assert future.result(5).plan.summary.endswith("the CLI")
+    assert latest.finished
+    assert _active_profiles() == []
+
+
+def test_superseded_job_stops_without_streaming(service, pipeline, monkeypatch):
+    monkeypatch.setenv("PLANNING_STREAM", "false")
+    pipeline.release.clear()
+    _, first = service._enqueue(_context())
+    _, latest = service._enqueue(_context("Alice: ship the API\nBob: and the docs"))
+    pipeline.release.set()
+
+    assert latest.result(5).plan.summary.endswith("the docs")
+    first.result(5)
+    assert pipeline.completed == ["Alice: ship the API\nBob: and the docs"]
+
+
+def test_unknown_conflict_mode_is_rejected(tmp_path, pipeline, monkeypatch):
+    monkeypatch.setenv("PLANNING_CONFLICT", "merge")
+    with pytest.raises(ValueError, match="PLANNING_CONFLICT"):
+        _service(tmp_path, pipeline)
+
+
+def test_cancelled_waiter_leaves_the_shared_result_alone(service, pipeline):
+    pipeline.release.clear()
+
+    async def cancel_first_waiter() -> None:
+        waiter = asyncio.ensure_future(service.submit_plan_and_wait(_context()))
+        await asyncio.sleep(0.05)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+    asyncio.run(cancel_first_waiter())
+    _, attached = service._enqueue(_context())
+    pipeline.release.set()
+    assert attached.result(5).status is PlanStatus.ready
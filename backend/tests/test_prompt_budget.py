@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import pytest
+
+from app.services import prompt_budget
+from app.services.prompt_budget import PromptSection, compress_transcript, count_tokens, dedupe_lines, fit_sections
+
+
+@pytest.fixture(autouse=True)
+def estimated_tokens(monkeypatch):
+    # Deterministic counts whether or not tiktoken is installed.
+    monkeypatch.setattr(prompt_budget, "tiktoken", None)
+    prompt_budget._encoding.cache_clear()
+    yield
+    prompt_budget._encoding.cache_clear()
+
+
+def test_estimate_splits_long_words_and_punctuation():
+    assert count_tokens("") == 0
+    assert count_tokens("Ship it.") == 3
+    assert count_tokens("internationalization") == 5
+
+
+def test_compress_transcript_drops_filler_and_merges_speakers():
+    transcript = "\n".join(
+        [
+            "Alice: Um, so we need, you know, a cache layer.",
+            "Alice: What kind of cache?",
+            "Bob: Okay.",
+            "Bob: I mean the API needs it.",
+            "Bob: I mean the API needs it.",
+        ]
+    )
+    assert compress_transcript(transcript) == (
+        "Alice: so we need, a cache layer. What kind of cache?\nBob: I mean the API needs it."
+    )
+
+
+def test_compress_transcript_keeps_lines_repeated_later():
+    transcript = "\n".join(
+        [
+            "Alice: Let's ship on Friday.",
+            "Bob: The migration isn't ready.",
+            "Carol: I can pair on it.",
+            "Alice: Let's ship on Friday.",
+        ]
+    )
+    assert compress_transcript(transcript) == transcript
+
+
+def test_dedupe_lines_ignores_case_punctuation_or_uses_key():
+    assert dedupe_lines("Fix login\nfix  LOGIN!\nAdd search") == "Fix login\nAdd search"
+    text = "- `auth` → `src/auth.py`\n- `login` → `src/auth.py`"
+    assert dedupe_lines(text, key=lambda line: line.split("→")[-1]) == "- `auth` → `src/auth.py`"
+
+
+def test_sections_within_budget_are_untouched():
+    sections = [PromptSection("a", "one two"), PromptSection("b", "three")]
+    assert fit_sections(sections, 100) == {"a": "one two", "b": "three"}
+
+
+def test_small_sections_pass_their_share_on():
+    short = PromptSection("participants", "Alice (backend)")
+    long = PromptSection("transcript", "\n".join(f"Line {index} of the meeting." for index in range(200)), weight=4.0)
+    fitted = fit_sections([short, long], 300)
+
+    assert fitted["participants"] == short.text
+    assert count_tokens(fitted["transcript"]) <= 300 - count_tokens(short.text)
+    assert fitted["transcript"].startswith("Line 0 of the meeting.")
+    assert "tokens omitted" in fitted["transcript"]
+
+
+def test_keep_tail_keeps_the_end_of_the_transcript():
+    text = " ".join(f"Sentence {index} here." for index in range(200))
+    fitted = fit_sections([PromptSection("transcript", text, keep_tail=True)], 120)["transcript"]
+
+    assert fitted.startswith("Sentence 0 here.")
+    assert fitted.endswith("Sentence 199 here.")
+    assert count_tokens(fitted) <= 120
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from app.repository import SQLitePlanningRepository
+from app.schemas import MeetingContext, Participant, PlanStatus, PlanningPlan, ProjectInfo
+
+
+def _context(meeting_id: str) -> MeetingContext:
+    return MeetingContext(
+        meetingId=meeting_id,
+        project=ProjectInfo(name="Nova"),
+        participants=[Participant(name="Alice", role="backend")],
+        transcript="Alice: ship it",
+    )
+
+
+def test_pending_plans_fail_on_restart(tmp_path):
+    path = tmp_path / "plans.sqlite3"
+    repository = SQLitePlanningRepository(path)
+    repository.upsert_context(_context("queued"), agent_job_id="job-1")
+    repository.upsert_context(_context("processing"), agent_job_id="job-2")
+    repository.mark_processing("processing", "job-2")
+    repository.upsert_context(_context("ready"), agent_job_id="job-3")
+    repository.set_plan_result("ready", PlanningPlan(summary="done"), agent_job_id="job-3")
+    versions = {meeting_id: repository.version(meeting_id) for meeting_id in ("queued", "processing", "ready")}
+
+    reopened = SQLitePlanningRepository(path)
+    for meeting_id in ("queued", "processing"):
+        record = reopened.get(meeting_id)
+        assert record.status == PlanStatus.failed
+        assert record.error == "interrupted by restart"
+        assert reopened.version(meeting_id) == versions[meeting_id] + 1
+    ready = reopened.get("ready")
+    assert ready.status == PlanStatus.ready
+    assert ready.plan.summary == "done"
+    assert reopened.version("ready") == versions["ready"]
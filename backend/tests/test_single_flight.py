@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from concurrent.futures import Future
+
+import pytest
+
+from app.schemas import MeetingContext, Participant, PlanningRecord, ProjectInfo
+from app.services.single_flight import Flight, PlanFlights, chain
+
+
+def _flight(job_id: str, fingerprint: str = "a") -> Flight:
+    context = MeetingContext(
+        meetingId="m1",
+        project=ProjectInfo(name="Nova"),
+        participants=[Participant(name="Alice", role="backend")],
+        transcript="",
+    )
+    return Flight(fingerprint, job_id, PlanningRecord(meetingId="m1", context=context, agentJobId=job_id), Future())
+
+
+def test_find_matches_running_or_waiting_fingerprint():
+    flights = PlanFlights()
+    running, waiting = _flight("j1", "a"), _flight("j2", "b")
+    flights.add_running("m1", running)
+    flights.add_waiting("m1", waiting)
+
+    assert flights.find("m1", "a") is running
+    assert flights.find("m1", "b") is waiting
+    assert flights.find("m1", "c") is None
+    assert flights.find("m2", "a") is None
+
+
+def test_add_running_supersedes_previous_job():
+    flights = PlanFlights()
+    old, new = _flight("j1"), _flight("j2", "b")
+    flights.add_running("m1", old)
+
+    assert flights.add_running("m1", new) is old
+    assert old.superseded_by is new
+    assert flights.is_superseded("j1")
+    assert not flights.is_superseded("j2")
+
+
+def test_finish_hands_over_waiting_flight_once_idle():
+    flights = PlanFlights()
+    old, new, waiting = _flight("j1"), _flight("j2", "b"), _flight("j3", "c")
+    flights.add_running("m1", old)
+    flights.add_running("m1", new)
+    flights.add_waiting("m1", waiting)
+
+    # The superseded job ends while its successor still runs.
+    assert flights.finish("m1", old) is None
+    assert not flights.is_superseded("j1")
+    assert flights.running("m1") is new
+
+    assert flights.finish("m1", new) is waiting
+    assert flights.running("m1") is None
+    assert flights.waiting("m1") is None
+
+
+def test_add_waiting_replaces_older_waiting_flight():
+    flights = PlanFlights()
+    first, second = _flight("j1"), _flight("j2", "b")
+    assert flights.add_waiting("m1", first) is None
+    assert flights.add_waiting("m1", second) is first
+    assert first.superseded_by is second
+    assert flights.waiting("m1") is second
+
+
+def test_chain_copies_result_and_exception():
+    source, target = Future(), Future()
+    chain(source, target)
+    source.set_result("plan")
+    assert target.result() == "plan"
+
+    source, target = Future(), Future()
+    chain(source, target)
+    source.set_exception(RuntimeError("boom"))
+    with pytest.raises(RuntimeError):
+        target.result()
+
+
+def test_chain_leaves_completed_target_alone():
+    source, target = Future(), Future()
+    target.set_result("first")
+    chain(source, target)
+    source.set_result("second")
+    assert target.result() == "first"
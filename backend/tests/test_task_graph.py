@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from app.schemas import Milestone, PlanningPlan, TaskAssignment
+from app.services.task_graph import build_task_graph
+
+
+def _plan(*milestones: list[TaskAssignment]) -> PlanningPlan:
+    return PlanningPlan(
+        milestones=[Milestone(title=f"M{index}", tasks=tasks) for index, tasks in enumerate(milestones, start=1)]
+    )
+
+
+def test_schedule_slack_and_critical_path():
+    graph = build_task_graph(
+        _plan(
+            [
+                TaskAssignment(title="Design API", etaDays=2),
+                TaskAssignment(title="Write docs", etaDays=1, dependsOn=["Design API"]),
+            ],
+            [TaskAssignment(title="Build API", etaDays=3, dependsOn=["design api"])],
+        )
+    )
+    nodes = {node.id: node for node in graph.nodes}
+
+    assert graph.order.index("1.1") < graph.order.index("1.2")
+    assert graph.order.index("1.1") < graph.order.index("2.1")
+    assert graph.durationDays == 5
+    assert graph.criticalPath == ["1.1", "2.1"]
+    assert nodes["2.1"].earliestStart == 2 and nodes["2.1"].dependsOn == ["1.1"]
+    assert sorted(nodes["1.1"].dependents) == ["1.2", "2.1"]
+    assert nodes["1.2"].slack == 2 and not nodes["1.2"].critical
+
+
+def test_fuzzy_and_word_subset_references_resolve():
+    graph = build_task_graph(
+        _plan(
+            [
+                TaskAssignment(title="Set up CI pipeline"),
+                TaskAssignment(title="Migrate auth service to OAuth"),
+                TaskAssignment(title="Release", dependsOn=["Setup CI pipeline", "auth OAuth", "Nonexistent task"]),
+            ]
+        )
+    )
+    release = next(node for node in graph.nodes if node.id == "1.3")
+    assert release.dependsOn == ["1.1", "1.2"]
+    assert [(item.taskId, item.reference) for item in graph.unresolved] == [("1.3", "Nonexistent task")]
+
+
+def test_self_reference_is_unresolved():
+    graph = build_task_graph(_plan([TaskAssignment(title="Loop", dependsOn=["Loop"])]))
+    assert graph.nodes[0].dependsOn == []
+    assert graph.unresolved[0].reference == "Loop"
+
+
+def test_cycles_are_broken_and_reported():
+    graph = build_task_graph(
+        _plan(
+            [
+                TaskAssignment(title="A", etaDays=1, dependsOn=["C"]),
+                TaskAssignment(title="B", etaDays=1, dependsOn=["A"]),
+                TaskAssignment(title="C", etaDays=1, dependsOn=["B"]),
+            ]
+        )
+    )
+    assert graph.cycles == [["1.1", "1.3", "1.2", "1.1"]]
+    assert sorted(graph.order) == ["1.1", "1.2", "1.3"]
+    assert graph.durationDays == 3
+
+
+def test_missing_or_negative_estimates_count_as_one_day():
+    graph = build_task_graph(_plan([TaskAssignment(title="A"), TaskAssignment(title="B", etaDays=-2, dependsOn=["A"])]))
+    assert graph.durationDays == 2
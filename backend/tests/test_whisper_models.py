@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import sys
+import types
+from importlib.machinery import ModuleSpec
+
+import pytest
+
+from app.services.audio_preprocessing import TranscriptionOptions
+from app.services.whisper_models import WhisperModelRegistry
+
+
+@pytest.fixture
+def fake_whisper(monkeypatch):
+    loads: list[str] = []
+
+    class WhisperModel:
+        def __init__(self, size: str, *, compute_type: str, **_: object) -> None:
+            loads.append(compute_type)
+
+    module = types.ModuleType("faster_whisper")
+    module.__spec__ = ModuleSpec("faster_whisper", None)
+    module.WhisperModel = WhisperModel  # type: ignore[attr-defined]
+    monkeypatch.setitem(sys.modules, "faster_whisper", module)
+    return loads
+
+
+def test_registry_evicts_least_recently_used_non_default_model(fake_whisper, monkeypatch):
+    monkeypatch.delenv("TRANSCRIPTION_COMPUTE_TYPE", raising=False)
+    monkeypatch.delenv("WHISPER_MAX_MODELS", raising=False)
+    registry = WhisperModelRegistry(compute_type="int8", max_models=2)
+
+    default = registry.get()
+    registry.get("float32")
+    registry.get("int16")
+
+    assert registry.status()["loadedComputeTypes"] == ["int8", "int16"]
+    assert registry.get() is default
+    registry.get("float32")
+    assert fake_whisper == ["int8", "float32", "int16", "float32"]
+
+
+def test_request_compute_type_must_be_enabled(monkeypatch):
+    monkeypatch.delenv("TRANSCRIPTION_REQUEST_COMPUTE_TYPES", raising=False)
+    options = TranscriptionOptions(compute_type="int8")
+
+    assert options.for_request(compute_type="INT8").compute_type == "int8"
+    with pytest.raises(ValueError):
+        options.for_request(compute_type="float32")
+
+    monkeypatch.setenv("TRANSCRIPTION_REQUEST_COMPUTE_TYPES", "float32, int16")
+    assert options.for_request(compute_type="float32").compute_type == "float32"
+    with pytest.raises(ValueError):
+        options.for_request(compute_type="bogus")
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+import asyncio
 import json
+import logging
 import uuid
 from datetime import datetime
 from pathlib import Path
@@ -13,6 +15,13 @@ from .utils.openrouter import OpenRouterClient
 
 DATA_DIR = Path(__file__).resolve().parent / 'data'
 MEETINGS_FILE = DATA_DIR / 'sample_meetings.json'
+CHUNK_CHARS = 4000
+CHUNK_OVERLAP = 400
+# Digests longer than this are digested again before they reach the summary and task prompts.
+NOTES_CHARS = 8000
+MAX_CONDENSE_ROUNDS = 3
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title='Agentic Planner API')
 router = APIRouter(prefix='/api')
@@ -27,6 +36,7 @@ app.add_middleware(
 app.include_router(router)
 
 llm = OpenRouterClient()
+app.add_event_handler('shutdown', llm.aclose)
 MEETINGS: List[Dict[str, Any]] = json.loads(MEETINGS_FILE.read_text()) if MEETINGS_FILE.exists() else []
 TRANSCRIPTS: Dict[str, str] = {}
 
@@ -46,13 +56,55 @@ async def _transcribe_audio(file: UploadFile) -> str:
     return f"Transcribed {file.filename} (~{minutes} min). Discussed automation, blockers, and next steps."
 
 
+def _split_transcript(transcript: str) -> List[str]:
+    step = CHUNK_CHARS - CHUNK_OVERLAP
+    return [transcript[start:start + CHUNK_CHARS] for start in range(0, max(len(transcript) - CHUNK_OVERLAP, 1), step)]
+
+
+async def _condense_transcript(transcript: str) -> str:
+    """Return the transcript itself when short, otherwise notes digested from every chunk in parallel.
+
+    Notes over NOTES_CHARS are condensed the same way again (at most MAX_CONDENSE_ROUNDS times, then cut).
+    A chunk whose digest fails is kept as is.
+    """
+    if len(transcript) <= CHUNK_CHARS:
+        return transcript
+
+    async def digest(chunk: str) -> str:
+        messages = [
+            {
+                'role': 'system',
+                'content': 'Extract the decisions, action items (with owners) and risks from this meeting excerpt as short bullet points.'
+            },
+            {'role': 'user', 'content': chunk}
+        ]
+        try:
+            return await llm.chat(messages, model='openai/gpt-4o-mini')
+        except Exception:
+            logger.warning('Transcript digest failed; keeping the %d-char chunk undigested', len(chunk), exc_info=True)
+            return chunk
+
+    notes = transcript
+    for _ in range(MAX_CONDENSE_ROUNDS):
+        condensed = '\n\n'.join(await asyncio.gather(*(digest(chunk) for chunk in _split_transcript(notes))))
+        if len(condensed) >= len(notes):
+            # Nothing was digested this round; another would only repeat the failures.
+            break
+        notes = condensed
+        if len(notes) <= NOTES_CHARS:
+            return notes
+    if len(notes) > NOTES_CHARS:
+        logger.warning('Condensed notes still %d chars; dropping the last %d', len(notes), len(notes) - NOTES_CHARS)
+    return notes[:NOTES_CHARS]
+
+
 async def _generate_summary(transcript: str) -> Dict[str, Any]:
     messages = [
         {
             'role': 'system',
             'content': 'Summarize the meeting and return JSON with keys title, attendees, summary, minutes, resources, hours, cost.'
         },
-        {'role': 'user', 'content': transcript[:4000]}
+        {'role': 'user', 'content': transcript}
     ]
     try:
         raw = await llm.chat(messages, model='anthropic/claude-3.5-sonnet')
@@ -80,7 +132,7 @@ async def _generate_tasks(transcript: str) -> List[Dict[str, Any]]:
             'role': 'system',
             'content': 'Extract actionable tasks from the meeting. Return JSON array of {id, name, description, owner, depends_on, hours, risk, status}.'
         },
-        {'role': 'user', 'content': transcript[:4000]}
+        {'role': 'user', 'content': transcript}
     ]
     try:
         raw = await llm.chat(messages, model='openai/gpt-4o-mini')
@@ -128,8 +180,8 @@ async def analyze_meeting(meeting_audio: UploadFile = File(...)) -> Dict[str, An
         raise HTTPException(status_code=400, detail='Upload an audio file.')
 
     transcript = await _transcribe_audio(meeting_audio)
-    summary = await _generate_summary(transcript)
-    tasks = await _generate_tasks(transcript)
+    notes = await _condense_transcript(transcript)
+    summary, tasks = await asyncio.gather(_generate_summary(notes), _generate_tasks(notes))
 
     meeting_id = f'meeting-{uuid.uuid4().hex[:6]}'
     meeting = {
@@ -153,4 +205,3 @@ async def analyze_meeting(meeting_audio: UploadFile = File(...)) -> Dict[str, An
 
 def get_app() -> FastAPI:
     return app
-*** End Patch
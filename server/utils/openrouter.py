@@ -15,6 +15,24 @@ class OpenRouterClient:
     def __init__(self, api_key: Optional[str] = None, model: str = DEFAULT_MODEL) -> None:
         self.api_key = api_key or os.getenv('OPENROUTER_API_KEY')
         self.model = model
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # One pooled client per instance keeps connections alive between calls.
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=60,
+                limits=httpx.Limits(
+                    max_connections=int(os.getenv('HTTP_MAX_CONNECTIONS', '20')),
+                    max_keepalive_connections=int(os.getenv('HTTP_MAX_KEEPALIVE', '10')),
+                ),
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     async def chat(self, messages: List[Dict[str, str]], model: Optional[str] = None, **kwargs: Any) -> str:
         if not self.api_key:
@@ -32,11 +50,10 @@ class OpenRouterClient:
             'X-Title': os.getenv('OPENROUTER_APP_NAME', 'Agentic Planner')
         }
 
-        async with httpx.AsyncClient(timeout=60) as client:
-            response = await client.post(OPENROUTER_URL, json=payload, headers=headers)
-            response.raise_for_status()
-            data = response.json()
-            return data['choices'][0]['message']['content']
+        response = await self._get_client().post(OPENROUTER_URL, json=payload, headers=headers)
+        response.raise_for_status()
+        data = response.json()
+        return data['choices'][0]['message']['content']
 
     def _offline_stub(self, messages: List[Dict[str, str]]) -> str:
         last_prompt = messages[-1]['content'] if messages else ''